@@ -1,14 +1,8 @@
 from flask import Flask, redirect, url_for
-from flask_sqlalchemy import SQLAlchemy
-from flask_login import LoginManager
 from config import Config
 from error_handlers import setup_logging, register_error_handlers
-from flask_wtf.csrf import CSRFProtect
+from extensiones import db, login_manager, csrf, init_extensiones
 
-db = SQLAlchemy()
-login_manager = LoginManager()
-
-csrf = CSRFProtect()
 
 def create_app():
     app = Flask(__name__, template_folder='templates')
@@ -17,21 +11,8 @@ def create_app():
     # Configurar logging
     setup_logging(app)
     
-    # Inicializar extensiones
-    db.init_app(app)
-    login_manager.init_app(app)
-    csrf.init_app(app)  # ✅ Activar CSRF protection
-
-
-    # Configurar Flask-Login
-    login_manager.login_view = 'auth.login'
-    login_manager.login_message = 'Por favor inicia sesión para acceder a esta página.'
-    login_manager.login_message_category = 'info'
-    
-    @login_manager.user_loader
-    def load_user(user_id):
-        from models.usuario import Usuario
-        return Usuario.query.get(int(user_id))
+    # Inicializar extensiones (base de datos, login, CSRF, cachés, auditoría...)
+    init_extensiones(app)
 
     # Registrar manejadores de errores
     register_error_handlers(app)
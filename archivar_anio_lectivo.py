@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Script para archivar un año lectivo cerrado en una base SQLite separada
+
+Uso:
+    python archivar_anio_lectivo.py 2023          # archiva el año lectivo 2023-2024
+    python archivar_anio_lectivo.py 2023 --sin-vacuum
+"""
+
+import argparse
+import os
+import sys
+
+# Agregar el directorio del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app_simple import create_app, db
+from archivo_historico import archivar_anio_lectivo, directorio_archivo
+from versiones import incrementar
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Archiva un año lectivo cerrado')
+    parser.add_argument('anio', type=int, help='Año en que inició el año lectivo (ej: 2023)')
+    parser.add_argument('--sin-vacuum', action='store_true', help='No compactar la base principal')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            print("El archivo histórico solo está disponible con SQLite")
+            return 1
+
+        try:
+            movidos = archivar_anio_lectivo(
+                db.engine,
+                args.anio,
+                directorio_archivo(app),
+                mes_inicio=app.config['ANIO_LECTIVO_MES_INICIO'],
+                vacuum=not args.sin_vacuum
+            )
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+
+        # Las asistencias se movieron fuera de la sesión: invalidar cachés
+        with db.engine.begin() as conexion:
+            incrementar(conexion, 'asistencias')
+
+    print(f"Año lectivo {args.anio}-{args.anio + 1} archivado: {movidos} registros movidos")
+    print("Reinicia la aplicación para que la vista histórica incluya el nuevo archivo")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
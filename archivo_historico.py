@@ -0,0 +1,207 @@
+"""
+Archivo de años lectivos cerrados en bases SQLite separadas.
+
+Las asistencias de un año lectivo terminado se mueven a
+``instance/archivo_<año>.db``. Cada conexión del pool adjunta esos archivos
+y define la vista temporal ``asistencias_historico`` (unión de la tabla
+activa y de las archivadas) para las consultas históricas. Así la base
+principal conserva solo el año en curso y sus índices siguen siendo pequeños.
+
+Los archivos nuevos se adjuntan al abrir conexiones nuevas, por lo que la
+aplicación debe reiniciarse después de archivar un año.
+"""
+
+import logging
+import os
+import re
+
+from datetime import date
+from sqlalchemy import event, table, column, Integer, Date, Time, String, Float
+
+from utils import rango_anio_lectivo
+
+logger = logging.getLogger(__name__)
+
+TABLA = 'asistencias'
+VISTA_HISTORICA = 'asistencias_historico'
+PATRON_ARCHIVO = re.compile(r'^archivo_(\d{4})\.db$')
+
+# SQLite permite 10 bases adjuntas por conexión (SQLITE_MAX_ATTACHED)
+MAX_ADJUNTOS = 10
+
+# Tabla ligera para construir consultas Core sobre la vista histórica
+asistencias_historico = table(
+    VISTA_HISTORICA,
+    column('id', Integer),
+    column('escuela_id', Integer),
+    column('docente_id', Integer),
+    column('fecha', Date),
+    column('hora_entrada', Time),
+    column('hora_salida', Time),
+    column('estado', String),
+    column('jornada', String),
+    column('modo', String),
+    column('device_id', String),
+    column('latitud', Float),
+    column('longitud', Float),
+)
+
+
+def directorio_archivo(app):
+    """Carpeta donde se guardan las bases archivadas."""
+    return app.config.get('ARCHIVO_HISTORICO_DIR') or app.instance_path
+
+
+def archivos_disponibles(directorio):
+    """Lista ordenada de (año, ruta) de los años lectivos archivados."""
+    if not os.path.isdir(directorio):
+        return []
+    archivos = []
+    for nombre in os.listdir(directorio):
+        coincidencia = PATRON_ARCHIVO.match(nombre)
+        if coincidencia:
+            archivos.append((int(coincidencia.group(1)), os.path.join(directorio, nombre)))
+    return sorted(archivos)
+
+
+def _columnas(cursor, esquema):
+    cursor.execute(f"PRAGMA {esquema}.table_info({TABLA})")
+    return [fila[1] for fila in cursor.fetchall()]
+
+
+def _defectos(cursor):
+    """{columna: valor por defecto SQL} de la tabla principal."""
+    cursor.execute(f"PRAGMA main.table_info({TABLA})")
+    return {fila[1]: fila[4] for fila in cursor.fetchall() if fila[4] is not None}
+
+
+def _sincronizar_columnas(cursor, esquema, columnas_principal):
+    """Agrega al archivo las columnas nuevas de la tabla principal."""
+    existentes = set(_columnas(cursor, esquema))
+    cursor.execute(f"PRAGMA main.table_info({TABLA})")
+    tipos = {fila[1]: fila[2] for fila in cursor.fetchall()}
+    defectos = _defectos(cursor)
+    for nombre in columnas_principal:
+        if nombre not in existentes:
+            # Con su valor por defecto (p. ej. escuela_id = 1 en archivos viejos)
+            defecto = f" DEFAULT {defectos[nombre]}" if nombre in defectos else ''
+            cursor.execute(f"ALTER TABLE {esquema}.{TABLA} ADD COLUMN {nombre} {tipos.get(nombre, '')}{defecto}")
+
+
+def archivar_anio_lectivo(engine, anio_inicio, directorio, mes_inicio=9, vacuum=True):
+    """Mueve las asistencias de un año lectivo cerrado a su propio archivo.
+
+    Returns:
+        int: cantidad de registros movidos
+    """
+    inicio, fin = rango_anio_lectivo(anio_inicio, mes_inicio)
+    if fin > date.today():
+        raise ValueError(f"El año lectivo {anio_inicio}-{anio_inicio + 1} aún no ha terminado")
+
+    os.makedirs(directorio, exist_ok=True)
+    esquema = f'archivo_{anio_inicio}'
+    ruta = os.path.join(directorio, f'{esquema}.db')
+    rango = (inicio.isoformat(), fin.isoformat())
+
+    raw = engine.raw_connection()
+    conexion = getattr(raw, 'driver_connection', None) or raw.connection
+    nivel_previo = conexion.isolation_level
+    try:
+        conexion.isolation_level = None  # control manual de la transacción
+        cursor = conexion.cursor()
+        cursor.execute(f"ATTACH DATABASE ? AS {esquema}", (ruta,))
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                columnas = _columnas(cursor, 'main')
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {esquema}.{TABLA} AS SELECT * FROM main.{TABLA} WHERE 0"
+                )
+                _sincronizar_columnas(cursor, esquema, columnas)
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {esquema}.idx_archivo_docente_fecha "
+                    f"ON {TABLA} (docente_id, fecha)"
+                )
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {esquema}.idx_archivo_fecha ON {TABLA} (fecha)"
+                )
+                lista = ', '.join(columnas)
+                cursor.execute(
+                    f"INSERT INTO {esquema}.{TABLA} ({lista}) "
+                    f"SELECT {lista} FROM main.{TABLA} WHERE fecha >= ? AND fecha < ?",
+                    rango
+                )
+                movidos = cursor.rowcount
+                cursor.execute(f"DELETE FROM main.{TABLA} WHERE fecha >= ? AND fecha < ?", rango)
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+        finally:
+            cursor.execute(f"DETACH DATABASE {esquema}")
+
+        if vacuum and movidos:
+            cursor.execute("VACUUM")
+        cursor.close()
+    finally:
+        conexion.isolation_level = nivel_previo
+        raw.close()
+
+    logger.info("Año lectivo %s archivado en %s (%s registros)", anio_inicio, ruta, movidos)
+    return movidos
+
+
+def adjuntar_archivos(dbapi_connection, directorio):
+    """Adjunta los archivos a una conexión y crea la vista histórica."""
+    archivos = archivos_disponibles(directorio)
+    if len(archivos) >= MAX_ADJUNTOS:
+        logger.warning(
+            "Hay %s archivos históricos; solo se adjuntan los %s más recientes",
+            len(archivos), MAX_ADJUNTOS - 1
+        )
+        archivos = archivos[-(MAX_ADJUNTOS - 1):]
+
+    cursor = dbapi_connection.cursor()
+    try:
+        columnas = _columnas(cursor, 'main')
+        if not columnas:
+            return  # la tabla aún no existe (primer arranque)
+
+        defectos = _defectos(cursor)
+        selects = [f"SELECT {', '.join(columnas)} FROM main.{TABLA}"]
+        for anio, ruta in archivos:
+            esquema = f'archivo_{anio}'
+            cursor.execute(f"ATTACH DATABASE ? AS {esquema}", (ruta,))
+            disponibles = set(_columnas(cursor, esquema))
+            if not disponibles:
+                continue
+            campos = ', '.join(c if c in disponibles else f"{defectos.get(c, 'NULL')} AS {c}" for c in columnas)
+            selects.append(f"SELECT {campos} FROM {esquema}.{TABLA}")
+
+        cursor.execute(f"DROP VIEW IF EXISTS temp.{VISTA_HISTORICA}")
+        cursor.execute(f"CREATE TEMP VIEW {VISTA_HISTORICA} AS " + " UNION ALL ".join(selects))
+    finally:
+        cursor.close()
+
+
+def anios_archivados(app):
+    """Conjunto de años lectivos que ya no están en la tabla principal."""
+    return {anio for anio, _ in archivos_disponibles(directorio_archivo(app))}
+
+
+def init_app(app, db):
+    """Adjunta los archivos históricos a cada conexión SQLite nueva."""
+    if not app.config.get('ARCHIVO_HISTORICO_ACTIVO'):
+        return
+
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        logger.warning("El archivo histórico solo está disponible con SQLite")
+        return
+
+    directorio = directorio_archivo(app)
+
+    @event.listens_for(engine, 'connect')
+    def _al_conectar(dbapi_connection, connection_record):
+        adjuntar_archivos(dbapi_connection, directorio)
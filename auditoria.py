@@ -0,0 +1,165 @@
+"""
+Auditoría de acciones de usuario.
+
+``log_user_action`` deja cada acción en un buffer circular en memoria; un
+hilo de fondo lo vacía en lotes sobre la tabla ``auditoria`` con su propia
+conexión. Así las rutas no agregan un commit por petición para auditar.
+
+Cada registro guarda la escuela del usuario y ``consultar`` solo devuelve
+los de la escuela actual.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+
+from collections import deque
+from datetime import datetime
+
+from escuelas import escuela_actual_id, escuela_o_defecto
+from models.auditoria import Auditoria
+
+logger = logging.getLogger(__name__)
+
+
+class BufferAuditoria:
+    """Buffer circular de registros de auditoría con vaciado por lotes.
+
+    Si el buffer se llena antes de poder escribirse, se descartan los
+    registros más antiguos y se cuentan en ``descartados``.
+    """
+
+    def __init__(self, capacidad=10000, lote=100, intervalo=2.0):
+        self.capacidad = capacidad
+        self.lote = lote
+        self.intervalo = intervalo
+        self.descartados = 0
+        self._engine = None
+        self._registros = deque(maxlen=capacidad)
+        self._lock = threading.Lock()
+        self._escritura = threading.Lock()
+        self._evento = threading.Event()
+        self._hilo = None
+        self._pid = None
+        self._detenido = False
+
+    def configurar(self, engine, capacidad=None, lote=None, intervalo=None):
+        self._engine = engine
+        if capacidad and capacidad != self.capacidad:
+            with self._lock:
+                self.capacidad = capacidad
+                self._registros = deque(self._registros, maxlen=capacidad)
+        self.lote = lote or self.lote
+        self.intervalo = intervalo or self.intervalo
+
+    def registrar(self, registro):
+        """Agrega un registro (dict con las columnas de ``auditoria``)."""
+        with self._lock:
+            if len(self._registros) == self._registros.maxlen:
+                self.descartados += 1
+            self._registros.append(registro)
+            pendientes = len(self._registros)
+        self._asegurar_hilo()
+        if pendientes >= self.lote:
+            self._evento.set()
+
+    def _asegurar_hilo(self):
+        # El hilo se crea en el proceso que registra (seguro con fork de workers)
+        if self._hilo is not None and self._hilo.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._detenido = False
+            self._hilo = threading.Thread(target=self._trabajar, name='auditoria', daemon=True)
+            self._hilo.start()
+
+    def _trabajar(self):
+        while not self._detenido:
+            self._evento.wait(self.intervalo)
+            self._evento.clear()
+            self.vaciar()
+
+    def vaciar(self):
+        """Escribe en la base todos los registros pendientes."""
+        if self._engine is None:
+            return 0
+        with self._escritura:
+            with self._lock:
+                if not self._registros:
+                    return 0
+                filas = list(self._registros)
+                self._registros.clear()
+            try:
+                with self._engine.begin() as conexion:
+                    conexion.execute(Auditoria.__table__.insert(), filas)
+            except Exception:
+                logger.exception("No se pudieron guardar %s registros de auditoría", len(filas))
+                return 0
+        return len(filas)
+
+    def detener(self):
+        self._detenido = True
+        self._evento.set()
+        if self._hilo is not None and self._hilo.is_alive():
+            self._hilo.join(timeout=5)
+        self.vaciar()
+
+
+buffer = BufferAuditoria()
+
+
+def init_app(app, db):
+    """Configura el buffer con el engine de la aplicación."""
+    with app.app_context():
+        engine = db.engine
+    buffer.configurar(
+        engine,
+        capacidad=app.config.get('AUDITORIA_CAPACIDAD'),
+        lote=app.config.get('AUDITORIA_LOTE'),
+        intervalo=app.config.get('AUDITORIA_INTERVALO')
+    )
+    atexit.register(buffer.detener)
+
+
+def registrar_accion(usuario, accion, entidad=None, entidad_id=None, detalles=None, ip=None, escuela_id=None):
+    """Encola una acción de usuario para la tabla de auditoría (en ``escuela_id`` o la escuela actual)."""
+    if detalles is not None and not isinstance(detalles, str):
+        detalles = json.dumps(detalles, ensure_ascii=False, default=str)
+    buffer.registrar({
+        'escuela_id': escuela_o_defecto(escuela_id),
+        'fecha': datetime.utcnow(),
+        'usuario': usuario,
+        'accion': accion,
+        'entidad': entidad,
+        'entidad_id': entidad_id,
+        'detalles': detalles,
+        'ip': ip,
+    })
+
+
+def consultar(usuario=None, entidad=None, entidad_id=None, desde=None, hasta=None, limite=100):
+    """Consulta la auditoría de la escuela actual por usuario, entidad y rango [desde, hasta).
+
+    Antes de consultar se vacía el buffer para incluir las acciones recientes.
+    """
+    buffer.vaciar()
+
+    query = Auditoria.query
+    escuela = escuela_actual_id()
+    if escuela is not None:
+        query = query.filter(Auditoria.escuela_id == escuela)
+    if usuario:
+        query = query.filter(Auditoria.usuario == usuario)
+    if entidad:
+        query = query.filter(Auditoria.entidad == entidad)
+    if entidad_id is not None:
+        query = query.filter(Auditoria.entidad_id == entidad_id)
+    if desde:
+        query = query.filter(Auditoria.fecha >= desde)
+    if hasta:
+        query = query.filter(Auditoria.fecha < hasta)
+    return query.order_by(Auditoria.fecha.desc()).limit(limite).all()
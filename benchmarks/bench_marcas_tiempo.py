@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de marcas_tiempo.py frente a datetime.strptime, con las
+marcas que envían los lectores de QR (una de cada cien en formato antiguo,
+sin ceros a la izquierda).
+
+Uso:
+    python benchmarks/bench_marcas_tiempo.py [cantidad]
+"""
+
+import os
+import random
+import sys
+import timeit
+
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import marcas_tiempo
+
+
+def generar_marcas(cantidad, antiguas=0.01):
+    """Simula un año de escaneos: (fecha, hora, 'fecha hora')."""
+    random.seed(42)
+    inicio = date(2025, 9, 1)
+    marcas = []
+    for _ in range(cantidad):
+        dia = inicio + timedelta(days=random.randint(0, 300))
+        h, m, s = random.randint(6, 19), random.randint(0, 59), random.randint(0, 59)
+        if random.random() < antiguas:
+            fecha, hora = f"{dia.year}-{dia.month}-{dia.day}", f"{h}:{m}:{s}"
+        else:
+            fecha, hora = dia.isoformat(), f"{h:02d}:{m:02d}:{s:02d}"
+        marcas.append((fecha, hora, f"{fecha} {hora}"))
+    return marcas
+
+
+def medir(nombre, funcion, repeticiones=5):
+    mejor = min(timeit.repeat(funcion, number=1, repeat=repeticiones))
+    print(f"  {nombre:<32} {mejor * 1000:8.2f} ms")
+    return mejor
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    marcas = generar_marcas(cantidad)
+    fechas = [m[0] for m in marcas]
+    horas = [m[1] for m in marcas]
+    completas = [m[2] for m in marcas]
+    print(f"{cantidad} marcas\n")
+
+    # Mismo resultado que antes
+    assert [marcas_tiempo.fecha_hora_de(t) for t in completas] == \
+        [datetime.strptime(t, '%Y-%m-%d %H:%M:%S') for t in completas]
+
+    print("fecha y hora separadas (sincronizar, importar_json)")
+    antes = medir("strptime x2", lambda: [
+        (datetime.strptime(f, '%Y-%m-%d').date(), datetime.strptime(h, '%H:%M:%S').time())
+        for f, h in zip(fechas, horas)
+    ])
+    despues = medir("fecha_de + hora_de", lambda: [
+        (marcas_tiempo.fecha_de(f), marcas_tiempo.hora_de(h)) for f, h in zip(fechas, horas)
+    ])
+    print(f"  mejora: x{antes / despues:.1f}\n")
+
+    print("fecha y hora juntas (registrar)")
+    antes = medir("strptime", lambda: [datetime.strptime(t, '%Y-%m-%d %H:%M:%S') for t in completas])
+    despues = medir("fecha_hora_de", lambda: [marcas_tiempo.fecha_hora_de(t) for t in completas])
+    print(f"  mejora: x{antes / despues:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de texto.py frente a las versiones anteriores de
+utils.slugify y validators.sanitize_input.
+
+Uso:
+    python benchmarks/bench_texto.py [cantidad]
+"""
+
+import os
+import random
+import re
+import sys
+import timeit
+import unicodedata
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import texto
+
+NOMBRES = ['José', 'María', 'Ángel', 'Lucía', 'Pedro', 'Ana', 'Íñigo', 'Sofía', 'Raúl', 'Martín']
+APELLIDOS = ['Pérez', 'Gómez', 'Núñez', 'Rodríguez', 'Chávez', 'Andrade', 'Muñoz', 'Cedeño', 'Vélez', 'Zambrano']
+
+
+def slugify_anterior(text):
+    if not text:
+        return ""
+    text = unicodedata.normalize('NFKD', str(text))
+    text = text.encode('ascii', 'ignore').decode('ascii').lower()
+    return re.sub(r'[^a-z0-9]+', '-', text).strip('-')
+
+
+def sanitize_anterior(text):
+    if not text:
+        return text
+    text = str(text)
+    for char in ['<', '>', '"', "'", '&', ';', '(', ')', 'script', 'javascript']:
+        text = text.replace(char, '')
+    return text.strip()
+
+
+def generar_nombres(cantidad, distintos=300):
+    """Simula un reporte: pocos docentes repetidos en muchas filas."""
+    random.seed(42)
+    base = [f"{random.choice(NOMBRES)} {random.choice(APELLIDOS)} {random.choice(APELLIDOS)}"
+            for _ in range(distintos)]
+    return [random.choice(base) for _ in range(cantidad)]
+
+
+def medir(nombre, funcion, repeticiones=5):
+    mejor = min(timeit.repeat(funcion, number=1, repeat=repeticiones))
+    print(f"  {nombre:<32} {mejor * 1000:8.2f} ms")
+    return mejor
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    nombres = generar_nombres(cantidad)
+    print(f"{cantidad} nombres ({len(set(nombres))} distintos)\n")
+
+    print("slugify")
+    antes = medir("anterior (fila por fila)", lambda: [slugify_anterior(n) for n in nombres])
+    medir("texto.slugify (caché LRU)", lambda: [texto.slugify(n) for n in nombres])
+    despues = medir("texto.slugify_lote", lambda: texto.slugify_lote(nombres))
+    print(f"  mejora: x{antes / despues:.1f}\n")
+
+    print("sanitize_input")
+    antes = medir("anterior (10 str.replace)", lambda: [sanitize_anterior(n) for n in nombres])
+    despues = medir("texto.sanitizar_lote", lambda: texto.sanitizar_lote(nombres))
+    print(f"  mejora: x{antes / despues:.1f}")
+
+
+if __name__ == '__main__':
+    main()
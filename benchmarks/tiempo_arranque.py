@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tiempo de arranque de la aplicación (importar app_simple + create_app).
+
+Cada medición corre en un proceso nuevo con ``python -X importtime`` y se
+informa la mejor de varias repeticiones, junto con los módulos que más
+tardan en importarse y las dependencias pesadas que se cargaron al arrancar
+(deberían cargarse solo cuando se usan).
+
+Uso:
+    python benchmarks/tiempo_arranque.py [--repeticiones 5] [--top 15]
+    python benchmarks/tiempo_arranque.py --presupuesto 800   # sale con 1 si se excede
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencias que solo se necesitan al exportar o generar archivos
+PESADAS = ('reportlab', 'openpyxl', 'pyarrow', 'qrcode', 'PIL', 'pandas')
+
+CODIGO = f"""
+import sys, time
+inicio = time.perf_counter()
+from app_simple import create_app
+create_app()
+total = (time.perf_counter() - inicio) * 1000
+print(f'{{total:.1f}}')
+print(','.join(m for m in {PESADAS!r} if m in sys.modules))
+"""
+
+LINEA_IMPORTTIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def medir_una_vez():
+    """(ms totales, {módulo de primer nivel: ms acumulados}, [pesadas cargadas])."""
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CODIGO],
+        cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+    total, pesadas = resultado.stdout.splitlines()[-2:]
+    modulos = {}
+    for linea in resultado.stderr.splitlines():
+        coincidencia = LINEA_IMPORTTIME.match(linea)
+        # Sangría de 1 espacio: importado directamente por el código medido
+        if coincidencia and len(coincidencia.group(3)) == 1:
+            modulos[coincidencia.group(4)] = int(coincidencia.group(2)) / 1000
+    return float(total), modulos, [m for m in pesadas.split(',') if m]
+
+
+def medir(repeticiones=5):
+    """Mejor medición de ``repeticiones`` arranques en frío."""
+    return min((medir_una_vez() for _ in range(repeticiones)), key=lambda m: m[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mide el tiempo de arranque de la aplicación')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='Módulos más lentos a mostrar')
+    parser.add_argument('--presupuesto', type=float, help='Máximo en ms; sale con 1 si se excede')
+    args = parser.parse_args()
+
+    total, modulos, pesadas = medir(args.repeticiones)
+    print(f"Arranque (mejor de {args.repeticiones}): {total:.1f} ms\n")
+    print("Imports más lentos (acumulado):")
+    for nombre, ms in sorted(modulos.items(), key=lambda m: m[1], reverse=True)[:args.top]:
+        print(f"  {nombre:<40} {ms:8.1f} ms")
+
+    if pesadas:
+        print(f"\nDependencias pesadas cargadas al arrancar: {', '.join(pesadas)}")
+
+    if args.presupuesto is not None and total > args.presupuesto:
+        print(f"\nPresupuesto excedido: {total:.1f} ms > {args.presupuesto:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,17 +1,31 @@
 from flask import Blueprint, render_template, send_file,request, flash, redirect, url_for, jsonify
 from models.docente import Docente
 from datetime import datetime, time, timedelta
-import qrcode
 import os
 from app_simple import db
 from models.asistencia import Asistencia
 from io import BytesIO
-from utils import get_local_ip, slugify
+from utils import get_local_ip
+from incidencias import calcular
+from horarios import validar_horario, validar_lote, actualizar_horario, obtener_tabla
+from models.horario import Horario
+from models.feriado import Feriado
+from error_handlers import admin_required, log_user_action
+from cache_compartido import cache
+from cubo_asistencia import invalidar_en_sesion
+from sql_portable import insertar_lote
+from marcas_tiempo import fecha_de, fecha_hora_de, hora_de
+from registro_asistencia import marcar_entrada, marcar_salida, registro_existente
+from tardanzas import sumar_insertadas
+from versiones import incrementar_en_sesion
+from escuelas import requiere_escuela
 import json
 from urllib.parse import urlparse, parse_qs
 
 
 asistencia_bp = Blueprint('asistencia', __name__, template_folder='templates/asistencia')
+# Los lectores y la página del QR marcan sin sesión
+requiere_escuela(asistencia_bp, exentas=('index', 'escanear_qr', 'sincronizar_asistencia', 'registrar_asistencia_post'))
 
 
 def jornada_actual():
@@ -57,75 +71,22 @@ def obtener_jornada_valida(docente, hora):
     
     return True, jornada_hora, "Jornada válida"
 
-def validar_horario_registro(hora, jornada, tipo_registro='entrada'):
+def validar_horario_registro(hora, jornada, tipo_registro='entrada', tipo=None, escuela=None):
     """
     Valida si el horario es válido para una jornada y tipo de registro específicos.
     Permite registros tardíos y jornadas especiales de 8 horas.
+    Las ventanas se leen de la tabla ``horarios`` (ver horarios.py).
     Args:
         hora: datetime.time - Hora a validar
         jornada: str - Jornada del docente ('matutina', 'vespertina', 'completa')
         tipo_registro: str - Tipo de registro ('entrada' o 'salida')
+        tipo: str - Tipo de personal (DOCENTE, ADMINISTRATIVO, ...) o None
+        escuela: int - Escuela del docente (None = la de la petición)
     Returns:
         tuple: (es_valido, mensaje, es_tardio)
     """
-    HORARIOS = {
-        'matutina': {
-            'entrada': (time(7, 0), time(8, 30)),     # 7:00 a 8:30
-            'salida': (time(12, 30), time(13, 30))    # 12:30 a 13:30
-        },
-        'vespertina': {
-            'entrada': (time(13, 0), time(14, 30)),   # 13:00 a 14:30
-            'salida': (time(17, 30), time(18, 30))    # 17:30 a 18:30
-        },
-        'completa': {
-            'entrada': (time(7, 0), time(8, 30)),     # 7:00 a 8:30
-            'salida': (time(15, 0), time(16, 0))      # 15:00 a 16:00 (8 horas después)
-        }
-    }
-    
-    LIMITES_TARDANZA = {
-        'matutina': {
-            'entrada': time(12, 0),     # Límite máximo entrada matutina
-            'salida': time(14, 0)       # Límite máximo salida matutina
-        },
-        'vespertina': {
-            'entrada': time(17, 0),     # Límite máximo entrada vespertina
-            'salida': time(19, 0)       # Límite máximo salida vespertina
-        },
-        'completa': {
-            'entrada': time(12, 0),     # Límite máximo entrada jornada completa
-            'salida': time(17, 0)       # Límite máximo salida jornada completa
-        }
-    }
-    
-    if jornada not in HORARIOS:
-        return False, "Jornada no válida", False
-        
-    horarios = HORARIOS[jornada]
-    
-    if tipo_registro not in horarios:
-        return False, f"Tipo de registro '{tipo_registro}' no válido", False
-        
-    hora_min, hora_max = horarios[tipo_registro]
-    
-    # Si está dentro del horario normal
-    if hora_min <= hora <= hora_max:
-        return True, "Horario válido", False
-        
-    # Si es un registro tardío pero dentro del límite permitido
-    limite_tardanza = LIMITES_TARDANZA[jornada][tipo_registro]
-    if hora <= limite_tardanza:
-        return True, f"⚠️ Registro tardío ({hora_min.strftime('%H:%M')} - {hora_max.strftime('%H:%M')})", True
-        
-    # Para jornada completa, permitir también horarios de jornada vespertina
-    if jornada == 'completa' and tipo_registro == 'entrada':
-        horario_vesp = HORARIOS['vespertina']['entrada']
-        if horario_vesp[0] <= hora <= horario_vesp[1]:
-            return True, "Horario válido (turno vespertino)", False
-            
-    return False, f"❌ {tipo_registro.title()} fuera de horario permitido ({hora_min.strftime('%H:%M')} - {hora_max.strftime('%H:%M')})", False
-    
-    
+    return validar_horario(hora, jornada, tipo_registro, tipo, escuela)
+
 
 @asistencia_bp.route('/')
 def index():
@@ -137,16 +98,22 @@ def generar_qr(id):
     base_url = f"http://{get_local_ip()}:5000/asistencia/registrar"
     qr_data = f"{base_url}?docente={docente.id}"
 
-    qr = qrcode.QRCode(version=1, box_size=10, border=4)
-    qr.add_data(qr_data)
-    qr.make(fit=True)
+    def generar():
+        import qrcode  # qrcode y PIL se cargan solo al generar un código
+
+        qr = qrcode.QRCode(version=1, box_size=10, border=4)
+        qr.add_data(qr_data)
+        qr.make(fit=True)
 
-    img = qr.make_image(fill_color="black", back_color="white")
+        img = qr.make_image(fill_color="black", back_color="white")
 
-    buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
-    return send_file(buffer, mimetype='image/png')
+        buffer = BytesIO()
+        img.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    # El PNG solo depende de la URL: se genera una vez para todos los workers
+    png = cache.obtener_o_calcular(f'qr:{qr_data}', generar, ttl=86400)
+    return send_file(BytesIO(png), mimetype='image/png')
 
     
 
@@ -174,7 +141,7 @@ def escanear_qr():
             flash(f"❌ Error: {mensaje_jornada}", "danger")
             return redirect(url_for('asistencia.index'))
             
-        es_valido_horario, mensaje_horario = validar_horario_registro(hora, jornada_detectada)
+        es_valido_horario, mensaje_horario, _ = validar_horario_registro(hora, jornada_detectada, tipo=docente.tipo, escuela=docente.escuela_id)
         if not es_valido_horario:
             flash(f"❌ Error: {mensaje_horario}", "danger")
             return redirect(url_for('asistencia.index'))
@@ -204,8 +171,8 @@ def sincronizar_asistencia():
         return "❌ Parámetros incompletos", 400
 
     try:
-        fecha = datetime.strptime(fecha_str, "%Y-%m-%d").date()
-        hora = datetime.strptime(hora_str, "%H:%M:%S").time()
+        fecha = fecha_de(fecha_str)
+        hora = hora_de(hora_str)
     except ValueError:
         return "❌ Formato de fecha/hora inválido", 400
 
@@ -218,7 +185,7 @@ def sincronizar_asistencia():
     if not es_valido_jornada:
         return f"❌ Error: {mensaje_jornada}", 400
         
-    es_valido_horario, mensaje_horario = validar_horario_registro(hora, jornada_detectada)
+    es_valido_horario, mensaje_horario, _ = validar_horario_registro(hora, jornada_detectada, tipo=docente.tipo, escuela=docente.escuela_id)
     if not es_valido_horario:
         return f"❌ Error: {mensaje_horario}", 400
 
@@ -449,44 +416,11 @@ def calcular_incidencias(jornada: str, hora_entrada: time, hora_salida: time):
     """
     Calcula minutos de atraso y salida temprana según la jornada.
     - Matutina: 07:00 a 13:00
-    - Vespertina: 13:00 a 19:00
+    - Vespertina: 13:00 a 18:00
     - Completa: salida = entrada + 6 horas
+    Usa el mismo cálculo en lote que los reportes (ver incidencias.py).
     """
-    hoy = datetime.today().date()
-    atraso = 0
-    salida_temprana = 0
-
-    if jornada == "matutina":
-        inicio, fin = time(7, 0), time(13, 0)
-    elif jornada == "vespertina":
-        inicio, fin = time(12, 0), time(18, 0)
-    elif jornada == "completa":
-        if not hora_entrada:
-            return 0, 0
-        entrada_dt = datetime.combine(hoy, hora_entrada)
-        salida_esperada = entrada_dt + timedelta(hours=6)
-        if hora_salida:
-            salida_dt = datetime.combine(hoy, hora_salida)
-            if salida_dt < salida_esperada:
-                salida_temprana = int((salida_esperada - salida_dt).total_seconds() // 60)
-        return 0, salida_temprana
-    else:
-        return 0, 0
-
-    # Para matutina/vespertina
-    if hora_entrada:
-        entrada_dt = datetime.combine(hoy, hora_entrada)
-        inicio_dt = datetime.combine(hoy, inicio)
-        if entrada_dt > inicio_dt:
-            atraso = int((entrada_dt - inicio_dt).total_seconds() // 60)
-
-    if hora_salida:
-        salida_dt = datetime.combine(hoy, hora_salida)
-        fin_dt = datetime.combine(hoy, fin)
-        if salida_dt < fin_dt:
-            salida_temprana = int((fin_dt - salida_dt).total_seconds() // 60)
-
-    return atraso, salida_temprana
+    return calcular(jornada, hora_entrada, hora_salida)
 
 @asistencia_bp.route('/registrar', methods=['GET', 'POST'])
 def registrar_asistencia_post():
@@ -520,7 +454,7 @@ def registrar_asistencia_post():
         modo = data.get('modo', 'presencial')  # 👈 nuevo parámetro
         fecha_hora_str = data.get('fecha')
 
-        docente = Docente.query.get(int(docente_id))
+        docente = db.session.get(Docente, int(docente_id))
         if not docente:
             return jsonify({
                 "status": "error",
@@ -528,7 +462,7 @@ def registrar_asistencia_post():
             }), 404
 
         # 🕒 Parsear fecha y hora
-        fecha_hora = datetime.strptime(fecha_hora_str, "%Y-%m-%d %H:%M:%S")
+        fecha_hora = fecha_hora_de(fecha_hora_str)
         fecha = fecha_hora.date()
         hora = fecha_hora.time()
 
@@ -540,38 +474,23 @@ def registrar_asistencia_post():
         else:
             jornada_detectada = "completa"
 
-        asistencia = Asistencia.query.filter_by(
-            docente_id=docente.id,
-            fecha=fecha,
-            jornada=jornada_detectada
-        ).first()
+        marca = dict(
+            device_id=device_id,
+            latitud=float(latitud) if latitud else None,
+            longitud=float(longitud) if longitud else None,
+            modo=modo
+        )
 
-        # 🟢 Registro de ENTRADA
+        # 🟢 Registro de ENTRADA (una sola sentencia: sin carrera entre dispositivos)
         if tipo.lower() == "entrada":
-            if asistencia and asistencia.hora_entrada is not None:
+            if marcar_entrada(db.session, docente, fecha, jornada_detectada, hora, **marca) is None:
+                hora_entrada = registro_existente(db.session, docente, fecha, jornada_detectada).hora_entrada
                 return jsonify({
                     "status": "warning",
-                    "mensaje": f"⚠️ {docente.nombre} ya registró su ENTRADA a las {asistencia.hora_entrada.strftime('%H:%M:%S')}",
+                    "mensaje": f"⚠️ {docente.nombre} ya registró su ENTRADA a las {hora_entrada.strftime('%H:%M:%S')}",
                     "jornada": jornada_detectada
                 }), 200
 
-            if not asistencia:
-                asistencia = Asistencia(
-                    docente_id=docente.id,
-                    fecha=fecha,
-                    jornada=jornada_detectada,
-                    modo=modo  # 👈 nuevo campo
-                )
-                db.session.add(asistencia)
-
-            asistencia.hora_entrada = hora
-            asistencia.device_id = device_id
-            asistencia.latitud = float(latitud) if latitud else None
-            asistencia.longitud = float(longitud) if longitud else None
-            asistencia.modo = modo or asistencia.modo  # 👈 actualización segura
-            asistencia.fecha_creacion = datetime.now()
-            asistencia.fecha_actualizacion = datetime.now()
-
             db.session.commit()
             return jsonify({
                 "status": "ok",
@@ -582,27 +501,21 @@ def registrar_asistencia_post():
 
         # 🔵 Registro de SALIDA
         elif tipo.lower() == "salida":
-            if not asistencia:
+            asistencia = marcar_salida(db.session, docente, fecha, jornada_detectada, hora, **marca)
+            if asistencia is None:
+                existente = registro_existente(db.session, docente, fecha, jornada_detectada)
+                if existente is None:
+                    return jsonify({
+                        "status": "warning",
+                        "mensaje": f"⚠️ {docente.nombre} no tiene una ENTRADA registrada hoy ({jornada_detectada}).",
+                        "jornada": jornada_detectada
+                    }), 200
                 return jsonify({
                     "status": "warning",
-                    "mensaje": f"⚠️ {docente.nombre} no tiene una ENTRADA registrada hoy ({jornada_detectada}).",
+                    "mensaje": f"⚠️ {docente.nombre} ya registró su SALIDA a las {existente.hora_salida.strftime('%H:%M:%S')}",
                     "jornada": jornada_detectada
                 }), 200
 
-            if asistencia.hora_salida is not None:
-                return jsonify({
-                    "status": "warning",
-                    "mensaje": f"⚠️ {docente.nombre} ya registró su SALIDA a las {asistencia.hora_salida.strftime('%H:%M:%S')}",
-                    "jornada": jornada_detectada
-                }), 200
-
-            asistencia.hora_salida = hora
-            asistencia.device_id = device_id or asistencia.device_id
-            asistencia.latitud = float(latitud) if latitud else asistencia.latitud
-            asistencia.longitud = float(longitud) if longitud else asistencia.longitud
-            asistencia.modo = modo or asistencia.modo  # 👈 mantiene o actualiza modo
-            asistencia.fecha_actualizacion = datetime.now()
-
             # 🔍 Calcular incidencias si existe función
             try:
                 atraso, salida_temprana = calcular_incidencias(
@@ -662,15 +575,16 @@ def importar_json():
         registros_importados = 0
         errores = []
 
+        # 1) Extraer y validar parámetros desde cada URL
+        candidatos = []
         for item in contenido:
             if not isinstance(item, dict) or 'UrlEscaneo' not in item:
                 continue
 
             try:
-                # Extraer y validar parámetros desde la URL
                 partes = urlparse(item['UrlEscaneo'])
                 qs = parse_qs(partes.query)
-                
+
                 try:
                     docente_id = int(qs.get('docente', [0])[0])
                 except ValueError:
@@ -684,57 +598,100 @@ def importar_json():
                     errores.append(f"Faltan parámetros requeridos en URL: {item['UrlEscaneo']}")
                     continue
 
-                docente = Docente.query.get(docente_id)
-                if not docente:
-                    errores.append(f"Docente no encontrado con ID {docente_id}")
-                    continue
-
                 try:
-                    fecha = datetime.strptime(fecha_str, '%Y-%m-%d').date()
-                    hora = datetime.strptime(hora_str, '%H:%M:%S').time()
+                    fecha = fecha_de(fecha_str)
+                    hora = hora_de(hora_str)
                 except ValueError as e:
                     errores.append(f"Formato de fecha/hora inválido: {str(e)}")
                     continue
 
-                # Validar jornada y horario
-                es_valido_jornada, jornada_detectada, mensaje_jornada = obtener_jornada_valida(docente, hora)
-                if not es_valido_jornada:
-                    errores.append(f"Error en jornada para {docente.nombre}: {mensaje_jornada}")
-                    continue
+                candidatos.append((docente_id, fecha, fecha_str, hora))
 
-                es_valido_horario, mensaje_horario = validar_horario_registro(hora, jornada_detectada)
-                if not es_valido_horario:
-                    errores.append(f"Error en horario para {docente.nombre}: {mensaje_horario}")
-                    continue
+            except Exception as e:
+                errores.append(f"Error procesando registro: {str(e)}")
+                continue
+
+        # 2) Docentes y jornadas del lote (una consulta para todos los docentes)
+        ids = {docente_id for docente_id, _, _, _ in candidatos}
+        docentes = {d.id: d for d in Docente.query.filter(Docente.id.in_(ids))} if ids else {}
 
-                # Buscar o crear registro para la jornada específica
-                registro = Asistencia.query.filter_by(
-                    docente_id=docente.id, 
-                    fecha=fecha,
-                    jornada=jornada_detectada
-                ).first()
-
-                if not registro:
-                    registro = Asistencia(
-                        docente_id=docente.id, 
-                        fecha=fecha,
-                        jornada=jornada_detectada
-                    )
-                    registro.hora_entrada = hora
-                elif not registro.hora_entrada:
-                    registro.hora_entrada = hora
-                elif not registro.hora_salida:
-                    registro.hora_salida = hora
-                else:
+        validos = []
+        for docente_id, fecha, fecha_str, hora in candidatos:
+            docente = docentes.get(docente_id)
+            if not docente:
+                errores.append(f"Docente no encontrado con ID {docente_id}")
+                continue
+
+            es_valido_jornada, jornada_detectada, mensaje_jornada = obtener_jornada_valida(docente, hora)
+            if not es_valido_jornada:
+                errores.append(f"Error en jornada para {docente.nombre}: {mensaje_jornada}")
+                continue
+
+            validos.append((docente, fecha, fecha_str, hora, jornada_detectada))
+
+        # 3) Validar todos los horarios del lote de una vez
+        resultados = validar_lote(
+            [v[3] for v in validos],
+            [v[4] for v in validos],
+            'entrada',
+            [v[0].tipo for v in validos]
+        )
+
+        # Registros existentes del lote en una sola consulta
+        existentes = {}
+        if validos:
+            fechas = {v[1] for v in validos}
+            for registro in Asistencia.query.filter(
+                Asistencia.docente_id.in_({v[0].id for v in validos}),
+                Asistencia.fecha.in_(fechas)
+            ):
+                existentes[(registro.docente_id, registro.fecha, registro.jornada)] = registro
+
+        # 4) Completar los registros existentes y reunir los nuevos
+        nuevos = {}
+        for (docente, fecha, fecha_str, hora, jornada_detectada), (es_valido_horario, mensaje_horario, _) in zip(validos, resultados):
+            if not es_valido_horario:
+                errores.append(f"Error en horario para {docente.nombre}: {mensaje_horario}")
+                continue
+
+            # Buscar o crear registro para la jornada específica
+            clave = (docente.id, fecha, jornada_detectada)
+            registro = existentes.get(clave)
+            nuevo = nuevos.get(clave)
+
+            if registro is None and nuevo is None:
+                nuevos[clave] = {
+                    'escuela_id': docente.escuela_id,
+                    'docente_id': docente.id,
+                    'fecha': fecha,
+                    'jornada': jornada_detectada,
+                    'hora_entrada': hora,
+                    'hora_salida': None,
+                }
+            elif nuevo is not None:
+                if nuevo['hora_salida'] is not None:
                     errores.append(f"Ya existe registro completo para {docente.nombre} en {fecha_str}")
                     continue
+                nuevo['hora_salida'] = hora
+            elif not registro.hora_entrada:
+                registro.hora_entrada = hora
+            elif not registro.hora_salida:
+                registro.hora_salida = hora
+            else:
+                errores.append(f"Ya existe registro completo para {docente.nombre} en {fecha_str}")
+                continue
 
-                db.session.add(registro)
-                registros_importados += 1
+            registros_importados += 1
 
-            except Exception as e:
-                errores.append(f"Error procesando registro: {str(e)}")
-                continue
+        # 5) Registros nuevos en un solo lote (COPY en PostgreSQL); sin el ORM,
+        #    así que se actualizan a mano las tardanzas, las versiones y el cubo
+        if nuevos:
+            filas = list(nuevos.values())
+            conexion = db.session.connection()
+            insertar_lote(conexion, Asistencia.__table__, filas)
+            sumar_insertadas(conexion, filas, {d.id: d.tipo for d in docentes.values()})
+            incrementar_en_sesion(db.session, Asistencia.__tablename__)
+            invalidar_en_sesion(db.session, {fecha for _, fecha, _ in nuevos})
 
         db.session.commit()
         
@@ -754,4 +711,76 @@ def importar_json():
     except Exception as e:
         flash(f'❌ Error al procesar el archivo: {str(e)}', 'danger')
 
-    return redirect(url_for('asistencia.index'))
\ No newline at end of file
+    return redirect(url_for('asistencia.index'))
+
+@asistencia_bp.route('/horarios', methods=['GET'])
+@admin_required
+def listar_horarios():
+    """Horarios de registro vigentes (tabla ``horarios``)"""
+    tabla = obtener_tabla()
+    return jsonify({
+        'version': tabla.version,
+        'horarios': [h.to_dict() for h in Horario.query.order_by(Horario.jornada, Horario.tipo).all()]
+    })
+
+
+@asistencia_bp.route('/horarios', methods=['POST'])
+@admin_required
+def guardar_horario():
+    """Crea o actualiza el horario de una jornada (los workers lo recargan solos)"""
+    data = request.get_json() or {}
+    jornada = data.get('jornada')
+    if not jornada:
+        return jsonify({"status": "error", "mensaje": "❌ Falta la jornada"}), 400
+
+    campos = ('entrada_inicio', 'entrada_fin', 'entrada_limite',
+              'salida_inicio', 'salida_fin', 'salida_limite')
+    try:
+        ventanas = {
+            campo: datetime.strptime(data[campo], '%H:%M').time()
+            for campo in campos if data.get(campo)
+        }
+    except ValueError:
+        return jsonify({"status": "error", "mensaje": "❌ Formato de hora inválido (HH:MM)"}), 400
+
+    try:
+        horario = actualizar_horario(jornada, data.get('tipo') or None, **ventanas)
+    except ValueError as error:
+        return jsonify({"status": "error", "mensaje": f"❌ {error}"}), 400
+    log_user_action('horario.actualizar', data, entidad='horario', entidad_id=horario.id)
+    return jsonify({"status": "ok", "horario": horario.to_dict()}), 200
+
+
+@asistencia_bp.route('/feriados', methods=['GET'])
+@admin_required
+def listar_feriados():
+    """Días no laborables registrados"""
+    return jsonify([f.to_dict() for f in Feriado.query.order_by(Feriado.fecha).all()])
+
+
+@asistencia_bp.route('/feriados', methods=['POST'])
+@admin_required
+def guardar_feriado():
+    """Registra un día no laborable (no cuenta para el cálculo de faltas)"""
+    data = request.get_json() or {}
+    try:
+        fecha = datetime.strptime(data.get('fecha', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({"status": "error", "mensaje": "❌ Fecha inválida (YYYY-MM-DD)"}), 400
+
+    feriado = Feriado.query.filter_by(fecha=fecha).first() or Feriado(fecha=fecha)
+    feriado.descripcion = data.get('descripcion')
+    db.session.add(feriado)
+    db.session.commit()
+    log_user_action('feriado.guardar', data, entidad='feriado', entidad_id=feriado.id)
+    return jsonify({"status": "ok", "feriado": feriado.to_dict()}), 200
+
+
+@asistencia_bp.route('/feriados/<int:feriado_id>', methods=['DELETE'])
+@admin_required
+def eliminar_feriado(feriado_id):
+    feriado = Feriado.query.get_or_404(feriado_id)
+    db.session.delete(feriado)
+    db.session.commit()
+    log_user_action('feriado.eliminar', {'fecha': feriado.fecha}, entidad='feriado', entidad_id=feriado_id)
+    return jsonify({"status": "ok"}), 200
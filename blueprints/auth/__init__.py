@@ -1,9 +1,10 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
-from datetime import datetime
-from app import db
+from datetime import datetime, timedelta
+from app_simple import db
 from models.usuario import Usuario
 from validators import UsuarioSchema
+from error_handlers import log_user_action
 
 auth_bp = Blueprint('auth', __name__, template_folder='templates/auth')
 
@@ -28,6 +29,7 @@ def login():
             login_user(usuario, remember=True)
             usuario.ultimo_acceso = datetime.utcnow()
             db.session.commit()
+            log_user_action('auth.login', entidad='usuario', entidad_id=usuario.id)
             
             flash(f'¡Bienvenido, {usuario.username}!', 'success')
             
@@ -45,6 +47,7 @@ def login():
 @login_required
 def logout():
     """Cerrar sesión"""
+    log_user_action('auth.logout', entidad='usuario', entidad_id=current_user.id)
     logout_user()
     flash('Sesión cerrada correctamente', 'info')
     return redirect(url_for('auth.login'))
@@ -63,7 +66,7 @@ def register():
             data = schema.load(request.form)
             
             # Verificar si el usuario ya existe
-            if Usuario.query.filter_by(username=data['username']).first():
+            if Usuario.query.filter_by(username=data['username']).execution_options(todas_las_escuelas=True).first():
                 flash('El nombre de usuario ya existe', 'danger')
                 return render_template('auth/register.html')
             
@@ -76,6 +79,8 @@ def register():
             
             db.session.add(nuevo_usuario)
             db.session.commit()
+            log_user_action('usuario.crear', {'rol': nuevo_usuario.rol},
+                            entidad='usuario', entidad_id=nuevo_usuario.id)
             
             flash(f'Usuario {nuevo_usuario.username} creado exitosamente', 'success')
             return redirect(url_for('auth.users'))
@@ -96,6 +101,36 @@ def users():
     usuarios = Usuario.query.order_by(Usuario.username).all()
     return render_template('auth/users.html', usuarios=usuarios)
 
+@auth_bp.route('/auditoria')
+@login_required
+def auditoria():
+    """Consulta de auditoría por usuario, entidad y rango de fechas (solo admin)"""
+    if not current_user.is_admin():
+        return jsonify({'error': True, 'message': 'No autorizado', 'code': 403}), 403
+
+    from auditoria import consultar
+
+    try:
+        desde = request.args.get('desde')
+        hasta = request.args.get('hasta')
+        desde = datetime.strptime(desde, '%Y-%m-%d') if desde else None
+        # 'hasta' es inclusivo para el usuario: se consulta hasta el día siguiente
+        hasta = datetime.strptime(hasta, '%Y-%m-%d') + timedelta(days=1) if hasta else None
+        entidad_id = request.args.get('entidad_id', type=int)
+        limite = min(request.args.get('limite', 100, type=int), 1000)
+    except ValueError:
+        return jsonify({'error': True, 'message': 'Formato de fecha inválido (YYYY-MM-DD)', 'code': 400}), 400
+
+    registros = consultar(
+        usuario=request.args.get('usuario'),
+        entidad=request.args.get('entidad'),
+        entidad_id=entidad_id,
+        desde=desde,
+        hasta=hasta,
+        limite=limite
+    )
+    return jsonify([r.to_dict() for r in registros])
+
 @auth_bp.route('/profile')
 @login_required
 def profile():
@@ -111,7 +146,10 @@ def change_password():
         new_password = request.form.get('new_password')
         confirm_password = request.form.get('confirm_password')
         
-        if not current_user.check_password(current_password):
+        # current_user es una copia en caché (UsuarioSesion): se modifica la entidad real
+        usuario = db.session.get(Usuario, current_user.id)
+
+        if not usuario.check_password(current_password):
             flash('Contraseña actual incorrecta', 'danger')
             return render_template('auth/change_password.html')
         
@@ -123,8 +161,9 @@ def change_password():
             flash('La nueva contraseña debe tener al menos 6 caracteres', 'danger')
             return render_template('auth/change_password.html')
         
-        current_user.set_password(new_password)
+        usuario.set_password(new_password)
         db.session.commit()
+        log_user_action('usuario.cambiar_password', entidad='usuario', entidad_id=usuario.id)
         
         flash('Contraseña cambiada exitosamente', 'success')
         return redirect(url_for('auth.profile'))
@@ -4,16 +4,20 @@ from datetime import date, timedelta
 from sqlalchemy import func
 from app_simple import db
 from models import Docente, Licencia, Asistencia
+from escuelas import requiere_escuela
 
 
 dashboard_bp = Blueprint('dashboard', __name__, template_folder='templates/dashboard')
+requiere_escuela(dashboard_bp)
 
 
-from flask import Blueprint, render_template
-from datetime import date, time, timedelta
+from flask import Blueprint, render_template, current_app, request
+from datetime import date, timedelta
 from sqlalchemy import func
 from app_simple import db
 from models import Docente, Licencia, Asistencia
+from faltas import ranking_recientes
+from tardanzas import ranking as ranking_tardanzas_por, VENTANAS
 
 
 
@@ -55,48 +59,45 @@ def dashboard_home():
         'values': [cantidad for _, cantidad in estado_raw] if estado_raw else []
     }
 
-    # Ranking de docentes con más licencias
-    ranking = db.session.query(
-        Docente.nombre,
-        func.count(Licencia.id)
-    ).join(Licencia).group_by(Docente.id).order_by(func.count(Licencia.id).desc()).limit(5).all()
-
-    # Ranking de docentes con más tardanzas (hora entrada > 07:30)
-    ranking_tardanzas = db.session.query(
-        Docente.nombre,
-        func.count(Asistencia.id)
-    ).join(Asistencia).filter(Asistencia.hora_entrada > time(7, 30))\
-    .group_by(Docente.id).order_by(func.count(Asistencia.id).desc()).limit(5).all()
-
-    # Ranking de docentes con más faltas (sin asistencia en los últimos 5 días)
-    dias_recientes = [hoy - timedelta(days=i) for i in range(5)]
-    ranking_faltas = db.session.query(
-        Docente.nombre,
-        func.count().label('faltas')
-    ).outerjoin(Asistencia, (Asistencia.docente_id == Docente.id) & (Asistencia.fecha.in_(dias_recientes)))\
-    .filter(Asistencia.id == None)\
-    .group_by(Docente.id).order_by(func.count().desc()).limit(5).all()
-
-    # Docentes por jornada
-    jornadas_raw = db.session.query(
-        Docente.jornada,
-        func.count(Docente.id)
-    ).group_by(Docente.jornada).all()
-
-    # Total global
-    total_docentes = sum(cantidad for _, cantidad in jornadas_raw)
-
-    # Formato para el template
-    docentes_por_jornada = [
-        (jornada.capitalize(), cantidad) for jornada, cantidad in jornadas_raw
-    ]
+    # Rankings y conteos por jornada: se pasan como funciones y la plantilla
+    # los llama dentro de fragmentos en caché (sin consultas en un acierto)
+    def ranking():
+        return db.session.query(
+            Docente.nombre,
+            func.count(Licencia.id)
+        ).join(Licencia).group_by(Docente.id).order_by(func.count(Licencia.id).desc()).limit(5).all()
+
+    # Ranking de docentes con más tardanzas (contadores mensuales precalculados)
+    ventana_tardanzas = request.args.get('ventana') or current_app.config.get('DASHBOARD_VENTANA_TARDANZAS', 'mes')
+    if ventana_tardanzas not in VENTANAS:
+        ventana_tardanzas = 'mes'
+
+    def ranking_tardanzas():
+        return ranking_tardanzas_por(ventana_tardanzas, 5, hoy)
+
+    # Ranking de docentes con más faltas (turnos sin asistencia ni licencia
+    # en los últimos días hábiles)
+    dias_faltas = current_app.config.get('DASHBOARD_DIAS_FALTAS', 5)
+
+    def ranking_faltas():
+        return ranking_recientes(hoy, dias_faltas)
+
+    # Docentes por jornada, con el total global
+    def docentes_por_jornada():
+        jornadas_raw = db.session.query(
+            Docente.jornada,
+            func.count(Docente.id)
+        ).group_by(Docente.jornada).all()
+        return [(jornada.capitalize(), cantidad) for jornada, cantidad in jornadas_raw]
 
     return render_template('dashboard/dashboard.html',
         metric_cards=metric_cards,
         estado_chart=estado_chart,
         ranking=ranking,
         ranking_tardanzas=ranking_tardanzas,
+        ventana_tardanzas=ventana_tardanzas,
         ranking_faltas=ranking_faltas,
+        dias_faltas=dias_faltas,
         docentes_por_jornada=docentes_por_jornada,
         total_docentes=total_docentes,
         hoy=hoy
@@ -1,14 +1,23 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required
+from sqlalchemy import or_
 from app_simple import db
 from models.docente import Docente
 from models.asistencia import Asistencia
+from error_handlers import log_user_action
+from condicional import condicional
+from escuelas import ESCUELA_POR_DEFECTO, escuela_actual_id, requiere_escuela
+from sql_portable import insertar_lote
+from versiones import incrementar_en_sesion
 
 docentes_bp = Blueprint('docentes', __name__, template_folder='templates/docentes')
+# Los lectores descargan la lista sin sesión, indicando su escuela
+requiere_escuela(docentes_bp, de_lectores=('api_lista_docentes',))
 
 # Vista principal con filtros
 @docentes_bp.route('/')
 @login_required
+@condicional('docentes')
 def index():
     jornada = request.args.get('jornada')
     estado = request.args.get('estado')
@@ -33,6 +42,7 @@ def index():
 
 # Búsqueda AJAX para Select2
 @docentes_bp.route('/buscar', endpoint='buscar')
+@condicional('docentes')
 def buscar_docentes():
     q = request.args.get('q', '')
     resultados = Docente.query.filter(Docente.nombre.ilike(f'%{q}%')).limit(20).all()
@@ -61,7 +71,7 @@ def nuevo_docente():
         # Verificar si ya existe un docente con la misma cédula o correo
         docente_existente = Docente.query.filter(
             (Docente.cedula == cedula) | (Docente.correo == correo)
-        ).first()
+        ).execution_options(todas_las_escuelas=True).first()
 
         if docente_existente:
             if docente_existente.cedula == cedula:
@@ -85,6 +95,7 @@ def nuevo_docente():
 
             db.session.add(nuevo)
             db.session.commit()
+            log_user_action('docente.crear', {'cedula': cedula}, entidad='docente', entidad_id=nuevo.id)
             flash('Docente registrado correctamente.', 'success')
             return redirect(url_for('docentes.index'))
             
@@ -122,7 +133,7 @@ def editar_docente(id):
         # Verificar si ya existe otro docente con la misma cédula o correo
         docente_existente = Docente.query.filter(
             (Docente.cedula == cedula) | (Docente.correo == correo)
-        ).filter(Docente.id != id).first()
+        ).filter(Docente.id != id).execution_options(todas_las_escuelas=True).first()
 
         if docente_existente:
             if docente_existente.cedula == cedula:
@@ -141,6 +152,7 @@ def editar_docente(id):
             docente.tipo = tipo
 
             db.session.commit()
+            log_user_action('docente.editar', entidad='docente', entidad_id=id)
             flash('Docente actualizado correctamente.', 'success')
             return redirect(url_for('docentes.index'))
             
@@ -157,6 +169,7 @@ def eliminar_docente(id):
     docente = Docente.query.get_or_404(id)
     db.session.delete(docente)
     db.session.commit()
+    log_user_action('docente.eliminar', {'cedula': docente.cedula}, entidad='docente', entidad_id=id)
     flash('Docente eliminado correctamente.', 'success')
     return redirect(url_for('docentes.index'))
 
@@ -166,6 +179,7 @@ def desactivar_docente(id):
     docente = Docente.query.get_or_404(id)
     docente.activo = False
     db.session.commit()
+    log_user_action('docente.desactivar', entidad='docente', entidad_id=id)
     flash('Docente desactivado correctamente.', 'info')
     return redirect(url_for('docentes.index'))
 
@@ -175,6 +189,7 @@ def reactivar_docente(id):
     docente = Docente.query.get_or_404(id)
     docente.activo = True
     db.session.commit()
+    log_user_action('docente.reactivar', entidad='docente', entidad_id=id)
     flash('Docente reactivado correctamente.', 'info')
     return redirect(url_for('docentes.index'))
 
@@ -191,7 +206,8 @@ def carga_masiva():
         # Forzar lectura de columnas como texto
         df = pd.read_excel(file, dtype={"cedula": str, "telefono": str, "correo": str})
 
-        cargados, errores = 0, []
+        candidatos, errores = [], []
+        escuela = escuela_actual_id() or ESCUELA_POR_DEFECTO
         for i, row in df.iterrows():
             fila = i + 2  # +2 porque pandas empieza en 0 y fila 1 son encabezados
 
@@ -205,10 +221,6 @@ def carga_masiva():
                 errores.append(f"Fila {fila}: cédula inválida ({row.get('cedula')})")
                 continue
 
-            if Docente.query.filter_by(cedula=cedula).first():
-                errores.append(f"Fila {fila}: cédula duplicada ({cedula})")
-                continue
-
             # --- Normalizar teléfono ---
             telefono = str(row.get("telefono", "")).strip()
             if "." in telefono:
@@ -235,20 +247,47 @@ def carga_masiva():
                 errores.append(f"Fila {fila}: tipo inválido ({tipo})")
                 continue
 
-            # --- Crear docente ---
-            docente = Docente(
-                nombre=row.get("nombre", "").strip(),
-                cedula=cedula,
-                telefono=telefono,
-                correo=correo,
-                jornada=jornada,
-                tipo=tipo,
-                activo=True
-            )
-            db.session.add(docente)
-            cargados += 1
+            candidatos.append((fila, {
+                "escuela_id": escuela,
+                "nombre": row.get("nombre", "").strip(),
+                "cedula": cedula,
+                "telefono": telefono,
+                "correo": correo,
+                "jornada": jornada,
+                "tipo": tipo,
+                "activo": True,
+            }))
+
+        # --- Duplicados: contra la base (una consulta) y dentro del archivo ---
+        cedulas = {d["cedula"] for _, d in candidatos}
+        correos = {d["correo"] for _, d in candidatos}
+        usadas, usados = set(), set()
+        if candidatos:
+            for cedula, correo in db.session.query(Docente.cedula, Docente.correo).filter(
+                or_(Docente.cedula.in_(cedulas), Docente.correo.in_(correos))
+            ).execution_options(todas_las_escuelas=True):
+                usadas.add(cedula)
+                usados.add(correo)
+
+        filas = []
+        for fila, docente in candidatos:
+            if docente["cedula"] in usadas:
+                errores.append(f"Fila {fila}: cédula duplicada ({docente['cedula']})")
+                continue
+            if docente["correo"] in usados:
+                errores.append(f"Fila {fila}: correo duplicado ({docente['correo']})")
+                continue
+            usadas.add(docente["cedula"])
+            usados.add(docente["correo"])
+            filas.append(docente)
+
+        # --- Crear docentes en un solo lote (COPY en PostgreSQL) ---
+        cargados = insertar_lote(db.session.connection(), Docente.__table__, filas)
+        if cargados:
+            incrementar_en_sesion(db.session, Docente.__tablename__)
 
         db.session.commit()
+        log_user_action('docente.carga_masiva', {'cargados': cargados, 'errores': len(errores)}, entidad='docente')
         flash(f"✅ {cargados} docentes cargados correctamente", "success")
         if errores:
             flash("⚠️ Errores encontrados:\n" + "\n".join(errores), "warning")
@@ -258,6 +297,7 @@ def carga_masiva():
     return render_template("docentes/carga_masiva.html")
 
 @docentes_bp.route('/api/lista', methods=['GET'])
+@condicional('docentes', 'asistencias')
 def api_lista_docentes():
     from datetime import date
 
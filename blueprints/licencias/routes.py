@@ -2,8 +2,12 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash
 from datetime import datetime, timedelta, date
 from models import Docente, Licencia
 from app_simple import db
+from error_handlers import log_user_action
+from condicional import condicional
+from escuelas import requiere_escuela
 
 licencias_bp = Blueprint('licencias', __name__, template_folder='templates/licencias')
+requiere_escuela(licencias_bp)
 
 # 🔧 Utilidades
 def filtrar_licencias(query, docente_id=None, desde=None, hasta=None):
@@ -27,6 +31,7 @@ def licencia_solapada(docente_id, fecha_inicio, fecha_fin, licencia_id=None):
 
 # 🟦 Vista principal
 @licencias_bp.route('/', methods=['GET', 'POST'])
+@condicional('licencias', 'docentes')
 def index():
     hoy = date.today()
     vencimiento_limite = hoy + timedelta(days=2)
@@ -65,6 +70,7 @@ def index():
 
 # 🟨 Licencias pendientes
 @licencias_bp.route('/pendientes', methods=['GET', 'POST'])
+@condicional('licencias', 'docentes')
 def licencias_pendientes():
     docentes = Docente.query.order_by(Docente.nombre).all()
     docente_id = request.form.get('docente_id')
@@ -81,7 +87,8 @@ def licencias_pendientes():
 # 🟩 Registro de nueva licencia
 @licencias_bp.route('/nueva', methods=['GET', 'POST'])
 def nueva_licencia():
-    docentes = Docente.query.order_by(Docente.nombre).all()  # ✅ definido al inicio
+    # Sin ejecutar: la plantilla la llama solo si el <select> no está en caché
+    docentes = Docente.query.order_by(Docente.nombre).all
 
     if request.method == 'POST':
         try:
@@ -111,6 +118,8 @@ def nueva_licencia():
             )
             db.session.add(nueva)
             db.session.commit()
+            log_user_action('licencia.crear', {'docente_id': docente_id, 'estado': estado},
+                            entidad='licencia', entidad_id=nueva.id)
             flash("Licencia registrada correctamente.", "success")
             return redirect(url_for('licencias.index'))
 
@@ -122,6 +131,7 @@ def nueva_licencia():
 
 # 🟦 Licencias activas (filtro alternativo)
 @licencias_bp.route('/activas', methods=['GET', 'POST'])
+@condicional('licencias', 'docentes')
 def licencias_activas():
     docente_id = request.form.get('docente_id')
     desde = request.form.get('desde')
@@ -168,6 +178,7 @@ def editar_licencia(id):
             flash(f"Conflicto con licencia del {conflicto.fecha_inicio.strftime('%d/%m/%Y')} al {conflicto.fecha_fin.strftime('%d/%m/%Y')}", "danger")
             return redirect(url_for('licencias.editar_licencia', id=id))
 
+        estado_anterior = licencia.estado
         licencia.docente_id = docente_id
         licencia.fecha_inicio = fecha_inicio
         licencia.fecha_fin = fecha_fin
@@ -176,6 +187,9 @@ def editar_licencia(id):
         licencia.aprobado_por = aprobado_por
 
         db.session.commit()
+        accion = 'licencia.aprobar' if estado == 'aprobada' and estado_anterior != 'aprobada' else 'licencia.editar'
+        log_user_action(accion, {'estado_anterior': estado_anterior, 'estado': estado},
+                        entidad='licencia', entidad_id=id)
         flash("Licencia actualizada correctamente.", "success")
         return redirect(url_for('licencias.index'))
 
@@ -187,5 +201,7 @@ def eliminar_licencia(id):
     licencia = Licencia.query.get_or_404(id)
     db.session.delete(licencia)
     db.session.commit()
+    log_user_action('licencia.eliminar', {'docente_id': licencia.docente_id},
+                    entidad='licencia', entidad_id=id)
     flash('Licencia eliminada', 'warning')
     return redirect(url_for('licencias.licencias_activas'))
\ No newline at end of file
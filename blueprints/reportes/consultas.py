@@ -0,0 +1,268 @@
+"""
+Consultas de los reportes.
+
+Las funciones de este módulo devuelven filas livianas (tuplas con nombre u
+objetos con ``__slots__``) en lugar de entidades ORM, de modo que la memoria
+y el tiempo de cada reporte dependan del número de docentes y no del número
+de registros de asistencia.
+"""
+
+from collections import namedtuple
+from datetime import date, time, timedelta
+
+import numpy as np
+
+from flask import current_app
+from sqlalchemy import func, case, and_
+
+from app_simple import db
+from archivo_historico import anios_archivados, asistencias_historico
+from cubo_asistencia import seleccionar
+from faltas import calcular_faltas, nombre_jornada
+from incidencias import calcular_lote, codigo_jornada, minutos_esperados, formato_horas
+from models.asistencia import Asistencia
+from models.docente import Docente
+from models.licencia import Licencia
+from texto import slugify
+from utils import anio_lectivo_de
+
+# Hora a partir de la cual una entrada cuenta como atraso en el resumen mensual
+HORA_REFERENCIA_ATRASO = time(8, 0)
+
+# Filas leídas por lote al exportar reportes
+LOTE_EXPORTACION = 1000
+
+ResumenMensual = namedtuple(
+    'ResumenMensual',
+    'docente_id nombre asistencias ausentes pendientes atrasos'
+)
+
+
+def fuente_asistencias(inicio):
+    """Tabla de asistencias a consultar para un rango que empieza en ``inicio``.
+
+    Si el año lectivo ya fue archivado se usa la vista histórica.
+    """
+    app = current_app
+    if app.config.get('ARCHIVO_HISTORICO_ACTIVO'):
+        anio = anio_lectivo_de(inicio, app.config['ANIO_LECTIVO_MES_INICIO'])
+        if anio in anios_archivados(app):
+            return asistencias_historico
+    return Asistencia.__table__
+
+
+def _consulta_resumen_mensual(inicio, fin, docente_filtro=None):
+    a = fuente_asistencias(inicio)
+    presente = a.c.estado == 'presente'
+
+    query = db.session.query(
+        Docente.id,
+        Docente.nombre,
+        func.sum(case((presente, 1), else_=0)).label('asistencias'),
+        func.sum(case((a.c.estado == 'ausente', 1), else_=0)).label('ausentes'),
+        func.sum(case((a.c.estado == 'pendiente', 1), else_=0)).label('pendientes'),
+        func.sum(case(
+            (and_(presente, a.c.hora_entrada > HORA_REFERENCIA_ATRASO), 1),
+            else_=0
+        )).label('atrasos'),
+    ).join(a, a.c.docente_id == Docente.id).filter(
+        a.c.fecha >= inicio,
+        a.c.fecha < fin
+    )
+
+    if docente_filtro:
+        query = query.filter(Docente.nombre.ilike(f'%{docente_filtro}%'))
+
+    query = query.group_by(Docente.id, Docente.nombre).order_by(Docente.nombre)
+    return query
+
+
+def resumen_mensual(inicio, fin, docente_filtro=None):
+    """Totales por docente en el rango [inicio, fin) con un solo GROUP BY."""
+    return [ResumenMensual._make(fila) for fila in _consulta_resumen_mensual(inicio, fin, docente_filtro)]
+
+
+def iter_resumen_mensual(inicio, fin, docente_filtro=None):
+    """Igual que ``resumen_mensual`` pero leyendo por lotes (exportación)."""
+    for fila in _consulta_resumen_mensual(inicio, fin, docente_filtro).yield_per(LOTE_EXPORTACION):
+        yield ResumenMensual._make(fila)
+
+
+class FilaAsistenciaDiaria:
+    """Fila del reporte de asistencia diaria (solo las columnas mostradas)."""
+
+    __slots__ = ('docente_id', 'nombre', 'jornada_docente', 'fecha',
+                 'hora_entrada', 'hora_salida', 'fila_id')
+
+    def __init__(self, docente_id, nombre, jornada_docente, fecha, hora_entrada, hora_salida, fila_id):
+        self.docente_id = docente_id
+        self.nombre = nombre
+        self.jornada_docente = jornada_docente
+        self.fecha = fecha
+        self.hora_entrada = hora_entrada
+        self.hora_salida = hora_salida
+        self.fila_id = fila_id
+
+
+def iter_asistencia_diaria(fecha, docente_filtro=None):
+    """Registros de un día con los datos del docente en una sola consulta.
+
+    Las filas se leen por lotes, de modo que la exportación no las carga
+    todas en memoria.
+    """
+    a = fuente_asistencias(fecha)
+    query = db.session.query(
+        a.c.docente_id,
+        Docente.nombre,
+        Docente.jornada,
+        a.c.fecha,
+        a.c.hora_entrada,
+        a.c.hora_salida,
+    ).select_from(a).join(Docente, a.c.docente_id == Docente.id).filter(a.c.fecha == fecha)
+
+    if docente_filtro:
+        query = query.filter(Docente.nombre.ilike(f'%{docente_filtro}%'))
+
+    fecha_iso = fecha.strftime('%Y-%m-%d')
+    slugs = {}  # un slug por docente aunque tenga varias jornadas ese día
+    for docente_id, nombre, jornada, fecha_reg, entrada, salida in query.yield_per(LOTE_EXPORTACION):
+        slug = slugs.get(docente_id)
+        if slug is None:
+            slug = slugs[docente_id] = slugify(nombre)
+        yield FilaAsistenciaDiaria(
+            docente_id, nombre, jornada, fecha_reg, entrada, salida, f"{slug}-{fecha_iso}"
+        )
+
+
+def asistencia_diaria(fecha, docente_filtro=None):
+    """Lista de ``FilaAsistenciaDiaria`` del día (para la vista HTML)."""
+    return list(iter_asistencia_diaria(fecha, docente_filtro))
+
+
+def _jornadas_de(docentes, ids_registro):
+    """Código de jornada del docente de cada registro (búsqueda vectorizada)."""
+    ids = np.fromiter(docentes.keys(), dtype=np.int64)
+    orden = np.argsort(ids)
+    codigos = np.fromiter((codigo_jornada(d.jornada) for d in docentes.values()), dtype=np.int64)
+    return codigos[orden][np.searchsorted(ids[orden], ids_registro)]
+
+
+def resumen_incumplimientos(desde, hasta, jornada=None, docentes_ids=None):
+    """Entradas tarde, salidas temprano y tiempo trabajado por docente.
+
+    Los registros del rango [desde, hasta] se leen del cubo columnar y las
+    incidencias se calculan en un lote (ver incidencias.py).
+    """
+    query = db.session.query(Docente.id, Docente.nombre, Docente.jornada)
+    if jornada:
+        query = query.filter(Docente.jornada == jornada)
+    if docentes_ids:
+        query = query.filter(Docente.id.in_(docentes_ids))
+    docentes = {d.id: d for d in query}
+    if not docentes:
+        return []
+
+    registros = seleccionar(desde, hasta + timedelta(days=1), docentes=docentes.keys())
+    if not len(registros):
+        return []
+    registros = registros[np.lexsort((registros['entrada'], registros['fecha']))]
+
+    inc = calcular_lote(_jornadas_de(docentes, registros['docente']), registros['entrada'], registros['salida'])
+    marcado = inc.entrada_tarde | inc.salida_temprano
+    if not marcado.any():
+        return []
+
+    # Grupos en el orden del primer incumplimiento de cada docente
+    unicos, primero, grupo = np.unique(registros['docente'][marcado], return_index=True, return_inverse=True)
+    n = len(unicos)
+    tarde = np.bincount(grupo, weights=inc.entrada_tarde[marcado], minlength=n)
+    temprano = np.bincount(grupo, weights=inc.salida_temprano[marcado], minlength=n)
+    total = np.bincount(grupo, minlength=n)
+    minutos = np.bincount(grupo, weights=inc.trabajados[marcado], minlength=n)
+
+    resumen = []
+    for g in np.argsort(primero):
+        d = docentes[int(unicos[g])]
+        resumen.append({
+            'nombre': d.nombre,
+            'jornada': d.jornada,
+            'entrada_tarde': int(tarde[g]),
+            'salida_temprano': int(temprano[g]),
+            'incumplimientos': int(total[g]),
+            'tiempo_total': formato_horas(minutos[g]),
+        })
+    return resumen
+
+
+FilaFalta = namedtuple('FilaFalta', 'docente_id nombre cedula fecha jornada')
+
+
+def _docentes_de(ids):
+    ids = np.unique(ids).tolist()
+    if not ids:
+        return {}
+    query = db.session.query(Docente.id, Docente.nombre, Docente.cedula, Docente.jornada)
+    return {d.id: d for d in query.filter(Docente.id.in_(ids))}
+
+
+def detalle_faltas(faltas):
+    """Filas de cada falta ordenadas por fecha y docente."""
+    docentes = _docentes_de(faltas.docente)
+    filas = [
+        FilaFalta(int(d), docentes[d].nombre, docentes[d].cedula, date.fromordinal(int(f)), nombre_jornada(j))
+        for d, f, j in zip(faltas.docente.tolist(), faltas.fecha, faltas.jornada)
+    ]
+    filas.sort(key=lambda fila: (fila.fecha, fila.nombre, fila.jornada))
+    return filas
+
+
+def faltas_por_docente(faltas):
+    """(nombre, jornada, faltas) por docente, de más a menos faltas."""
+    docentes = _docentes_de(list(faltas.por_docente))
+    resumen = [
+        (docentes[d].nombre, docentes[d].jornada, n) for d, n in faltas.por_docente.items()
+    ]
+    resumen.sort(key=lambda fila: (-fila[2], fila[0]))
+    return resumen
+
+
+def iter_consolidado(desde, hasta):
+    """Faltas, licencias y horas incumplidas por docente en [desde, hasta]."""
+    docentes = Docente.query.order_by(Docente.nombre).all()
+    fin = hasta + timedelta(days=1)
+
+    # Asistencias del rango desde el cubo columnar, agrupadas por docente
+    registros = seleccionar(desde, fin)
+    registros = registros[np.argsort(registros['docente'], kind='stable')]
+
+    # Faltas (turnos esperados en días hábiles sin asistencia ni licencia)
+    faltas = calcular_faltas(desde, fin).por_docente
+
+    # Licencias aprobadas que se solapan con el rango, por docente
+    licencias = dict(db.session.query(Licencia.docente_id, func.count(Licencia.id)).filter(
+        Licencia.estado == 'aprobada',
+        Licencia.fecha_inicio <= hasta,
+        Licencia.fecha_fin >= desde
+    ).group_by(Licencia.docente_id).all())
+
+    for d in docentes:
+        # Asistencias en el rango
+        i, j = np.searchsorted(registros['docente'], [d.id, d.id + 1])
+        asistencias = registros[i:j]
+
+        # Calcular horas incumplidas (minutos faltantes de los registros con incidencias)
+        horas_incumplidas = 0
+        if len(asistencias):
+            codigo = codigo_jornada(d.jornada)
+            inc = calcular_lote(np.full(len(asistencias), codigo), asistencias['entrada'], asistencias['salida'])
+            marcado = inc.entrada_tarde | inc.salida_temprano
+            faltante = np.maximum(minutos_esperados(codigo) - inc.trabajados, 0)
+            horas_incumplidas = int(faltante[marcado].sum())
+
+        yield {
+            "docente": d.nombre,
+            "jornada": d.jornada,
+            "faltas": faltas.get(d.id, 0),
+            "licencias": licencias.get(d.id, 0),
+            "horas_incumplidas": formato_horas(horas_incumplidas)
+        }
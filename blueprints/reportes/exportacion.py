@@ -0,0 +1,92 @@
+"""
+Exportación de reportes a CSV y XLSX.
+
+Las funciones reciben un iterable de filas (normalmente un generador sobre
+una consulta con ``yield_per``) y nunca arman el reporte completo en
+memoria: el CSV se envía línea por línea y el XLSX se escribe con el modo
+``write_only`` de openpyxl en un archivo temporal, que se borra al terminar
+la respuesta (un XLSX es un ZIP y necesita estar completo para enviarse).
+"""
+
+import csv
+import os
+import tempfile
+
+from datetime import date, time
+
+from flask import Response, send_file, stream_with_context
+
+FORMATOS = ('csv', 'xlsx')
+
+MIMETYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class _Eco:
+    """Destino de ``csv.writer`` que devuelve la línea en lugar de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def _valor(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, time):
+        return valor.strftime('%H:%M')
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
+
+
+def _valor_xlsx(valor):
+    # openpyxl escribe fechas de forma nativa; las horas se muestran HH:MM
+    if isinstance(valor, time):
+        return valor.strftime('%H:%M')
+    return valor
+
+
+def _lineas_csv(encabezados, filas):
+    escritor = csv.writer(_Eco())
+    # BOM para que Excel reconozca UTF-8 (tildes y ñ)
+    yield '\ufeff' + escritor.writerow(encabezados)
+    for fila in filas:
+        yield escritor.writerow([_valor(v) for v in fila])
+
+
+def respuesta_csv(nombre, encabezados, filas):
+    """Respuesta CSV generada mientras se envía."""
+    return Response(
+        stream_with_context(_lineas_csv(encabezados, filas)),
+        mimetype='text/csv; charset=utf-8',
+        headers={'Content-Disposition': f'attachment; filename="{nombre}.csv"'}
+    )
+
+
+def respuesta_xlsx(nombre, encabezados, filas):
+    """Respuesta XLSX escrita fila por fila (modo write_only)."""
+    from openpyxl import Workbook  # se importa solo al exportar XLSX
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(title=nombre[:31])
+    hoja.append(encabezados)
+    for fila in filas:
+        hoja.append([_valor_xlsx(v) for v in fila])
+
+    descriptor, ruta = tempfile.mkstemp(suffix='.xlsx')
+    os.close(descriptor)
+    try:
+        libro.save(ruta)
+    except Exception:
+        os.remove(ruta)
+        raise
+
+    respuesta = send_file(ruta, as_attachment=True, download_name=f'{nombre}.xlsx', mimetype=MIMETYPE_XLSX)
+    respuesta.call_on_close(lambda: os.remove(ruta))
+    return respuesta
+
+
+def exportar(formato, nombre, encabezados, filas):
+    """Exporta las filas de un reporte en ``formato`` ('csv' o 'xlsx')."""
+    if formato == 'xlsx':
+        return respuesta_xlsx(nombre, encabezados, filas)
+    return respuesta_csv(nombre, encabezados, filas)
@@ -1,19 +1,26 @@
 from flask import Blueprint, render_template, request, send_file, flash, redirect, url_for
-from models.asistencia import Asistencia
 from models.docente import Docente
-from utils import evaluar_asistencia, calcular_tiempo_acumulado, slugify
+from utils import rango_mes
 from datetime import datetime, timedelta, date
-from app_simple import db
-from models.licencia import Licencia
-from sqlalchemy import extract
-from collections import defaultdict
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
+from .consultas import (
+    resumen_mensual, iter_resumen_mensual, asistencia_diaria, iter_asistencia_diaria,
+    resumen_incumplimientos, detalle_faltas, faltas_por_docente, iter_consolidado
+)
+from .exportacion import exportar, FORMATOS
+from faltas import calcular_faltas
 from io import BytesIO
+import os
+import shutil
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape
+from error_handlers import talento_humano_required, log_user_action
+from condicional import condicional
+from escuelas import nombre_escuela, requiere_escuela
+from exportacion_historial import exportar_historial, FORMATOS as FORMATOS_HISTORIAL
 
 reportes_bp = Blueprint('reportes', __name__, template_folder='templates/reportes')
+requiere_escuela(reportes_bp)
 
 @reportes_bp.route('/')
 def index():
@@ -22,6 +29,7 @@ def index():
 
 
 @reportes_bp.route('/incumplimientos')
+@condicional('docentes', 'asistencias', 'horarios')
 def reporte_incumplimientos():
     jornada = request.args.get('jornada')
     desde_str = request.args.get('desde')
@@ -35,38 +43,10 @@ def reporte_incumplimientos():
     except ValueError:
         return "Formato de fecha inválido", 400
 
-    query = Asistencia.query.join(Docente).filter(Asistencia.fecha.between(desde, hasta))
-    if jornada:
-        query = query.filter(Docente.jornada == jornada)
-    if docentes_ids:
-        query = query.filter(Docente.id.in_(docentes_ids))
-
-    registros = query.order_by(Asistencia.fecha, Asistencia.hora_entrada).all()
-
-    resumen_docentes = defaultdict(lambda: {
-        'nombre': '',
-        'jornada': '',
-        'entrada_tarde': 0,
-        'salida_temprano': 0,
-        'incumplimientos': 0,
-        'tiempo_total': timedelta()
-    })
-
-    for a in registros:
-        entrada_tarde, salida_temprano = evaluar_asistencia(a.docente, a.hora_entrada, a.hora_salida)
-        tiempo_acumulado = calcular_tiempo_acumulado(a.hora_entrada, a.hora_salida)
-
-        if entrada_tarde or salida_temprano:
-            d = resumen_docentes[a.docente.id]
-            d['nombre'] = a.docente.nombre
-            d['jornada'] = a.docente.jornada
-            d['entrada_tarde'] += int(entrada_tarde)
-            d['salida_temprano'] += int(salida_temprano)
-            d['incumplimientos'] += 1
-            d['tiempo_total'] += tiempo_acumulado or timedelta()
-
-    resumen_lista = list(resumen_docentes.values())
-    todos_los_docentes = Docente.query.order_by(Docente.nombre).all()
+    # Incidencias calculadas en lote por docente
+    resumen_lista = resumen_incumplimientos(desde, hasta, jornada, docentes_ids)
+    # Sin ejecutar: la plantilla la llama solo si el <select> no está en caché
+    todos_los_docentes = Docente.query.order_by(Docente.nombre).all
 
     return render_template(
                 'reportes/reporte_incumplimientos.html',
@@ -77,12 +57,11 @@ def reporte_incumplimientos():
 
 # 🟦 2. Asistencia diaria
 @reportes_bp.route('/asistencia-diaria')
+@condicional('docentes', 'asistencias')
 def reporte_asistencia_diaria():
     fecha = request.args.get('fecha', '').strip()
     docente = request.args.get('docente', '').strip()
 
-    query = Asistencia.query.join(Docente)
-
     if fecha:
         try:
             fecha_obj = datetime.strptime(fecha, '%Y-%m-%d').date()
@@ -93,20 +72,15 @@ def reporte_asistencia_diaria():
         fecha_obj = date.today()
         fecha = fecha_obj.strftime('%Y-%m-%d')
 
-    query = query.filter(Asistencia.fecha == fecha_obj)
-
-    if docente:
-        query = query.filter(Docente.nombre.ilike(f'%{docente}%'))
-
-    resultados = query.all()
+    formato = request.args.get('formato')
+    if formato in FORMATOS:
+        return exportar(formato, f"asistencia_{fecha}",
+            ["Docente", "Fecha", "Entrada", "Salida", "Jornada"],
+            ((r.nombre, r.fecha, r.hora_entrada, r.hora_salida, r.jornada_docente)
+             for r in iter_asistencia_diaria(fecha_obj, docente)))
 
-    # Procesar los resultados y formatear fechas
-    for r in resultados:
-        try:
-            fecha_iso = r.fecha.strftime('%Y-%m-%d') if hasattr(r, 'fecha') and r.fecha else ''
-        except Exception:
-            fecha_iso = ''
-        r.fila_id = f"{slugify(r.docente.nombre)}-{fecha_iso}"
+    # Consulta proyectada: una sola SELECT con las columnas del docente
+    resultados = asistencia_diaria(fecha_obj, docente)
     return render_template('reportes/asistencia_diaria.html',
         resultados=resultados,
         fecha=fecha,
@@ -116,37 +90,51 @@ def reporte_asistencia_diaria():
 # 🟨 3. Faltas injustificadas
 
 @reportes_bp.route('/faltas')
+@condicional('docentes', 'asistencias', 'licencias', 'feriados')
 def reporte_faltas():
-    fecha = request.args.get('fecha')
-    fecha_obj = None
-    faltantes = []
-
-    if fecha:
-        fecha_obj = datetime.strptime(fecha, '%Y-%m-%d').date()
-
-        # Docentes con asistencia registrada ese día
-        presentes_ids = db.session.query(Asistencia.docente_id).filter_by(fecha=fecha_obj).distinct()
-
-        # Docentes con licencia activa ese día
-        con_licencia_ids = db.session.query(Licencia.docente_id).filter(
-            Licencia.estado == 'aprobada',
-            Licencia.fecha_inicio <= fecha_obj,
-            Licencia.fecha_fin >= fecha_obj
-        ).distinct()
-
-        # Docentes activos sin asistencia ni licencia
-        faltantes = Docente.query.filter(
-            Docente.activo == True,
-            ~Docente.id.in_(presentes_ids),
-            ~Docente.id.in_(con_licencia_ids)
-        ).all()
-
-    return render_template('reportes/faltas.html', faltantes=faltantes, fecha=fecha_obj)
+    # ?fecha= consulta un solo día; ?desde=&hasta= un rango (ambos incluidos)
+    desde_str = request.args.get('desde') or request.args.get('fecha')
+    hasta_str = request.args.get('hasta') or desde_str
+    jornada = request.args.get('jornada') or None
+    desde = hasta = None
+    detalle, por_docente, por_dia = [], [], []
+
+    if desde_str:
+        try:
+            desde = datetime.strptime(desde_str, '%Y-%m-%d').date()
+            hasta = datetime.strptime(hasta_str, '%Y-%m-%d').date()
+        except ValueError:
+            flash("La fecha ingresada no tiene un formato válido.", "danger")
+            return redirect(url_for('reportes.reporte_faltas'))
+        if hasta < desde:
+            flash("La fecha final debe ser posterior a la inicial.", "danger")
+            return redirect(url_for('reportes.reporte_faltas'))
+
+        # Turnos esperados − asistencias − licencias, en un solo cálculo
+        faltas = calcular_faltas(desde, hasta + timedelta(days=1), jornada=jornada)
+        formato = request.args.get('formato')
+        if formato in FORMATOS:
+            return exportar(formato, f"faltas_{desde}_{hasta}",
+                ["Docente", "Cédula", "Fecha", "Jornada"],
+                ((f.nombre, f.cedula, f.fecha, f.jornada) for f in detalle_faltas(faltas)))
+        detalle = detalle_faltas(faltas)
+        por_docente = faltas_por_docente(faltas)
+        por_dia = sorted(faltas.por_dia.items())
+
+    return render_template('reportes/faltas.html',
+        detalle=detalle,
+        por_docente=por_docente,
+        por_dia=por_dia,
+        desde=desde,
+        hasta=hasta,
+        jornada=jornada
+    )
 
 
 # 🟩 4. Resumen mensual
 
 @reportes_bp.route('/resumen-mensual')
+@condicional('docentes', 'asistencias')
 def reporte_resumen_mensual():
     # Parámetros recibidos
     mes_str = request.args.get('mes', '').strip()  # formato esperado: YYYY-MM
@@ -156,49 +144,25 @@ def reporte_resumen_mensual():
     try:
         if mes_str:
             año, mes_num = map(int, mes_str.split('-'))
-            inicio_mes = date(año, mes_num, 1)
+            inicio_mes, fin_mes = rango_mes(año, mes_num)
         else:
             hoy = date.today()
             año, mes_num = hoy.year, hoy.month
-            inicio_mes = date(año, mes_num, 1)
+            inicio_mes, fin_mes = rango_mes(año, mes_num)
             mes_str = inicio_mes.strftime('%Y-%m')
     except ValueError:
         flash("Formato de mes inválido. Usa YYYY-MM.", "danger")
         return redirect(url_for('reportes.reporte_resumen_mensual'))
 
-    # Consulta base
-    query = Asistencia.query.join(Docente).filter(
-        extract('year', Asistencia.fecha) == año,
-        extract('month', Asistencia.fecha) == mes_num
-    )
+    formato = request.args.get('formato')
+    if formato in FORMATOS:
+        return exportar(formato, f"resumen_{mes_str}",
+            ["Docente", "Asistencias", "Atrasos", "Ausentes", "Pendientes"],
+            ((f.nombre, f.asistencias, f.atrasos, f.ausentes, f.pendientes)
+             for f in iter_resumen_mensual(inicio_mes, fin_mes, docente_filtro)))
 
-    if docente_filtro:
-        query = query.filter(Docente.nombre.ilike(f'%{docente_filtro}%'))
-
-    registros = query.all()
-
-    # Construcción del resumen
-    resumen = {}
-    hora_referencia = datetime.strptime('08:00', '%H:%M').time()
-
-    for r in registros:
-        nombre = r.docente.nombre
-        if nombre not in resumen:
-            resumen[nombre] = {
-                'asistencias': 0,
-                'ausentes': 0,
-                'pendientes': 0,
-                'atrasos': 0
-            }
-
-        if r.estado == 'presente':
-            resumen[nombre]['asistencias'] += 1
-            if r.hora_entrada and r.hora_entrada > hora_referencia:
-                resumen[nombre]['atrasos'] += 1
-        elif r.estado == 'ausente':
-            resumen[nombre]['ausentes'] += 1
-        elif r.estado == 'pendiente':
-            resumen[nombre]['pendientes'] += 1
+    # Totales por docente calculados en la base (rango semiabierto sobre fecha)
+    resumen = resumen_mensual(inicio_mes, fin_mes, docente_filtro)
 
     return render_template('reportes/resumen_mensual.html',
         resumen=resumen,
@@ -207,6 +171,7 @@ def reporte_resumen_mensual():
     )
 
 @reportes_bp.route('/incumplimientos/pdf')
+@condicional('docentes', 'asistencias', 'horarios')
 def exportar_pdf():
     jornada = request.args.get('jornada')
     desde_str = request.args.get('desde')
@@ -220,46 +185,22 @@ def exportar_pdf():
     except ValueError:
         return "Fechas inválidas", 400
 
-    query = Asistencia.query.join(Docente).filter(Asistencia.fecha.between(desde, hasta))
-    if jornada:
-        query = query.filter(Docente.jornada == jornada)
-    if docentes_ids:
-        query = query.filter(Docente.id.in_(docentes_ids))
-
-    registros = query.order_by(Asistencia.fecha, Asistencia.hora_entrada).all()
-
-    resumen_docentes = defaultdict(lambda: {
-        'nombre': '',
-        'jornada': '',
-        'entrada_tarde': 0,
-        'salida_temprano': 0,
-        'incumplimientos': 0,
-        'tiempo_total': timedelta()
-    })
-
-    for a in registros:
-        entrada_tarde, salida_temprano = evaluar_asistencia(a.docente, a.hora_entrada, a.hora_salida)
-        tiempo_acumulado = calcular_tiempo_acumulado(a.hora_entrada, a.hora_salida)
-
-        if entrada_tarde or salida_temprano:
-            d = resumen_docentes[a.docente.id]
-            d['nombre'] = a.docente.nombre
-            d['jornada'] = a.docente.jornada
-            d['entrada_tarde'] += int(entrada_tarde)
-            d['salida_temprano'] += int(salida_temprano)
-            d['incumplimientos'] += 1
-            d['tiempo_total'] += tiempo_acumulado or timedelta()
+    # Incidencias calculadas en lote por docente
+    resumen_lista = resumen_incumplimientos(desde, hasta, jornada, docentes_ids)
 
-    resumen_lista = list(resumen_docentes.values())
+    # Crear PDF (reportlab se importa solo aquí: es lo más lento de cargar)
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet
 
-    # Crear PDF
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4)
     styles = getSampleStyleSheet()
     elements = []
 
     # Encabezado institucional
-    elements.append(Paragraph("Unidad Educativa “ALBERTINA RIVAS MEDINA”", styles['Title']))
+    elements.append(Paragraph(escape(nombre_escuela()), styles['Title']))
     elements.append(Paragraph("Resumen de incumplimientos por docente", styles['Heading2']))
     elements.append(Paragraph(f"Periodo: {desde.strftime('%d/%m/%Y')} al {hasta.strftime('%d/%m/%Y')}", styles['Normal']))
     if jornada:
@@ -271,14 +212,13 @@ def exportar_pdf():
         ["Docente", "Jornada", "Entradas tarde", "Salidas temprano", "Incumplimientos", "Tiempo total"]
     ]
     for r in resumen_lista:
-        tiempo = f"{r['tiempo_total'].seconds // 3600}h {(r['tiempo_total'].seconds // 60) % 60}m"
         data.append([
             r['nombre'],
             r['jornada'].capitalize(),
             r['entrada_tarde'],
             r['salida_temprano'],
             r['incumplimientos'],
-            tiempo
+            r['tiempo_total']
         ])
 
     table = Table(data, repeatRows=1)
@@ -299,84 +239,63 @@ def exportar_pdf():
 
 
 
-def calcular_jornada_esperada(jornada: str) -> timedelta:
-    """
-    Devuelve la duración esperada de la jornada laboral según el tipo.
-    """
-    if jornada == "matutina":
-        return timedelta(hours=8)   # ejemplo: 8 horas
-    elif jornada == "vespertina":
-        return timedelta(hours=8)   # ejemplo: 8 horas
-    elif jornada == "doble":
-        return timedelta(hours=16)  # ejemplo: 16 horas
-    else:
-        # valor por defecto si no está definido
-        return timedelta(hours=8)
-
-
 @reportes_bp.route('/consolidado')
+@condicional('docentes', 'asistencias', 'licencias', 'feriados', 'horarios')
 def reporte_consolidado():
     desde_str = request.args.get('desde')
     hasta_str = request.args.get('hasta')
 
+    formato = request.args.get('formato')
+
     desde = datetime.strptime(desde_str, '%Y-%m-%d').date() if desde_str else date.today().replace(day=1)
     hasta = datetime.strptime(hasta_str, '%Y-%m-%d').date() if hasta_str else date.today()
 
-    docentes = Docente.query.order_by(Docente.nombre).all()
-    consolidado = []
-
-    for d in docentes:
-        # Asistencias en el rango
-        asistencias = Asistencia.query.filter(
-            Asistencia.docente_id == d.id,
-            Asistencia.fecha.between(desde, hasta)
-        ).all()
-        fechas_con_asistencia = {a.fecha for a in asistencias}
-
-        # Licencias aprobadas que se solapan con el rango
-        licencias = Licencia.query.filter(
-            Licencia.docente_id == d.id,
-            Licencia.estado == 'aprobada',
-            Licencia.fecha_inicio <= hasta,
-            Licencia.fecha_fin >= desde
-        ).all()
-
-        # Expandir días de licencia
-        fechas_con_licencia = set()
-        for l in licencias:
-            dia = max(l.fecha_inicio, desde)
-            fin = min(l.fecha_fin, hasta)
-            while dia <= fin:
-                fechas_con_licencia.add(dia)
-                dia += timedelta(days=1)
-
-        # Calcular faltas (solo días laborales sin asistencia ni licencia)
-        faltas = 0
-        dia = desde
-        while dia <= hasta:
-            if dia.weekday() < 5:  # lunes-viernes
-                if dia not in fechas_con_asistencia and dia not in fechas_con_licencia:
-                    faltas += 1
-            dia += timedelta(days=1)
-
-        # Calcular horas incumplidas
-        horas_incumplidas = timedelta()
-        for a in asistencias:
-            entrada_tarde, salida_temprano = evaluar_asistencia(d, a.hora_entrada, a.hora_salida)
-            if entrada_tarde or salida_temprano:
-                esperado = calcular_jornada_esperada(d.jornada)
-                trabajado = calcular_tiempo_acumulado(a.hora_entrada, a.hora_salida) or timedelta()
-                horas_incumplidas += max(timedelta(), esperado - trabajado)
-
-        consolidado.append({
-            "docente": d.nombre,
-            "jornada": d.jornada,
-            "faltas": faltas,
-            "licencias": len(licencias),
-            "horas_incumplidas": f"{horas_incumplidas.seconds//3600}h {(horas_incumplidas.seconds//60)%60}m"
-        })
+    if formato in FORMATOS:
+        return exportar(formato, f"consolidado_{desde}_{hasta}",
+            ["Docente", "Jornada", "Faltas", "Licencias", "Horas incumplidas"],
+            ((r["docente"], r["jornada"], r["faltas"], r["licencias"], r["horas_incumplidas"])
+             for r in iter_consolidado(desde, hasta)))
+
+    consolidado = list(iter_consolidado(desde, hasta))
 
     return render_template("reportes/consolidado.html",
                            consolidado=consolidado,
                            desde=desde,
-                           hasta=hasta)
\ No newline at end of file
+                           hasta=hasta)
+
+# 🟪 5. Exportación del historial para análisis externo
+
+@reportes_bp.route('/exportar/historial')
+@talento_humano_required
+def exportar_historial_zip():
+    """Descarga un ZIP con el historial particionado por año/mes"""
+    try:
+        desde = datetime.strptime(request.args['desde'], '%Y-%m-%d').date() if request.args.get('desde') else None
+        hasta = datetime.strptime(request.args['hasta'], '%Y-%m-%d').date() if request.args.get('hasta') else None
+    except ValueError:
+        return "Formato de fecha inválido", 400
+    formato = request.args.get('formato', 'parquet')
+    if formato not in FORMATOS_HISTORIAL:
+        return "Formato no soportado", 400
+
+    # Los archivos se escriben en disco: la memoria no crece con el rango
+    carpeta = tempfile.mkdtemp(prefix='historial_')
+    try:
+        # ?hasta= se incluye, como en los demás reportes; la exportación usa [desde, hasta)
+        fin = hasta + timedelta(days=1) if hasta else None
+        resultado = exportar_historial(os.path.join(carpeta, 'historial'), desde, fin, formato)
+        ruta_zip = os.path.join(carpeta, 'historial.zip')
+        with zipfile.ZipFile(ruta_zip, 'w', zipfile.ZIP_STORED) as zf:  # ya van comprimidos
+            for ruta in resultado.archivos:
+                zf.write(ruta, os.path.relpath(ruta, carpeta))
+    except Exception:
+        shutil.rmtree(carpeta, ignore_errors=True)
+        raise
+
+    log_user_action('exportar.historial', {
+        'desde': desde, 'hasta': hasta, 'formato': resultado.formato, 'filas': resultado.filas
+    })
+    respuesta = send_file(ruta_zip, as_attachment=True, download_name='historial_asistencias.zip',
+                          mimetype='application/zip')
+    respuesta.call_on_close(lambda: shutil.rmtree(carpeta, ignore_errors=True))
+    return respuesta
@@ -0,0 +1,258 @@
+"""
+Caché compartida entre workers sin servidor externo.
+
+Dos niveles:
+
+- memoria: LRU por proceso con expiración por entrada (acierto sin E/S)
+- disco: tabla SQLite en ``instance/cache.sqlite3`` en modo WAL, que
+  comparten todos los procesos del servidor. Cada entrada tiene
+  vencimiento y, al superar ``CACHE_MAX_ENTRADAS``, se descartan las menos
+  usadas.
+
+``CACHE_TIPO`` elige el backend: ``sqlite`` (memoria + disco, por defecto)
+o ``memoria`` (solo por proceso, útil en desarrollo y pruebas). Todo el
+código usa la misma API::
+
+    from cache_compartido import cache
+    png = cache.obtener_o_calcular(f'qr:{id}', generar, ttl=3600)
+
+Las claves deben incluir lo que identifica la versión de los datos
+(``versiones.version(...)``): ``eliminar`` borra el disco y la memoria de
+este proceso, pero otros procesos pueden seguir viendo su copia en memoria
+hasta ``CACHE_MEMORIA_TTL`` segundos.
+"""
+
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time as reloj
+
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_NADA = object()
+
+
+class CacheMemoria:
+    """LRU por proceso con expiración por entrada."""
+
+    def __init__(self, tamano=1024, ttl=300):
+        self.tamano = tamano
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, defecto=None):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return defecto
+            valor, expira = entrada
+            if expira <= reloj.time():
+                del self._entradas[clave]
+                return defecto
+            self._entradas.move_to_end(clave)
+            return valor
+
+    def guardar(self, clave, valor, ttl=None):
+        expira = reloj.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entradas[clave] = (valor, expira)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.tamano:
+                self._entradas.popitem(last=False)
+
+    def eliminar(self, clave):
+        with self._lock:
+            self._entradas.pop(clave, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+
+class CacheSQLite:
+    """Entradas serializadas en una tabla SQLite (WAL) compartida."""
+
+    # Segundos mínimos entre actualizaciones del último acceso de una clave
+    PRECISION_ACCESO = 60
+    # Cada cuántas escrituras se purgan vencidas y sobrantes
+    PURGA_CADA = 200
+
+    def __init__(self, ruta, max_entradas=10000, ttl=300):
+        self.ruta = ruta
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._local = threading.local()
+        self._escrituras = 0
+        self._crear_tabla()
+
+    def _conexion(self):
+        # Una conexión por hilo y por proceso (no se heredan tras un fork)
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None or self._local.pid != os.getpid():
+            conexion = sqlite3.connect(self.ruta, timeout=5, isolation_level=None,
+                                       check_same_thread=False)
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.execute('PRAGMA synchronous=NORMAL')
+            self._local.conexion = conexion
+            self._local.pid = os.getpid()
+        return conexion
+
+    def _crear_tabla(self):
+        conexion = self._conexion()
+        conexion.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            ' clave TEXT PRIMARY KEY, valor BLOB NOT NULL,'
+            ' expira REAL NOT NULL, acceso REAL NOT NULL)'
+        )
+        conexion.execute('CREATE INDEX IF NOT EXISTS idx_cache_acceso ON cache (acceso)')
+        conexion.execute('CREATE INDEX IF NOT EXISTS idx_cache_expira ON cache (expira)')
+
+    def obtener_con_vencimiento(self, clave):
+        """(valor, expira) o (_NADA, 0) si no está o venció."""
+        conexion = self._conexion()
+        fila = conexion.execute(
+            'SELECT valor, expira, acceso FROM cache WHERE clave = ?', (clave,)
+        ).fetchone()
+        if fila is None:
+            return _NADA, 0
+        valor, expira, acceso = fila
+        ahora = reloj.time()
+        if expira <= ahora:
+            return _NADA, 0
+        if ahora - acceso > self.PRECISION_ACCESO:
+            conexion.execute('UPDATE cache SET acceso = ? WHERE clave = ?', (ahora, clave))
+        return pickle.loads(valor), expira
+
+    def obtener(self, clave, defecto=None):
+        valor, _ = self.obtener_con_vencimiento(clave)
+        return defecto if valor is _NADA else valor
+
+    def guardar(self, clave, valor, ttl=None):
+        ahora = reloj.time()
+        expira = ahora + (self.ttl if ttl is None else ttl)
+        self._conexion().execute(
+            'INSERT OR REPLACE INTO cache (clave, valor, expira, acceso) VALUES (?, ?, ?, ?)',
+            (clave, pickle.dumps(valor, pickle.HIGHEST_PROTOCOL), expira, ahora)
+        )
+        self._escrituras += 1
+        if self._escrituras % self.PURGA_CADA == 0:
+            self.purgar()
+
+    def eliminar(self, clave):
+        self._conexion().execute('DELETE FROM cache WHERE clave = ?', (clave,))
+
+    def limpiar(self):
+        self._conexion().execute('DELETE FROM cache')
+
+    def purgar(self):
+        """Borra las entradas vencidas y las menos usadas por encima del máximo."""
+        conexion = self._conexion()
+        conexion.execute('DELETE FROM cache WHERE expira <= ?', (reloj.time(),))
+        (total,) = conexion.execute('SELECT COUNT(*) FROM cache').fetchone()
+        if total > self.max_entradas:
+            conexion.execute(
+                'DELETE FROM cache WHERE clave IN '
+                '(SELECT clave FROM cache ORDER BY acceso LIMIT ?)',
+                (total - self.max_entradas,)
+            )
+
+
+class CacheDosNiveles:
+    """Memoria del proceso delante de la caché en disco.
+
+    Un error del disco (base bloqueada, disco lleno) nunca llega a la
+    petición: se registra y se trata como un fallo de caché.
+    """
+
+    def __init__(self, disco, memoria):
+        self.disco = disco
+        self.memoria = memoria
+
+    def obtener(self, clave, defecto=None):
+        valor = self.memoria.obtener(clave, _NADA)
+        if valor is not _NADA:
+            return valor
+        try:
+            valor, expira = self.disco.obtener_con_vencimiento(clave)
+        except sqlite3.Error:
+            logger.warning("Caché en disco no disponible al leer %s", clave, exc_info=True)
+            return defecto
+        if valor is _NADA:
+            return defecto
+        self.memoria.guardar(clave, valor, min(self.memoria.ttl, expira - reloj.time()))
+        return valor
+
+    def guardar(self, clave, valor, ttl=None):
+        self.memoria.guardar(clave, valor, self.memoria.ttl if ttl is None else min(self.memoria.ttl, ttl))
+        try:
+            self.disco.guardar(clave, valor, ttl)
+        except sqlite3.Error:
+            logger.warning("Caché en disco no disponible al guardar %s", clave, exc_info=True)
+
+    def eliminar(self, clave):
+        self.memoria.eliminar(clave)
+        self.disco.eliminar(clave)
+
+    def limpiar(self):
+        self.memoria.limpiar()
+        self.disco.limpiar()
+
+
+class CacheCompartida:
+    """Punto de acceso único; el backend se elige en ``init_app``.
+
+    ``espacio()`` antepone un prefijo a cada clave (la escuela actual, ver
+    ``escuelas.espacio_cache``) para que datos de escuelas distintas no se
+    mezclen aunque el código use la misma clave.
+    """
+
+    def __init__(self):
+        self.backend = CacheMemoria()
+        self.espacio = lambda: ''
+
+    def obtener(self, clave, defecto=None):
+        return self.backend.obtener(self.espacio() + clave, defecto)
+
+    def guardar(self, clave, valor, ttl=None):
+        self.backend.guardar(self.espacio() + clave, valor, ttl)
+
+    def eliminar(self, clave):
+        self.backend.eliminar(self.espacio() + clave)
+
+    def limpiar(self):
+        self.backend.limpiar()
+
+    def obtener_o_calcular(self, clave, calcular, ttl=None):
+        """Devuelve el valor en caché o lo calcula con ``calcular()`` y lo guarda."""
+        clave = self.espacio() + clave
+        valor = self.backend.obtener(clave, _NADA)
+        if valor is _NADA:
+            valor = calcular()
+            self.backend.guardar(clave, valor, ttl)
+        return valor
+
+
+cache = CacheCompartida()
+
+
+def init_app(app):
+    """Configura el backend según ``CACHE_TIPO``."""
+    ttl = app.config.get('CACHE_TTL', 300)
+    tamano = app.config.get('CACHE_MEMORIA_TAMANO', 1024)
+    if app.config.get('CACHE_TIPO', 'sqlite') == 'memoria':
+        cache.backend = CacheMemoria(tamano, ttl)
+        return
+
+    directorio = app.config.get('CACHE_DIR') or app.instance_path
+    os.makedirs(directorio, exist_ok=True)
+    disco = CacheSQLite(
+        os.path.join(directorio, 'cache.sqlite3'),
+        max_entradas=app.config.get('CACHE_MAX_ENTRADAS', 10000),
+        ttl=ttl
+    )
+    cache.backend = CacheDosNiveles(disco, CacheMemoria(tamano, app.config.get('CACHE_MEMORIA_TTL', 10)))
@@ -0,0 +1,115 @@
+"""
+Caché de usuarios autenticados para ``login_manager.user_loader``.
+
+Flask-Login carga el usuario en cada petición que usa ``current_user``.
+En lugar de consultar la tabla ``usuarios`` cada vez, se guarda una copia
+desacoplada de la sesión SQLAlchemy (``UsuarioSesion``) en un LRU acotado
+por tiempo. Cualquier UPDATE o DELETE sobre ``Usuario`` (cambio de
+contraseña, de rol, desactivación, último acceso) invalida la entrada.
+
+La caché es por proceso: con varios workers, un cambio hecho en otro
+proceso se ve como máximo ``CACHE_USUARIOS_TTL`` segundos después.
+"""
+
+import threading
+import time
+
+from collections import OrderedDict
+from flask_login import UserMixin
+from sqlalchemy import event
+
+from app_simple import db
+from models.usuario import Usuario
+
+CAMPOS = ('id', 'username', 'rol', 'activo', 'escuela_id', 'fecha_creacion', 'ultimo_acceso')
+
+
+class UsuarioSesion(UserMixin):
+    """Copia de solo lectura de un ``Usuario`` para ``current_user``.
+
+    Para modificar el usuario (por ejemplo su contraseña) se debe cargar
+    la entidad ``Usuario`` desde la base.
+    """
+
+    __slots__ = CAMPOS
+
+    def __init__(self, usuario):
+        for campo in CAMPOS:
+            setattr(self, campo, getattr(usuario, campo))
+
+    def is_admin(self):
+        """Verifica si el usuario es administrador"""
+        return self.rol == 'admin'
+
+    def is_talento_humano(self):
+        """Verifica si el usuario es de talento humano"""
+        return self.rol == 'talento_humano'
+
+    def __repr__(self):
+        return f'<UsuarioSesion {self.username}>'
+
+
+class CacheUsuarios:
+    """LRU de ``UsuarioSesion`` con expiración por entrada."""
+
+    def __init__(self, tamano=256, ttl=60):
+        self.tamano = tamano
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, user_id, cargar):
+        """Devuelve el usuario en caché o lo carga con ``cargar(user_id)``."""
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(user_id)
+            if entrada is not None:
+                usuario, expira = entrada
+                if expira > ahora:
+                    self._entradas.move_to_end(user_id)
+                    return usuario
+                del self._entradas[user_id]
+
+        usuario = cargar(user_id)
+        if usuario is None:
+            return None
+
+        copia = UsuarioSesion(usuario)
+        with self._lock:
+            self._entradas[user_id] = (copia, ahora + self.ttl)
+            self._entradas.move_to_end(user_id)
+            while len(self._entradas) > self.tamano:
+                self._entradas.popitem(last=False)
+        return copia
+
+    def invalidar(self, user_id=None):
+        """Elimina un usuario de la caché (o todos si ``user_id`` es None)."""
+        with self._lock:
+            if user_id is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(user_id, None)
+
+
+cache = CacheUsuarios()
+
+
+def init_app(app):
+    """Aplica la configuración de la caché."""
+    cache.tamano = app.config.get('CACHE_USUARIOS_TAMANO', cache.tamano)
+    cache.ttl = app.config.get('CACHE_USUARIOS_TTL', cache.ttl)
+
+
+def cargar_usuario(user_id):
+    """Callback para ``login_manager.user_loader``."""
+    return cache.obtener(int(user_id), lambda id_: db.session.get(Usuario, id_))
+
+
+def invalidar_usuario(user_id=None):
+    cache.invalidar(user_id)
+
+
+@event.listens_for(Usuario, 'after_update')
+@event.listens_for(Usuario, 'after_delete')
+def _invalidar_al_modificar(mapper, connection, target):
+    cache.invalidar(target.id)
@@ -0,0 +1,82 @@
+"""
+Calendario laboral: días hábiles entre dos fechas.
+
+Los feriados de cada escuela se guardan por proceso como un conjunto de
+ordinales y se vuelven a leer solo cuando cambia la versión de la tabla
+``feriados`` (``versiones``), sea cual sea el worker que la modificó. Sin
+escuela se usa la de la petición (``escuelas.escuela_o_defecto``). Los rangos de días
+hábiles consultados se guardan en un LRU pequeño (los reportes repiten los
+mismos rangos).
+"""
+
+import threading
+
+from datetime import timedelta
+from functools import lru_cache
+
+import numpy as np
+
+from escuelas import escuela_o_defecto
+from models.feriado import Feriado
+from versiones import version_de
+
+_feriados = {}  # escuela -> (versión, ordinales)
+_lock = threading.Lock()
+
+
+def feriados(escuela=None):
+    """Conjunto de ordinales de los días no laborables de la escuela."""
+    escuela = escuela_o_defecto(escuela)
+    actual = version_de('feriados')  # antes de leer los datos
+    guardado = _feriados.get(escuela)
+    if guardado is not None and guardado[0] == actual:
+        return guardado[1]
+
+    with _lock:
+        guardado = _feriados.get(escuela)
+        if guardado is None or guardado[0] != actual:
+            consulta = Feriado.query.filter_by(escuela_id=escuela)\
+                .execution_options(todas_las_escuelas=True).with_entities(Feriado.fecha)
+            nuevos = frozenset(f.toordinal() for (f,) in consulta)
+            if guardado is not None and nuevos == guardado[1]:
+                nuevos = guardado[1]  # misma clave para el LRU de rangos
+            guardado = _feriados[escuela] = (actual, nuevos)
+        return guardado[1]
+
+
+@lru_cache(maxsize=64)
+def _dias_laborables(inicio, fin, no_laborables):
+    dias = np.arange(inicio, fin, dtype=np.int32)
+    # date.fromordinal(1) es lunes: (ordinal - 1) % 7 es weekday()
+    habiles = (dias - 1) % 7 < 5
+    if no_laborables:
+        habiles &= ~np.isin(dias, np.fromiter(no_laborables, dtype=np.int32))
+    resultado = dias[habiles]
+    resultado.flags.writeable = False  # compartido entre llamadas
+    return resultado
+
+
+def dias_laborables(desde, hasta, escuela=None):
+    """Ordinales de los días hábiles (lunes a viernes sin feriados) en [desde, hasta)."""
+    return _dias_laborables(desde.toordinal(), hasta.toordinal(), feriados(escuela))
+
+
+def es_laborable(fecha, escuela=None):
+    return fecha.weekday() < 5 and fecha.toordinal() not in feriados(escuela)
+
+
+def ultimos_dias_laborables(hasta, cantidad, escuela=None):
+    """Ordinales de los ``cantidad`` días hábiles anteriores a ``hasta`` (excluida)."""
+    if cantidad <= 0:
+        return np.zeros(0, dtype=np.int32)
+    # Margen para fines de semana y feriados; se amplía si hay vacaciones
+    margen = cantidad * 2 + 14
+    while True:
+        dias = dias_laborables(hasta - timedelta(days=margen), hasta, escuela)
+        if len(dias) >= cantidad or margen > 366:
+            return dias[-cantidad:]
+        margen *= 2
+
+
+def invalidar():
+    _feriados.clear()
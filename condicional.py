@@ -0,0 +1,87 @@
+"""
+GET condicional (ETag / 304) para vistas de solo lectura.
+
+Cada vista declara las tablas de las que dependen sus datos::
+
+    @reportes_bp.route('/faltas')
+    @condicional('docentes', 'asistencias', 'licencias', 'feriados')
+    def reporte_faltas(): ...
+
+El ETag (fuerte) se arma con la versión de esas tablas (``versiones``),
+la URL con sus filtros, el usuario y su escuela, la fecha y la
+codificación aceptada.
+Si el navegador envía el mismo ETag en ``If-None-Match`` se responde 304
+antes de ejecutar la vista, es decir, sin consultas ni renderizado.
+
+Las versiones se comparten entre workers (``versiones_datos``) y lo que
+cada worker guarda en memoria para estas vistas (cubo de asistencias,
+feriados, horarios, fragmentos de plantilla) se recarga con esas mismas
+versiones, leídas antes que los datos: la página nunca es más vieja que
+su ETag, así que con ``CONDICIONAL_VENTANA = 0`` no se sirve un 304
+desactualizado. La ventana (segundos) solo limita cuánto dura un ETag
+para escrituras que no actualizan las versiones. 0 = sin límite.
+"""
+
+import hashlib
+import time as reloj
+
+from datetime import date
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+
+from escuelas import escuela_actual_id
+from versiones import version
+
+
+def _etag(tablas, parametros):
+    if parametros is None:
+        filtros = sorted(request.args.items(multi=True))
+    else:
+        filtros = [(p, request.args.getlist(p)) for p in parametros]
+
+    ventana = current_app.config.get('CONDICIONAL_VENTANA', 0)
+    partes = (
+        request.endpoint,
+        request.view_args,
+        filtros,
+        current_user.get_id() if current_user.is_authenticated else None,
+        escuela_actual_id(),
+        date.today().toordinal(),  # las vistas usan "hoy" como valor por defecto
+        request.headers.get('Accept-Encoding', ''),
+        version(*tablas),
+        int(reloj.time() // ventana) if ventana else 0,
+    )
+    return hashlib.sha1(repr(partes).encode('utf-8')).hexdigest()
+
+
+def condicional(*tablas, parametros=None):
+    """Responde 304 si los datos de ``tablas`` no cambiaron.
+
+    Args:
+        tablas: nombres de las tablas que lee la vista
+        parametros: argumentos de la URL que filtran los datos (por defecto,
+            todos)
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            # Solo GET/HEAD y sin mensajes flash pendientes (se muestran una vez)
+            if request.method not in ('GET', 'HEAD') or session.get('_flashes'):
+                return vista(*args, **kwargs)
+
+            etag = _etag(tablas, parametros)
+            if etag in request.if_none_match:
+                respuesta = current_app.response_class(status=304)
+            else:
+                respuesta = make_response(vista(*args, **kwargs))
+                if respuesta.status_code != 200 or session.get('_flashes'):
+                    return respuesta
+
+            respuesta.set_etag(etag)
+            # El navegador guarda la copia pero la revalida en cada uso
+            respuesta.headers['Cache-Control'] = 'private, no-cache'
+            return respuesta
+        return envoltura
+    return decorador
@@ -0,0 +1,91 @@
+"""
+Fixtures comunes de las pruebas con pytest.
+
+La aplicación se crea una vez por sesión sobre una base SQLite temporal;
+cada prueba que usa ``bd`` parte de tablas vacías y cachés de proceso
+limpias.
+
+Uso:
+    python -m pytest
+"""
+
+import os
+import tempfile
+
+import pytest
+
+from flask import g
+
+_DIRECTORIO = tempfile.mkdtemp(prefix='asistencia_pruebas_')
+
+# La configuración se lee al importar ``config``: antes de importar la app
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_DIRECTORIO, 'pruebas.db')
+os.environ['CACHE_TIPO'] = 'memoria'
+os.environ['JINJA_CACHE_DIR'] = os.path.join(_DIRECTORIO, 'jinja')
+os.environ['ARCHIVO_HISTORICO_DIR'] = _DIRECTORIO
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app_simple import create_app
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+
+    # Las pruebas mantienen un contexto de aplicación abierto y Flask lo
+    # reutiliza en cada petición del cliente: se vacía ``g`` al terminar
+    # cada una para que, como en producción, ninguna herede el usuario
+    # cargado ni la escuela de la anterior
+    @app.teardown_request
+    def _limpiar_g(error):
+        g.__dict__.clear()
+
+    return app
+
+
+@pytest.fixture
+def bd(app):
+    """Base vacía y cachés de proceso limpias; deja un contexto de aplicación activo."""
+    import cubo_asistencia
+    import horarios
+    import versiones
+    from app_simple import db
+    from auditoria import buffer
+    from cache_compartido import cache
+    from cache_usuarios import invalidar_usuario
+
+    with app.app_context():
+        buffer.vaciar()  # acciones de la prueba anterior, antes de borrar las tablas
+        db.drop_all()
+        db.create_all()
+        cache.limpiar()
+        invalidar_usuario()
+        versiones.invalidar()
+        horarios.invalidar()
+        cubo_asistencia.invalidar()
+        yield db
+        db.session.remove()
+
+
+@pytest.fixture
+def cliente(app, bd):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin(bd):
+    from models.usuario import Usuario
+    usuario = Usuario(username='admin', rol='admin')
+    usuario.set_password('admin123')
+    bd.session.add(usuario)
+    bd.session.commit()
+    return usuario
+
+
+@pytest.fixture
+def cliente_admin(cliente, admin):
+    """Cliente con la sesión del administrador iniciada."""
+    respuesta = cliente.post('/auth/login', data={'username': 'admin', 'password': 'admin123'})
+    assert respuesta.status_code == 302
+    # Como el navegador: la página siguiente muestra (y consume) el mensaje flash
+    assert cliente.get(respuesta.headers['Location']).status_code == 200
+    return cliente
@@ -0,0 +1,352 @@
+"""
+Almacén columnar en memoria de las asistencias para los reportes.
+
+Cada año lectivo se guarda en un arreglo estructurado de NumPy (18 bytes
+por registro: id, docente, fecha ordinal, jornada, entrada y salida en
+segundos, estado) en lugar de objetos ``Asistencia`` del ORM. El cubo de un
+año se construye la primera vez que se consulta y se actualiza con los
+registros que confirma este proceso (tras cada commit, ver
+``versiones.al_incrementar``).
+
+Con varias escuelas hay un cubo por año lectivo y escuela (la de la
+petición, ver ``escuelas``), construido solo con los registros de esa
+escuela.
+
+Cada cubo recuerda la versión de ``asistencias`` (``versiones``) con la
+que se construyó, leída antes que los datos. Si la versión actual es otra,
+algún proceso cambió asistencias y el cubo se reconstruye en la próxima
+consulta. Tras un commit propio, los cubos que estaban en la versión
+anterior aplican los cambios del commit y pasan a la nueva sin
+reconstruirse. Así un reporte nunca es más viejo que la versión que lleva
+su ETag (``condicional``).
+"""
+
+import threading
+
+from collections import OrderedDict
+from datetime import timedelta
+
+import numpy as np
+
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from app_simple import db
+from escuelas import escuela_actual_id
+from archivo_historico import anios_archivados, asistencias_historico
+from incidencias import SIN_HORA, codigo_jornada
+from models.asistencia import Asistencia
+from utils import anio_lectivo_de, rango_anio_lectivo, segundos_del_dia
+from versiones import al_incrementar, version_de
+
+ESTADOS = ('presente', 'ausente', 'pendiente')
+CODIGOS_ESTADO = {estado: codigo for codigo, estado in enumerate(ESTADOS)}
+SIN_ESTADO = -1
+
+# Docente de los registros eliminados (se excluyen de las consultas)
+ELIMINADO = -1
+
+DTYPE = np.dtype([
+    ('id', np.int32),
+    ('docente', np.int32),
+    ('fecha', np.int32),
+    ('jornada', np.int8),
+    ('entrada', np.int32),
+    ('salida', np.int32),
+    ('estado', np.int8),
+])
+
+# Cubos (año lectivo, escuela) en memoria a la vez
+MAX_CUBOS = 16
+
+LOTE_LECTURA = 5000
+
+
+def fila_de(id_, docente_id, fecha, jornada, hora_entrada, hora_salida, estado):
+    """Tupla con el formato de ``DTYPE`` a partir de valores de la base."""
+    return (
+        id_,
+        docente_id,
+        fecha.toordinal(),
+        codigo_jornada(jornada),
+        segundos_del_dia(hora_entrada, SIN_HORA),
+        segundos_del_dia(hora_salida, SIN_HORA),
+        CODIGOS_ESTADO.get(estado, SIN_ESTADO),
+    )
+
+
+class CuboAsistencia:
+    """Registros de un año lectivo en columnas, ordenados por id."""
+
+    def __init__(self, anio, capacidad=1024):
+        self.anio = anio
+        self.version = None  # de 'asistencias' al construirlo (None = no cambia)
+        self._datos = np.zeros(capacidad, dtype=DTYPE)
+        self._n = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def nbytes(self):
+        return self._n * DTYPE.itemsize
+
+    def _reservar(self, extra):
+        necesario = self._n + extra
+        if necesario > len(self._datos):
+            capacidad = max(necesario, len(self._datos) * 2)
+            nuevos = np.zeros(capacidad, dtype=DTYPE)
+            nuevos[:self._n] = self._datos[:self._n]
+            self._datos = nuevos
+
+    def agregar(self, filas):
+        """Agrega filas (tuplas de ``fila_de``) con ids crecientes."""
+        bloque = np.array(filas, dtype=DTYPE)
+        if not len(bloque):
+            return
+        with self._lock:
+            self._reservar(len(bloque))
+            self._datos[self._n:self._n + len(bloque)] = bloque
+            self._n += len(bloque)
+
+    def guardar(self, fila):
+        """Inserta o reemplaza una fila según su id."""
+        with self._lock:
+            ids = self._datos['id'][:self._n]
+            pos = int(np.searchsorted(ids, fila[0]))
+            if pos < self._n and ids[pos] == fila[0]:
+                self._datos[pos] = fila
+                return
+            self._reservar(1)
+            # Lo normal es que el id sea el mayor y se agregue al final
+            self._datos[pos + 1:self._n + 1] = self._datos[pos:self._n]
+            self._datos[pos] = fila
+            self._n += 1
+
+    def eliminar(self, id_):
+        with self._lock:
+            ids = self._datos['id'][:self._n]
+            pos = int(np.searchsorted(ids, id_))
+            if pos < self._n and ids[pos] == id_:
+                self._datos['docente'][pos] = ELIMINADO
+
+    def filtrar(self, desde=None, hasta=None, docentes=None, jornadas=None, estados=None):
+        """Registros en [desde, hasta) que cumplen los filtros.
+
+        Args:
+            desde, hasta: ``date`` (rango semiabierto)
+            docentes: ids de docente
+            jornadas: nombres de jornada
+            estados: nombres de estado
+        Returns:
+            numpy.ndarray: copia con ``DTYPE`` de los registros seleccionados
+        """
+        with self._lock:
+            datos = self._datos[:self._n]
+            mascara = datos['docente'] != ELIMINADO
+            if desde is not None:
+                mascara &= datos['fecha'] >= desde.toordinal()
+            if hasta is not None:
+                mascara &= datos['fecha'] < hasta.toordinal()
+            if docentes is not None:
+                mascara &= np.isin(datos['docente'], np.asarray(list(docentes), dtype=np.int32))
+            if jornadas is not None:
+                mascara &= np.isin(datos['jornada'], [codigo_jornada(j) for j in jornadas])
+            if estados is not None:
+                mascara &= np.isin(datos['estado'], [CODIGOS_ESTADO.get(e, SIN_ESTADO) for e in estados])
+            return datos[mascara]
+
+
+def agrupar(datos, clave='docente', valores=None):
+    """Agrupa registros seleccionados por una columna.
+
+    Returns:
+        tuple: (claves, conteos) o (claves, sumas) si se indica ``valores``
+        (nombre de columna o arreglo alineado con ``datos``)
+    """
+    claves, grupo = np.unique(datos[clave], return_inverse=True)
+    if valores is None:
+        return claves, np.bincount(grupo, minlength=len(claves))
+    if isinstance(valores, str):
+        valores = datos[valores]
+    return claves, np.bincount(grupo, weights=valores, minlength=len(claves))
+
+
+_cubos = OrderedDict()
+_lock = threading.Lock()
+
+
+def _fuente(anio):
+    if current_app.config.get('ARCHIVO_HISTORICO_ACTIVO') and anio in anios_archivados(current_app):
+        return asistencias_historico, True
+    return Asistencia.__table__, False
+
+
+def _rango(tabla, inicio, fin, escuela):
+    condiciones = [tabla.c.fecha >= inicio, tabla.c.fecha < fin]
+    if escuela is not None:
+        condiciones.insert(0, tabla.c.escuela_id == escuela)
+    return condiciones
+
+
+def _construir(anio, escuela=None):
+    mes_inicio = current_app.config.get('ANIO_LECTIVO_MES_INICIO', 9)
+    inicio, fin = rango_anio_lectivo(anio, mes_inicio)
+    tabla, archivado = _fuente(anio)
+
+    # La versión antes que los datos: una versión vieja solo reconstruye de más.
+    # Un año archivado no cambia: no hace falta volver a verificarlo
+    version = None if archivado else version_de(Asistencia.__tablename__)
+    cubo = CuboAsistencia(anio)
+    consulta = select(
+        tabla.c.id, tabla.c.docente_id, tabla.c.fecha, tabla.c.jornada,
+        tabla.c.hora_entrada, tabla.c.hora_salida, tabla.c.estado
+    ).where(*_rango(tabla, inicio, fin, escuela)).order_by(tabla.c.id)
+
+    resultado = db.session.execute(consulta.execution_options(yield_per=LOTE_LECTURA))
+    for lote in resultado.partitions():
+        cubo.agregar([fila_de(*fila) for fila in lote])
+
+    cubo.version = version
+    return cubo
+
+
+def obtener_cubo(anio):
+    """Cubo del año lectivo ``anio`` de la escuela actual (se construye en la
+    primera consulta)."""
+    escuela = escuela_actual_id()
+    clave = (anio, escuela)
+
+    with _lock:
+        cubo = _cubos.get(clave)
+        if cubo is not None:
+            _cubos.move_to_end(clave)
+
+    if cubo is not None and cubo.version is not None and cubo.version != version_de(Asistencia.__tablename__):
+        cubo = None  # otro proceso cambió asistencias
+
+    if cubo is None:
+        cubo = _construir(anio, escuela)
+        with _lock:
+            _cubos[clave] = cubo
+            while len(_cubos) > MAX_CUBOS:
+                _cubos.popitem(last=False)
+    return cubo
+
+
+def seleccionar(desde, hasta, **filtros):
+    """Registros en [desde, hasta) de todos los años lectivos del rango."""
+    mes_inicio = current_app.config.get('ANIO_LECTIVO_MES_INICIO', 9)
+    primero = anio_lectivo_de(desde, mes_inicio)
+    ultimo = anio_lectivo_de(hasta - timedelta(days=1), mes_inicio)
+    partes = [
+        obtener_cubo(anio).filtrar(desde, hasta, **filtros)
+        for anio in range(primero, ultimo + 1)
+    ]
+    if not partes:
+        return np.zeros(0, dtype=DTYPE)
+    return np.concatenate(partes) if len(partes) > 1 else partes[0]
+
+
+def invalidar(anio=None):
+    """Descarta los cubos de un año, de todas las escuelas (o todos)."""
+    with _lock:
+        if anio is None:
+            _cubos.clear()
+        else:
+            for clave in [c for c in _cubos if c[0] == anio]:
+                del _cubos[clave]
+
+
+def invalidar_en_sesion(session, fechas):
+    """Descarta, cuando ``session`` confirme, los cubos de los años lectivos
+    de ``fechas``; para asistencias insertadas con Core sin conocer su id."""
+    pendientes = session.info.setdefault('cubo_asistencia', [])
+    pendientes.extend(('invalidar', None, fecha, None) for fecha in set(fechas))
+
+
+# --- Actualización incremental con los commits de este proceso ---
+
+def _pendientes(target):
+    session = object_session(target)
+    if session is None:
+        return None
+    return session.info.setdefault('cubo_asistencia', [])
+
+
+def guardar_en_sesion(session, escuela_id, fecha, fila):
+    """Aplica ``fila`` (``fila_de``) a los cubos cuando ``session`` confirme;
+    para asistencias escritas con Core, que no disparan los eventos."""
+    session.info.setdefault('cubo_asistencia', []).append(('guardar', escuela_id, fecha, fila))
+
+
+@event.listens_for(Asistencia, 'after_insert')
+@event.listens_for(Asistencia, 'after_update')
+def _registrar_cambio(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        guardar_en_sesion(session, target.escuela_id, target.fecha, fila_de(
+            target.id, target.docente_id, target.fecha, target.jornada,
+            target.hora_entrada, target.hora_salida, target.estado
+        ))
+
+
+@event.listens_for(Asistencia, 'after_delete')
+def _registrar_eliminacion(mapper, connection, target):
+    pendientes = _pendientes(target)
+    if pendientes is not None:
+        pendientes.append(('eliminar', target.escuela_id, target.fecha, target.id))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _al_ejecutar(estado):
+    # UPDATE/DELETE masivos no disparan los eventos de Asistencia: sus
+    # cambios no se pueden aplicar a los cubos, que se reconstruirán.
+    # En las sentencias ORM ``table`` es una copia anotada de la tabla: se
+    # compara por nombre, como en versiones.py
+    if not (estado.is_update or estado.is_delete):
+        return
+    tabla = getattr(estado.statement, 'table', None)
+    if tabla is not None and tabla.name == Asistencia.__tablename__:
+        estado.session.info['cubo_asistencia_incompleto'] = True
+
+
+@al_incrementar
+def _aplicar_cambios(session, versiones):
+    pendientes = session.info.pop('cubo_asistencia', None) or []
+    incompleto = session.info.pop('cubo_asistencia_incompleto', False)
+    nueva = versiones.get(Asistencia.__tablename__)
+    if not _cubos:
+        return
+    mes_inicio = current_app.config.get('ANIO_LECTIVO_MES_INICIO', 9)
+    with _lock:
+        for operacion, escuela, fecha, dato in pendientes:
+            anio = anio_lectivo_de(fecha, mes_inicio)
+            if operacion == 'invalidar':
+                for clave in [c for c in _cubos if c[0] == anio]:
+                    del _cubos[clave]
+                continue
+            # El cubo de la escuela del registro y el de todas las escuelas
+            for clave in ((anio, escuela), (anio, None)):
+                cubo = _cubos.get(clave)
+                if cubo is None:
+                    continue  # se construirá completo cuando se consulte
+                if operacion == 'guardar':
+                    cubo.guardar(dato)
+                else:
+                    cubo.eliminar(dato)
+
+        # Si nadie más cambió asistencias desde que se construyó el cubo
+        # (versión anterior a la de este commit), ya tiene todos los datos
+        if nueva is not None and not incompleto:
+            for cubo in _cubos.values():
+                if cubo.version == nueva - 1:
+                    cubo.version = nueva
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _descartar_cambios(session, previous_transaction):
+    session.info.pop('cubo_asistencia', None)
+    session.info.pop('cubo_asistencia_incompleto', None)
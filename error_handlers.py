@@ -1,33 +1,167 @@
+import atexit
+import copy
+import json
 import logging
-import traceback
+import queue
+import threading
+import time
 from functools import wraps
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from flask import render_template, request, flash, redirect, url_for, jsonify
 from flask_login import current_user
+from extensiones import db
 from datetime import datetime
 import os
 
+# Listener activo (uno por proceso)
+_listener = None
+
+
+class FormateadorJSON(logging.Formatter):
+    """Formatea cada registro como una línea JSON.
+
+    Se ejecuta en el hilo del ``QueueListener``: el armado del JSON y la
+    escritura ocurren ahí y no en el hilo de la petición.
+    """
+
+    def format(self, record):
+        datos = {
+            'timestamp': datetime.utcfromtimestamp(record.created).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        contexto = getattr(record, 'contexto', None)
+        if contexto:
+            datos['contexto'] = contexto
+        suprimidos = getattr(record, 'suprimidos', 0)
+        if suprimidos:
+            datos['suprimidos'] = suprimidos
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            datos['traceback'] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class ColaHandler(QueueHandler):
+    """QueueHandler que encola el registro con el mensaje ya resuelto.
+
+    Como ``QueueHandler.prepare``, el mensaje (``msg % args``) y el
+    traceback se resuelven en el hilo que registra: los argumentos pueden
+    cambiar o pertenecer a una sesión ya cerrada cuando el listener los lea,
+    y el traceback retiene los frames. A diferencia de la versión estándar
+    no se aplica el formateador; el JSON se arma en el listener.
+    """
+
+    _formateador = logging.Formatter()
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self._formateador.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+class FiltroMuestreo(logging.Filter):
+    """Limita los errores repetidos a ``maximo`` por ``ventana`` segundos.
+
+    Los registros descartados se cuentan y el total se informa en el
+    primer registro de la ventana siguiente (campo ``suprimidos``).
+    """
+
+    MAX_CLAVES = 1000
+
+    def __init__(self, ventana=60, maximo=5):
+        super().__init__()
+        self.ventana = ventana
+        self.maximo = maximo
+        self._contadores = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < logging.ERROR or self.maximo <= 0:
+            return True
+
+        clave = (record.name, getattr(record, 'clave_muestreo', None) or record.msg)
+        ahora = time.monotonic()
+        with self._lock:
+            estado = self._contadores.get(clave)
+            if estado is None or ahora - estado[0] > self.ventana:
+                if len(self._contadores) >= self.MAX_CLAVES:
+                    self._contadores.clear()
+                if estado is not None and estado[2]:
+                    record.suprimidos = estado[2]
+                self._contadores[clave] = [ahora, 1, 0]
+                return True
+
+            estado[1] += 1
+            if estado[1] <= self.maximo:
+                return True
+            estado[2] += 1
+            return False
+
+
+@atexit.register
+def _detener_listener():
+    """Detiene el listener activo y escribe lo que quede en la cola."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
 # Configurar logging
 def setup_logging(app):
-    """Configura el sistema de logging"""
+    """Configura el sistema de logging
+
+    Los handlers de archivo y consola corren en un ``QueueListener``; el
+    hilo de la petición solo encola el registro.
+    """
+    global _listener
+
     if not app.debug:
         # Crear directorio de logs si no existe
         log_dir = os.path.join(os.path.dirname(app.instance_path), 'logs')
         os.makedirs(log_dir, exist_ok=True)
-        
-        # Configurar archivo de log
+
+        # Configurar archivo de log (JSON por línea, rotado por tamaño)
         log_file = os.path.join(log_dir, 'app.log')
-        
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s %(levelname)s %(name)s %(message)s',
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler()
-            ]
+        archivo = RotatingFileHandler(
+            log_file,
+            maxBytes=app.config.get('LOG_MAX_BYTES', 5 * 1024 * 1024),
+            backupCount=app.config.get('LOG_BACKUP_COUNT', 5),
+            encoding='utf-8'
         )
-        
+        archivo.setFormatter(FormateadorJSON())
+
+        consola = logging.StreamHandler()
+        consola.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+
+        cola = queue.SimpleQueue()
+        manejador = ColaHandler(cola)
+        manejador.addFilter(FiltroMuestreo(
+            ventana=app.config.get('LOG_MUESTREO_VENTANA', 60),
+            maximo=app.config.get('LOG_MUESTREO_MAXIMO', 5)
+        ))
+
+        _detener_listener()
+        _listener = QueueListener(cola, archivo, consola, respect_handler_level=True)
+        _listener.start()
+
+        nivel = getattr(logging, str(app.config.get('LOG_LEVEL', 'INFO')).upper(), logging.INFO)
+        raiz = logging.getLogger()
+        for handler in [h for h in raiz.handlers if isinstance(h, ColaHandler)]:
+            raiz.removeHandler(handler)
+        raiz.addHandler(manejador)
+        raiz.setLevel(nivel)
+
         # Configurar logger específico para la aplicación
-        app.logger.setLevel(logging.INFO)
+        app.logger.setLevel(nivel)
         app.logger.info('Aplicación iniciada')
 
 def log_error(error, request_data=None):
@@ -38,14 +172,19 @@ def log_error(error, request_data=None):
         'timestamp': datetime.utcnow().isoformat(),
         'error': str(error),
         'type': type(error).__name__,
-        'traceback': traceback.format_exc(),
         'user': current_user.username if current_user.is_authenticated else 'anonymous',
         'url': request.url if request else None,
         'method': request.method if request else None,
         'ip': request.remote_addr if request else None
     }
-    
-    logger.error(f"Error occurred: {error_info}")
+
+    # El traceback se formatea en el hilo del listener (exc_info)
+    exc_info = (type(error), error, error.__traceback__) if getattr(error, '__traceback__', None) else None
+    logger.error(
+        "Error occurred: %s: %s", error_info['type'], error_info['error'],
+        exc_info=exc_info,
+        extra={'contexto': error_info, 'clave_muestreo': (error_info['type'], error_info['error'][:200])}
+    )
     return error_info
 
 def handle_errors(f):
@@ -165,17 +304,31 @@ def register_error_handlers(app):
     def bad_request_error(error):
         return render_template('errors/400.html'), 400
 
-def log_user_action(action, details=None):
-    """Registra acciones del usuario"""
+def log_user_action(action, details=None, entidad=None, entidad_id=None):
+    """Registra acciones del usuario
+
+    Además del log, la acción se encola en la tabla de auditoría (se
+    escribe en lotes desde un hilo de fondo, sin commit en la petición).
+    """
+    from auditoria import registrar_accion
+
     logger = logging.getLogger('user_actions')
-    
+    usuario = current_user.username if current_user.is_authenticated else 'anonymous'
+    ip = request.remote_addr if request else None
+
     action_info = {
         'timestamp': datetime.utcnow().isoformat(),
-        'user': current_user.username if current_user.is_authenticated else 'anonymous',
+        'user': usuario,
         'action': action,
+        'entidad': entidad,
+        'entidad_id': entidad_id,
         'details': details,
-        'ip': request.remote_addr if request else None,
+        'ip': ip,
         'url': request.url if request else None
     }
-    
-    logger.info(f"User action: {action_info}")
+
+    logger.info("User action: %s", action, extra={'contexto': action_info})
+    # Al iniciar sesión la petición aún no tiene escuela: se usa la del usuario
+    escuela_id = current_user.escuela_id if current_user.is_authenticated else None
+    registrar_accion(usuario, action, entidad=entidad, entidad_id=entidad_id, detalles=details, ip=ip,
+                     escuela_id=escuela_id)
@@ -0,0 +1,176 @@
+"""
+Varias escuelas en una misma instalación.
+
+Cada petición autenticada trabaja con la escuela de su usuario
+(``g.escuela_id``) y todas las consultas ORM sobre los modelos de
+``MODELOS_POR_ESCUELA`` se filtran solas por ella (``with_loader_criteria``
+en el evento ``do_orm_execute``). Como ``escuela_id`` encabeza los índices
+compuestos, cada escuela lee solo su parte de la tabla.
+
+Las comprobaciones de unicidad global (cédula, correo, usuario) deben ver
+todas las escuelas: ``.execution_options(todas_las_escuelas=True)``.
+
+Sin escuela en el contexto no se filtra nada. Por eso los blueprints con
+datos de una escuela se registran con ``requiere_escuela``: piden sesión
+iniciada y rechazan al usuario sin escuela. Sin sesión solo se atienden
+el registro por QR (las vistas ``exentas``, que no leen datos de ninguna
+escuela) y las listas de los lectores (vistas ``de_lectores``), que
+trabajan con la escuela de ``?escuela=``. Un script puede fijar la escuela
+con::
+
+    with en_escuela(2):
+        ...
+
+Los horarios y los feriados también son de cada escuela. El registro por
+QR valida con los horarios de la escuela del docente; sin escuela en el
+contexto se usan los de la 1 (``escuela_o_defecto``).
+
+Los registros nuevos toman la escuela de su docente o, si no tienen, la
+del contexto (o la 1). Las escrituras con Core (``sql_portable``) deben
+incluir ``escuela_id`` en cada fila.
+
+Las cachés compartidas, los fragmentos de plantilla y los ETag usan
+``espacio_cache()`` para no mezclar datos de escuelas distintas.
+"""
+
+from contextlib import contextmanager
+
+from flask import abort, current_app, g, has_app_context, request
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.orm import Session, with_loader_criteria
+
+from app_simple import db
+from models.asistencia import Asistencia
+from models.contador_tardanza import ContadorTardanza
+from models.docente import Docente
+from models.escuela import Escuela
+from models.feriado import Feriado
+from models.horario import Horario
+from models.licencia import Licencia
+from models.usuario import Usuario
+
+ESCUELA_POR_DEFECTO = 1
+
+MODELOS_POR_ESCUELA = (Docente, Asistencia, Licencia, Usuario, ContadorTardanza, Horario, Feriado)
+
+
+def escuela_actual_id():
+    """Escuela de la petición o del bloque ``en_escuela`` (None = todas)."""
+    return g.get('escuela_id') if has_app_context() else None
+
+
+def escuela_o_defecto(escuela_id=None):
+    """``escuela_id``, o la escuela actual, o la escuela por defecto."""
+    if escuela_id is not None:
+        return escuela_id
+    return escuela_actual_id() or ESCUELA_POR_DEFECTO
+
+
+def escuela_actual():
+    """``Escuela`` de la petición, o la escuela por defecto."""
+    return db.session.get(Escuela, escuela_o_defecto())
+
+
+def espacio_cache():
+    """Prefijo de las claves de caché de la escuela actual ('' si no hay)."""
+    escuela = escuela_actual_id()
+    return '' if escuela is None else f'e{escuela}:'
+
+
+@contextmanager
+def en_escuela(escuela_id):
+    """Limita las consultas a ``escuela_id`` dentro del bloque."""
+    anterior = g.get('escuela_id')
+    g.escuela_id = escuela_id
+    try:
+        yield
+    finally:
+        g.escuela_id = anterior
+
+
+def nombre_escuela():
+    """Nombre para encabezados de reportes."""
+    escuela = escuela_actual()
+    return escuela.nombre if escuela else current_app.config.get('ESCUELA_NOMBRE', '')
+
+
+def escuela_del_lector():
+    """Escuela de ``?escuela=`` en las peticiones de los lectores (la 1 si no se indica)."""
+    valor = request.args.get('escuela')
+    if valor is None:
+        return ESCUELA_POR_DEFECTO  # lectores configurados antes de haber varias escuelas
+    if not valor.isdigit():
+        abort(400)
+    escuela = db.session.get(Escuela, int(valor))
+    if escuela is None or not escuela.activa:
+        abort(404)
+    return escuela.id
+
+
+def requiere_escuela(blueprint, exentas=(), de_lectores=()):
+    """Toda vista de ``blueprint`` exige sesión y escuela, salvo las ``exentas``.
+
+    Sin sesión, las vistas ``de_lectores`` usan la escuela de ``?escuela=``.
+    """
+    exentas = {f'{blueprint.name}.{vista}' for vista in exentas}
+    de_lectores = {f'{blueprint.name}.{vista}' for vista in de_lectores}
+
+    @blueprint.before_request
+    def _exigir_escuela():
+        if request.endpoint in exentas:
+            return None
+        if not current_user.is_authenticated:
+            if request.endpoint in de_lectores:
+                g.escuela_id = escuela_del_lector()
+                return None
+            return current_app.login_manager.unauthorized()
+        if g.get('escuela_id') is None:
+            abort(403)  # sin escuela se verían los datos de todas
+        return None
+
+
+def _criterio(escuela_id):
+    return [
+        with_loader_criteria(modelo, lambda cls: cls.escuela_id == escuela_id, include_aliases=True)
+        for modelo in MODELOS_POR_ESCUELA
+    ]
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _filtrar_por_escuela(estado):
+    if estado.is_column_load or estado.is_relationship_load:
+        return  # el objeto padre ya se filtró
+    if not (estado.is_select or estado.is_update or estado.is_delete):
+        return
+    if estado.execution_options.get('todas_las_escuelas'):
+        return
+    escuela = escuela_actual_id()
+    if escuela is not None:
+        estado.statement = estado.statement.options(*_criterio(escuela))
+
+
+@event.listens_for(Session, 'before_flush')
+def _asignar_escuela(session, flush_context, instances):
+    with session.no_autoflush:
+        for objeto in session.new:
+            if not isinstance(objeto, MODELOS_POR_ESCUELA) or objeto.escuela_id is not None:
+                continue
+            docente_id = getattr(objeto, 'docente_id', None)
+            docente = session.get(Docente, docente_id) if docente_id is not None else None
+            objeto.escuela_id = (
+                docente.escuela_id if docente is not None
+                else escuela_actual_id() or ESCUELA_POR_DEFECTO
+            )
+
+
+def init_app(app):
+    """Fija la escuela de cada petición según el usuario autenticado."""
+    from cache_compartido import cache
+    cache.espacio = espacio_cache
+
+    @app.before_request
+    def _fijar_escuela():
+        g.escuela_id = None  # mientras se carga el usuario
+        if current_user.is_authenticated:
+            g.escuela_id = current_user.escuela_id
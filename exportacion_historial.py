@@ -0,0 +1,221 @@
+"""
+Exportación del historial de asistencias para análisis externo.
+
+Las asistencias (con los datos del docente y la licencia aprobada que cubre
+el día, si la hay) se leen por lotes con ``yield_per`` y se escriben en
+archivos particionados por año y mes::
+
+    destino/anio=2024/mes=03/asistencias.parquet
+
+Con pyarrow instalado se genera Parquet (una row group por lote); sin él se
+genera CSV comprimido (``asistencias.csv.gz``) con las mismas columnas. La
+consulta se ordena por fecha, así que solo hay un archivo abierto a la vez
+y la memoria depende del tamaño del lote, no del rango exportado.
+"""
+
+import csv
+import gzip
+import logging
+import os
+
+from collections import namedtuple
+from functools import lru_cache
+
+from flask import current_app
+from sqlalchemy import select
+
+from app_simple import db
+from archivo_historico import anios_archivados, asistencias_historico
+from escuelas import escuela_actual_id
+from models.asistencia import Asistencia
+from models.docente import Docente
+from models.licencia import Licencia
+from utils import segundos_del_dia
+
+logger = logging.getLogger(__name__)
+
+LOTE_EXPORTACION = 10000
+
+FORMATOS = ('parquet', 'csv')
+
+# Columnas exportadas; las horas van en segundos desde la medianoche
+COLUMNAS = (
+    'id', 'fecha', 'docente_id', 'docente', 'cedula', 'tipo', 'jornada_docente',
+    'jornada', 'estado', 'modo', 'entrada_seg', 'salida_seg',
+    'licencia_id', 'licencia_motivo',
+)
+
+
+@lru_cache(maxsize=None)
+def _pyarrow():
+    """(pa, pq, esquema), importados al primer uso, o None sin pyarrow.
+
+    pyarrow tarda en importarse y solo lo usa esta exportación: no se carga
+    al arrancar la aplicación.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:  # pragma: no cover - dependencia opcional
+        return None
+
+    esquema = pa.schema([
+        ('id', pa.int32()),
+        ('fecha', pa.date32()),
+        ('docente_id', pa.int32()),
+        ('docente', pa.string()),
+        ('cedula', pa.string()),
+        ('tipo', pa.string()),
+        ('jornada_docente', pa.string()),
+        ('jornada', pa.string()),
+        ('estado', pa.string()),
+        ('modo', pa.string()),
+        ('entrada_seg', pa.int32()),
+        ('salida_seg', pa.int32()),
+        ('licencia_id', pa.int32()),
+        ('licencia_motivo', pa.string()),
+    ])
+    return pa, pq, esquema
+
+ResultadoExportacion = namedtuple('ResultadoExportacion', 'formato archivos filas')
+
+
+def formato_disponible(formato=None):
+    """Formato efectivo: Parquet solo si pyarrow está instalado."""
+    formato = formato or 'parquet'
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato}")
+    if formato == 'parquet' and _pyarrow() is None:
+        logger.warning("pyarrow no está instalado; se exporta CSV comprimido")
+        return 'csv'
+    return formato
+
+
+def _fuente():
+    app = current_app
+    if app.config.get('ARCHIVO_HISTORICO_ACTIVO') and anios_archivados(app):
+        return asistencias_historico
+    return Asistencia.__table__
+
+
+def consulta_historial(desde=None, hasta=None):
+    """SELECT de asistencias + docente + licencia aprobada en [desde, hasta)."""
+    a = _fuente()
+    d = Docente.__table__
+    lic = Licencia.__table__
+
+    # Una sola licencia por registro aunque haya solapadas
+    licencia_del_dia = select(lic.c.id).where(
+        lic.c.docente_id == a.c.docente_id,
+        lic.c.estado == 'aprobada',
+        lic.c.fecha_inicio <= a.c.fecha,
+        lic.c.fecha_fin >= a.c.fecha
+    ).order_by(lic.c.id).limit(1).correlate(a).scalar_subquery()
+
+    consulta = select(
+        a.c.id, a.c.fecha, a.c.docente_id, d.c.nombre, d.c.cedula, d.c.tipo, d.c.jornada,
+        a.c.jornada, a.c.estado, a.c.modo, a.c.hora_entrada, a.c.hora_salida,
+        lic.c.id, lic.c.motivo,
+    ).select_from(
+        a.join(d, d.c.id == a.c.docente_id).outerjoin(lic, lic.c.id == licencia_del_dia)
+    )
+    # Consulta Core: el filtro por escuela no se aplica solo (ver escuelas.py)
+    escuela = escuela_actual_id()
+    if escuela is not None:
+        consulta = consulta.where(a.c.escuela_id == escuela)
+    if desde:
+        consulta = consulta.where(a.c.fecha >= desde)
+    if hasta:
+        consulta = consulta.where(a.c.fecha < hasta)
+    return consulta.order_by(a.c.fecha, a.c.id)
+
+
+def _fila(registro):
+    fila = list(registro)
+    fila[10] = segundos_del_dia(fila[10])
+    fila[11] = segundos_del_dia(fila[11])
+    return fila
+
+
+class _EscritorParquet:
+    extension = 'parquet'
+
+    def __init__(self, ruta):
+        self._pa, pq, self._esquema = _pyarrow()
+        self._writer = pq.ParquetWriter(ruta, self._esquema, compression='snappy')
+
+    def escribir(self, filas):
+        pa, esquema = self._pa, self._esquema
+        columnas = zip(*filas)
+        arreglos = [pa.array(valores, type=campo.type) for valores, campo in zip(columnas, esquema)]
+        self._writer.write_table(pa.Table.from_arrays(arreglos, schema=esquema))
+
+    def cerrar(self):
+        self._writer.close()
+
+
+class _EscritorCSV:
+    extension = 'csv.gz'
+
+    def __init__(self, ruta):
+        self._archivo = gzip.open(ruta, 'wt', newline='', encoding='utf-8')
+        self._csv = csv.writer(self._archivo)
+        self._csv.writerow(COLUMNAS)
+
+    def escribir(self, filas):
+        self._csv.writerows(filas)
+
+    def cerrar(self):
+        self._archivo.close()
+
+
+ESCRITORES = {'parquet': _EscritorParquet, 'csv': _EscritorCSV}
+
+
+def exportar_historial(destino, desde=None, hasta=None, formato=None, lote=LOTE_EXPORTACION):
+    """Exporta las asistencias de [desde, hasta) particionadas por año/mes.
+
+    Returns:
+        ResultadoExportacion: formato usado, rutas generadas y filas escritas
+    """
+    formato = formato_disponible(formato)
+    escritor_cls = ESCRITORES[formato]
+    archivos = []
+    total = 0
+
+    particion = None
+    escritor = None
+    pendientes = []
+
+    def vaciar():
+        if pendientes:
+            escritor.escribir(pendientes)
+            pendientes.clear()
+
+    resultado = db.session.execute(consulta_historial(desde, hasta).execution_options(yield_per=lote))
+    try:
+        for registros in resultado.partitions():
+            for registro in registros:
+                fecha = registro[1]
+                clave = (fecha.year, fecha.month)
+                if clave != particion:
+                    if escritor is not None:
+                        vaciar()
+                        escritor.cerrar()
+                    particion = clave
+                    carpeta = os.path.join(destino, f'anio={fecha.year}', f'mes={fecha.month:02d}')
+                    os.makedirs(carpeta, exist_ok=True)
+                    ruta = os.path.join(carpeta, f'asistencias.{escritor_cls.extension}')
+                    escritor = escritor_cls(ruta)
+                    archivos.append(ruta)
+                pendientes.append(_fila(registro))
+                total += 1
+            vaciar()
+    finally:
+        resultado.close()
+        if escritor is not None:
+            vaciar()
+            escritor.cerrar()
+
+    logger.info("Historial exportado (%s): %s filas en %s archivos", formato, total, len(archivos))
+    return ResultadoExportacion(formato, archivos, total)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Script para exportar el historial de asistencias (Parquet o CSV comprimido)
+
+Uso:
+    python exportar_historial.py exportacion/                      # todo el historial
+    python exportar_historial.py exportacion/ --desde 2023-09-01 --hasta 2024-09-01
+    python exportar_historial.py exportacion/ --formato csv
+"""
+
+import argparse
+import os
+import sys
+
+from datetime import datetime
+
+# Agregar el directorio del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app_simple import create_app
+from exportacion_historial import exportar_historial, FORMATOS, LOTE_EXPORTACION
+
+
+def _fecha(valor):
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exporta el historial de asistencias particionado por año y mes')
+    parser.add_argument('destino', help='Carpeta de salida')
+    parser.add_argument('--desde', type=_fecha, help='Primera fecha incluida (YYYY-MM-DD)')
+    parser.add_argument('--hasta', type=_fecha, help='Fecha final, excluida (YYYY-MM-DD)')
+    parser.add_argument('--formato', choices=FORMATOS, default='parquet')
+    parser.add_argument('--lote', type=int, default=LOTE_EXPORTACION, help='Filas leídas por lote')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        resultado = exportar_historial(args.destino, args.desde, args.hasta, args.formato, args.lote)
+
+    print(f"Exportadas {resultado.filas} filas en {len(resultado.archivos)} archivos ({resultado.formato})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+Extensiones de la aplicación y su registro.
+
+Aquí viven las únicas instancias de ``db``, ``login_manager`` y ``csrf``;
+``app_simple`` (la fábrica) y ``app`` las reexportan. Cada extensión se
+registra con ``@extension('nombre')`` y ``init_extensiones(app)`` las
+inicializa en orden de registro, salvo las listadas en
+``EXTENSIONES_DESACTIVADAS`` (por ejemplo, un script puede omitir la
+auditoría o la instrumentación).
+
+La base de datos se configura siempre igual, sea cual sea el punto de
+entrada: opciones del engine (pool, pre-ping, caché de sentencias) desde
+``Config`` y PRAGMAs de SQLite en cada conexión nueva.
+"""
+
+import logging
+import time as reloj
+
+from collections import OrderedDict
+
+from flask import g, has_app_context
+from flask_login import LoginManager
+from flask_sqlalchemy import SQLAlchemy
+from flask_wtf.csrf import CSRFProtect
+from sqlalchemy import event
+
+db = SQLAlchemy()
+login_manager = LoginManager()
+csrf = CSRFProtect()
+
+EXTENSIONES = OrderedDict()
+
+logger = logging.getLogger('sql')
+
+
+def extension(nombre):
+    """Registra la función ``init(app)`` de una extensión."""
+    def registrar(init):
+        EXTENSIONES[nombre] = init
+        return init
+    return registrar
+
+
+def init_extensiones(app):
+    desactivadas = set(app.config.get('EXTENSIONES_DESACTIVADAS') or ())
+    for nombre, init in EXTENSIONES.items():
+        if nombre not in desactivadas:
+            init(app)
+
+
+def opciones_engine(config):
+    """Opciones de ``create_engine`` según el motor configurado."""
+    opciones = {'query_cache_size': config.get('SQLALCHEMY_CACHE_SENTENCIAS', 500)}
+    if not config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        opciones.update(
+            pool_size=config.get('SQLALCHEMY_POOL_SIZE', 5),
+            max_overflow=config.get('SQLALCHEMY_MAX_OVERFLOW', 10),
+            pool_recycle=config.get('SQLALCHEMY_POOL_RECYCLE', 1800),
+            pool_pre_ping=config.get('SQLALCHEMY_POOL_PRE_PING', True),
+        )
+    # Lo definido explícitamente en SQLALCHEMY_ENGINE_OPTIONS tiene prioridad
+    opciones.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    return opciones
+
+
+@extension('db')
+def _init_db(app):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opciones_engine(app.config)
+    db.init_app(app)
+
+    with app.app_context():
+        engine = db.engine
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    if engine.dialect.name == 'sqlite' and pragmas:
+        @event.listens_for(engine, 'connect')
+        def _pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for nombre, valor in pragmas.items():
+                cursor.execute(f'PRAGMA {nombre}={valor}')
+            cursor.close()
+
+
+@extension('archivo_historico')
+def _init_archivo_historico(app):
+    # Adjuntar años lectivos archivados (si está activo)
+    from archivo_historico import init_app
+    init_app(app, db)
+
+
+@extension('login')
+def _init_login(app):
+    login_manager.init_app(app)
+    login_manager.login_view = 'auth.login'
+    login_manager.login_message = 'Por favor inicia sesión para acceder a esta página.'
+    login_manager.login_message_category = 'info'
+
+    # Usuarios autenticados en caché: sin consulta SQL en cada petición
+    from cache_usuarios import init_app, cargar_usuario
+    init_app(app)
+    login_manager.user_loader(cargar_usuario)
+
+
+@extension('csrf')
+def _init_csrf(app):
+    csrf.init_app(app)
+
+
+@extension('escuelas')
+def _init_escuelas(app):
+    # Escuela de cada petición y filtro automático de las consultas
+    from escuelas import init_app
+    init_app(app)
+
+
+@extension('cache')
+def _init_cache(app):
+    # Caché compartida entre workers (memoria del proceso + SQLite en instance/)
+    from cache_compartido import init_app
+    init_app(app)
+
+
+@extension('auditoria')
+def _init_auditoria(app):
+    # Auditoría de acciones (buffer en memoria, escritura por lotes)
+    from auditoria import init_app
+    init_app(app, db)
+
+
+@extension('plantillas')
+def _init_plantillas(app):
+    # Bytecode de plantillas en disco, caché de fragmentos y compresión
+    from plantillas import init_app
+    init_app(app)
+
+
+@extension('instrumentacion')
+def _init_instrumentacion(app):
+    """Registra las sentencias lentas y agrega Server-Timing a las respuestas."""
+    if not app.config.get('INSTRUMENTACION_ACTIVA'):
+        return
+    lenta = app.config.get('SQL_LENTA_MS', 200) / 1000
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('inicio_sql', []).append(reloj.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        duracion = reloj.perf_counter() - conn.info['inicio_sql'].pop()
+        if has_app_context():
+            g.tiempo_sql = g.get('tiempo_sql', 0) + duracion
+            g.sentencias_sql = g.get('sentencias_sql', 0) + 1
+        if duracion >= lenta:
+            logger.warning("SQL lenta (%.0f ms): %s", duracion * 1000, statement)
+
+    @app.before_request
+    def _iniciar():
+        g.inicio_peticion = reloj.perf_counter()
+
+    @app.after_request
+    def _server_timing(response):
+        total = (reloj.perf_counter() - g.get('inicio_peticion', reloj.perf_counter())) * 1000
+        response.headers['Server-Timing'] = (
+            f'app;dur={total:.1f}, sql;dur={g.get("tiempo_sql", 0) * 1000:.1f};desc="{g.get("sentencias_sql", 0)} sentencias"'
+        )
+        return response
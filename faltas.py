@@ -0,0 +1,149 @@
+"""
+Faltas por rango de fechas.
+
+Una falta es un turno esperado (docente activo × día hábil × jornada) sin
+registro de asistencia y sin licencia aprobada que lo cubra::
+
+    faltas = roster esperado − asistencias − licencias
+
+El roster del rango se arma de una vez como arreglos de NumPy y las dos
+restas son anti-joins vectorizados (``np.isin`` sobre claves enteras), así
+que el costo no depende de cuántos días tenga el rango sino del número de
+turnos esperados.
+"""
+
+from collections import namedtuple
+from datetime import date, timedelta
+
+import numpy as np
+
+from app_simple import db
+from calendario import dias_laborables, ultimos_dias_laborables
+from cubo_asistencia import CODIGOS_ESTADO, seleccionar
+from incidencias import CODIGOS_JORNADA, JORNADAS
+from models.docente import Docente
+from models.licencia import Licencia
+
+# Turnos que se esperan cada día hábil según la jornada del docente
+TURNOS = {
+    'matutina': ('matutina',),
+    'vespertina': ('vespertina',),
+    'completa': ('completa',),
+    'doble': ('matutina', 'vespertina'),
+}
+
+Faltas = namedtuple('Faltas', 'docente fecha jornada por_dia por_docente')
+
+
+def _clave(docente, fecha, jornada=None):
+    # docente | fecha ordinal | jornada en un entero de 64 bits
+    clave = (np.asarray(docente, dtype=np.int64) << 32) | (np.asarray(fecha, dtype=np.int64) << 4)
+    if jornada is not None:
+        clave |= np.asarray(jornada, dtype=np.int64)
+    return clave
+
+
+def roster(docentes_ids=None, jornada=None):
+    """Turnos esperados por día: arreglos (docente, jornada, día de alta)."""
+    query = db.session.query(Docente.id, Docente.jornada, Docente.fecha_creacion).filter(Docente.activo == True)
+    if docentes_ids:
+        query = query.filter(Docente.id.in_(docentes_ids))
+    if jornada:
+        query = query.filter(Docente.jornada == jornada)
+
+    ids, codigos, altas = [], [], []
+    for docente_id, jornada_docente, creado in query:
+        alta = creado.date().toordinal() if creado else 0
+        for turno in TURNOS.get(jornada_docente, (jornada_docente,)):
+            if turno in CODIGOS_JORNADA:
+                ids.append(docente_id)
+                codigos.append(CODIGOS_JORNADA[turno])
+                altas.append(alta)
+    return (np.array(ids, dtype=np.int32), np.array(codigos, dtype=np.int8),
+            np.array(altas, dtype=np.int32))
+
+
+def _licencias(desde, hasta, ids):
+    """Claves (docente, día) cubiertas por licencias aprobadas en [desde, hasta)."""
+    query = db.session.query(Licencia.docente_id, Licencia.fecha_inicio, Licencia.fecha_fin).filter(
+        Licencia.estado == 'aprobada',
+        Licencia.fecha_inicio < hasta,
+        Licencia.fecha_fin >= desde,
+        Licencia.docente_id.in_(np.unique(ids).tolist())
+    )
+    inicio, fin = desde.toordinal(), hasta.toordinal()
+    partes = [
+        _clave(docente_id, np.arange(max(ini.toordinal(), inicio), min(fin_lic.toordinal() + 1, fin)))
+        for docente_id, ini, fin_lic in query
+    ]
+    return np.concatenate(partes) if partes else np.zeros(0, dtype=np.int64)
+
+
+def calcular_faltas(desde, hasta, docentes_ids=None, jornada=None):
+    """Faltas en [desde, hasta) por día, por docente y en detalle.
+
+    Returns:
+        Faltas: arreglos alineados ``docente``, ``fecha`` (ordinal) y
+        ``jornada`` (código) de cada falta, más ``por_dia`` {date: n} y
+        ``por_docente`` {docente_id: n}
+    """
+    dias = dias_laborables(desde, hasta)
+    ids, codigos, altas = roster(docentes_ids, jornada)
+    if not len(dias) or not len(ids):
+        vacio = np.zeros(0, dtype=np.int32)
+        return Faltas(vacio, vacio, vacio.astype(np.int8), {}, {})
+
+    # Roster esperado: cada turno en cada día hábil (desde su alta)
+    docente = np.tile(ids, len(dias))
+    jornada_turno = np.tile(codigos, len(dias))
+    fecha = np.repeat(dias, len(ids))
+    falta = fecha >= np.tile(altas, len(dias))
+
+    # − asistencias: cualquier registro del turno que no esté marcado ausente
+    registros = seleccionar(desde, hasta)
+    registros = registros[registros['estado'] != CODIGOS_ESTADO['ausente']]
+    falta &= ~np.isin(
+        _clave(docente, fecha, jornada_turno),
+        _clave(registros['docente'], registros['fecha'], registros['jornada'])
+    )
+
+    # − licencias aprobadas (cubren todos los turnos del día)
+    falta &= ~np.isin(_clave(docente, fecha), _licencias(desde, hasta, ids))
+
+    docente, fecha, jornada_turno = docente[falta], fecha[falta], jornada_turno[falta]
+    dias_falta, por_dia = np.unique(fecha, return_counts=True)
+    docentes_falta, por_docente = np.unique(docente, return_counts=True)
+    return Faltas(
+        docente, fecha, jornada_turno,
+        {date.fromordinal(int(d)): int(n) for d, n in zip(dias_falta, por_dia)},
+        {int(d): int(n) for d, n in zip(docentes_falta, por_docente)},
+    )
+
+
+def nombre_jornada(codigo):
+    return JORNADAS[codigo] if 0 <= codigo < len(JORNADAS) else None
+
+
+def ranking_recientes(hoy, dias=5, limite=5):
+    """Docentes con más faltas en los últimos ``dias`` hábiles (hasta ``hoy``).
+
+    Es ``calcular_faltas`` sobre esos días: el mismo roster, con la misma
+    fecha de alta y las mismas exclusiones que el reporte de faltas.
+
+    Returns:
+        list: tuplas (nombre, faltas) de mayor a menor
+    """
+    ordinales = ultimos_dias_laborables(hoy + timedelta(days=1), dias)
+    if not len(ordinales):
+        return []
+
+    por_docente = calcular_faltas(date.fromordinal(int(ordinales[0])), hoy + timedelta(days=1)).por_docente
+    if not por_docente:
+        return []
+
+    nombres = dict(db.session.query(Docente.id, Docente.nombre).filter(Docente.id.in_(list(por_docente))))
+    ranking = sorted(
+        ((nombres[docente_id], faltas) for docente_id, faltas in por_docente.items() if docente_id in nombres),
+        key=lambda fila: (-fila[1], fila[0])
+    )
+    return ranking[:limite]
@@ -0,0 +1,225 @@
+"""
+Ventanas de registro de entrada y salida.
+
+Los horarios se leen de la tabla ``horarios`` una vez por worker y se
+guardan como una tabla inmutable de segundos desde la medianoche, de modo
+que validar un registro es una búsqueda en un diccionario. Se recargan
+cuando cambia la versión de la tabla ``horarios`` (``versiones``), sea cual
+sea el worker que la modificó. Cada escuela tiene su tabla; sin escuela se
+usa la de la petición (``escuelas.escuela_o_defecto``). Las jornadas que
+no estén en la tabla usan los horarios por defecto.
+"""
+
+import threading
+
+from collections import namedtuple
+from datetime import time
+
+from sqlalchemy import func
+
+from app_simple import db
+from escuelas import escuela_o_defecto
+from models.horario import Horario
+from utils import segundos_del_dia
+from versiones import version_de
+
+TIPOS_REGISTRO = ('entrada', 'salida')
+
+# Horarios usados para las jornadas que no están en la tabla
+HORARIOS_POR_DEFECTO = {
+    'matutina': {
+        'entrada_inicio': time(7, 0), 'entrada_fin': time(8, 30), 'entrada_limite': time(12, 0),
+        'salida_inicio': time(12, 30), 'salida_fin': time(13, 30), 'salida_limite': time(14, 0),
+    },
+    'vespertina': {
+        'entrada_inicio': time(13, 0), 'entrada_fin': time(14, 30), 'entrada_limite': time(17, 0),
+        'salida_inicio': time(17, 30), 'salida_fin': time(18, 30), 'salida_limite': time(19, 0),
+    },
+    'completa': {
+        # 8 horas: salida de 15:00 a 16:00
+        'entrada_inicio': time(7, 0), 'entrada_fin': time(8, 30), 'entrada_limite': time(12, 0),
+        'salida_inicio': time(15, 0), 'salida_fin': time(16, 0), 'salida_limite': time(17, 0),
+    },
+}
+
+# Jornadas y tipos de personal que admite la tabla ``horarios``
+JORNADAS = tuple(HORARIOS_POR_DEFECTO)
+TIPOS_PERSONAL = ('DOCENTE', 'ADMINISTRATIVO', 'CONSERJE', 'DECE')
+
+# Ventana precalculada: límites en segundos y el texto "HH:MM - HH:MM"
+Ventana = namedtuple('Ventana', 'inicio fin limite rango')
+
+
+class TablaHorarios:
+    """Instantánea inmutable de los horarios para búsquedas O(1)."""
+
+    def __init__(self, version, filas):
+        self.version = version
+        self._ventanas = {}
+        self.jornadas = set()
+        for fila in filas:
+            self.jornadas.add(fila['jornada'])
+            for registro in TIPOS_REGISTRO:
+                inicio = fila[f'{registro}_inicio']
+                fin = fila[f'{registro}_fin']
+                self._ventanas[(fila['jornada'], fila.get('tipo'), registro)] = Ventana(
+                    segundos_del_dia(inicio),
+                    segundos_del_dia(fin),
+                    segundos_del_dia(fila[f'{registro}_limite']),
+                    f"{inicio.strftime('%H:%M')} - {fin.strftime('%H:%M')}"
+                )
+
+    def ventana(self, jornada, tipo_registro, tipo=None):
+        """Ventana para el tipo de personal, o la general de la jornada."""
+        ventana = self._ventanas.get((jornada, tipo, tipo_registro))
+        if ventana is None and tipo is not None:
+            ventana = self._ventanas.get((jornada, None, tipo_registro))
+        return ventana
+
+    def validar(self, segundos, jornada, tipo_registro='entrada', tipo=None):
+        """Valida una hora expresada en segundos desde la medianoche.
+
+        Returns:
+            tuple: (es_valido, mensaje, es_tardio)
+        """
+        if jornada not in self.jornadas:
+            return False, "Jornada no válida", False
+
+        ventana = self.ventana(jornada, tipo_registro, tipo)
+        if ventana is None:
+            return False, f"Tipo de registro '{tipo_registro}' no válido", False
+
+        # Si está dentro del horario normal
+        if ventana.inicio <= segundos <= ventana.fin:
+            return True, "Horario válido", False
+
+        # Si es un registro tardío pero dentro del límite permitido
+        if segundos <= ventana.limite:
+            return True, f"⚠️ Registro tardío ({ventana.rango})", True
+
+        # Para jornada completa, permitir también horarios de jornada vespertina
+        if jornada == 'completa' and tipo_registro == 'entrada':
+            vespertina = self.ventana('vespertina', 'entrada', tipo)
+            if vespertina is not None and vespertina.inicio <= segundos <= vespertina.fin:
+                return True, "Horario válido (turno vespertino)", False
+
+        return False, f"❌ {tipo_registro.title()} fuera de horario permitido ({ventana.rango})", False
+
+
+_tablas = {}  # escuela -> TablaHorarios
+_lock = threading.Lock()
+
+
+def _cargar(version, escuela):
+    # Los horarios por defecto cubren las jornadas que no estén en la tabla
+    filas = {
+        (jornada, None): dict(ventanas, jornada=jornada, tipo=None)
+        for jornada, ventanas in HORARIOS_POR_DEFECTO.items()
+    }
+    consulta = Horario.query.filter_by(escuela_id=escuela).execution_options(todas_las_escuelas=True)
+    for h in consulta:
+        filas[(h.jornada, h.tipo)] = {
+            'jornada': h.jornada, 'tipo': h.tipo,
+            'entrada_inicio': h.entrada_inicio, 'entrada_fin': h.entrada_fin,
+            'entrada_limite': h.entrada_limite,
+            'salida_inicio': h.salida_inicio, 'salida_fin': h.salida_fin,
+            'salida_limite': h.salida_limite,
+        }
+    return TablaHorarios(version, filas.values())
+
+
+def obtener_tabla(escuela=None):
+    """Tabla de horarios vigente de la escuela (recargada si cambió su versión)."""
+    escuela = escuela_o_defecto(escuela)
+    actual = version_de('horarios')  # antes de leer los datos
+    tabla = _tablas.get(escuela)
+    if tabla is not None and tabla.version == actual:
+        return tabla
+
+    with _lock:
+        tabla = _tablas.get(escuela)
+        if tabla is None or tabla.version != actual:
+            tabla = _tablas[escuela] = _cargar(actual, escuela)
+        return tabla
+
+
+def invalidar():
+    """Fuerza la recarga en la próxima validación."""
+    _tablas.clear()
+
+
+def validar_horario(hora, jornada, tipo_registro='entrada', tipo=None, escuela=None):
+    """Valida un ``time`` contra la ventana de su jornada.
+
+    Returns:
+        tuple: (es_valido, mensaje, es_tardio)
+    """
+    return obtener_tabla(escuela).validar(segundos_del_dia(hora, fraccion=True), jornada, tipo_registro, tipo)
+
+
+def validar_lote(horas, jornadas, tipo_registro='entrada', tipos=None, escuela=None):
+    """Valida un lote de registros con una sola lectura de la tabla.
+
+    Args:
+        horas: secuencia de ``time``
+        jornadas: secuencia de jornadas (misma longitud)
+        tipos: secuencia de tipos de personal o None
+    Returns:
+        list: una tupla (es_valido, mensaje, es_tardio) por registro
+    """
+    tabla = obtener_tabla(escuela)
+    if tipos is None:
+        tipos = [None] * len(horas)
+    validar = tabla.validar
+    return [
+        validar(segundos_del_dia(hora, fraccion=True), jornada, tipo_registro, tipo)
+        for hora, jornada, tipo in zip(horas, jornadas, tipos)
+    ]
+
+
+def error_de_ventanas(ventanas):
+    """Mensaje de error si alguna ventana no cumple inicio < fin <= límite (None si todas lo cumplen)."""
+    for registro in TIPOS_REGISTRO:
+        inicio = ventanas[f'{registro}_inicio']
+        fin = ventanas[f'{registro}_fin']
+        limite = ventanas[f'{registro}_limite']
+        if not inicio < fin:
+            return f"La {registro} debe empezar antes de terminar"
+        if limite < fin:
+            return f"El límite de la {registro} no puede ser anterior a su fin"
+    return None
+
+
+def actualizar_horario(jornada, tipo=None, escuela=None, **ventanas):
+    """Crea o actualiza el horario de una jornada de la escuela y publica una nueva versión.
+
+    Raises:
+        ValueError: si la jornada, el tipo o las ventanas resultantes no son válidos
+    """
+    if jornada not in JORNADAS:
+        raise ValueError(f"Jornada no válida: {jornada}")
+    if tipo is not None and tipo not in TIPOS_PERSONAL:
+        raise ValueError(f"Tipo de personal no válido: {tipo}")
+
+    escuela = escuela_o_defecto(escuela)
+    horario = Horario.query.filter_by(escuela_id=escuela, jornada=jornada, tipo=tipo)\
+        .execution_options(todas_las_escuelas=True).first()
+    actuales = HORARIOS_POR_DEFECTO[jornada] if horario is None else {
+        campo: getattr(horario, campo) for campo in HORARIOS_POR_DEFECTO[jornada]
+    }
+    error = error_de_ventanas(dict(actuales, **ventanas))
+    if error:
+        raise ValueError(error)
+
+    if horario is None:
+        horario = Horario(escuela_id=escuela, jornada=jornada, tipo=tipo, **HORARIOS_POR_DEFECTO[jornada])
+        db.session.add(horario)
+
+    for campo, valor in ventanas.items():
+        setattr(horario, campo, valor)
+
+    maximo = db.session.query(func.max(Horario.version)).scalar() or 0
+    horario.version = maximo + 1
+    db.session.commit()
+    return horario
+
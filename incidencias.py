@@ -0,0 +1,110 @@
+"""
+Cálculo vectorizado de incidencias (atrasos, salidas tempranas y tiempo
+trabajado).
+
+Las horas se manejan como enteros de segundos desde la medianoche (``-1``
+cuando falta la marca) y las jornadas como códigos enteros, de modo que un
+reporte completo se resuelve con unas pocas operaciones de NumPy en lugar
+de varias llamadas a ``datetime.combine`` por registro.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from utils import segundos_del_dia
+
+SIN_HORA = -1
+
+# Código entero de cada jornada (las desconocidas usan SIN_JORNADA)
+JORNADAS = ('matutina', 'vespertina', 'completa', 'doble')
+CODIGOS_JORNADA = {jornada: codigo for codigo, jornada in enumerate(JORNADAS)}
+SIN_JORNADA = len(JORNADAS)
+
+# Horario de referencia por código (segundos); -1 = sin horario fijo
+_INICIO = np.array([7 * 3600, 13 * 3600, -1, -1, -1], dtype=np.int64)
+_FIN = np.array([13 * 3600, 18 * 3600, -1, -1, -1], dtype=np.int64)
+
+# Jornada completa: la salida esperada es la entrada más 6 horas
+DURACION_COMPLETA = 6 * 3600
+
+# Minutos esperados por jornada para el consolidado
+_MINUTOS_ESPERADOS = np.array([8 * 60, 8 * 60, 8 * 60, 16 * 60, 8 * 60], dtype=np.int64)
+
+Incidencias = namedtuple(
+    'Incidencias',
+    'atraso salida_temprana trabajados entrada_tarde salida_temprano'
+)
+
+
+def codigo_jornada(jornada):
+    return CODIGOS_JORNADA.get(jornada, SIN_JORNADA)
+
+
+def calcular_lote(jornadas, entradas, salidas):
+    """Incidencias de un lote de registros en una sola pasada.
+
+    Args:
+        jornadas: códigos de jornada (ver ``codigo_jornada``)
+        entradas: segundos de entrada (``SIN_HORA`` si falta)
+        salidas: segundos de salida (``SIN_HORA`` si falta)
+    Returns:
+        Incidencias: arreglos de minutos de atraso, minutos de salida
+        temprana, minutos trabajados y las marcas booleanas de entrada
+        tarde / salida temprana usadas por los reportes
+    """
+    jornadas = np.asarray(jornadas, dtype=np.int64)
+    entradas = np.asarray(entradas, dtype=np.int64)
+    salidas = np.asarray(salidas, dtype=np.int64)
+
+    hay_entrada = entradas != SIN_HORA
+    hay_salida = salidas != SIN_HORA
+    inicio = _INICIO[jornadas]
+    fin = _FIN[jornadas]
+    con_horario = inicio != -1
+
+    # La jornada completa no tiene hora fija: se espera 6 horas después de entrar
+    completa = jornadas == CODIGOS_JORNADA['completa']
+    fin = np.where(completa & hay_entrada, entradas + DURACION_COMPLETA, fin)
+
+    segundos_atraso = np.where(con_horario & hay_entrada, entradas - inicio, 0)
+    segundos_temprano = np.where((fin != -1) & hay_salida, fin - salidas, 0)
+    segundos_trabajados = np.where(hay_entrada & hay_salida, salidas - entradas, 0)
+
+    return Incidencias(
+        atraso=np.maximum(segundos_atraso, 0) // 60,
+        salida_temprana=np.maximum(segundos_temprano, 0) // 60,
+        trabajados=np.maximum(segundos_trabajados, 0) // 60,
+        entrada_tarde=con_horario & (~hay_entrada | (segundos_atraso > 0)),
+        salida_temprano=con_horario & (~hay_salida | (segundos_temprano > 0)),
+    )
+
+
+def calcular_registros(jornadas, horas_entrada, horas_salida):
+    """``calcular_lote`` a partir de nombres de jornada y objetos ``time``."""
+    return calcular_lote(
+        np.fromiter((codigo_jornada(j) for j in jornadas), dtype=np.int64),
+        np.fromiter((segundos_del_dia(h, SIN_HORA) for h in horas_entrada), dtype=np.int64),
+        np.fromiter((segundos_del_dia(h, SIN_HORA) for h in horas_salida), dtype=np.int64),
+    )
+
+
+def calcular(jornada, hora_entrada, hora_salida):
+    """Incidencias de un solo registro: (atraso, salida_temprana) en minutos."""
+    resultado = calcular_lote(
+        [codigo_jornada(jornada)],
+        [segundos_del_dia(hora_entrada, SIN_HORA)],
+        [segundos_del_dia(hora_salida, SIN_HORA)]
+    )
+    return int(resultado.atraso[0]), int(resultado.salida_temprana[0])
+
+
+def minutos_esperados(jornadas):
+    """Minutos esperados de trabajo por registro según su código de jornada."""
+    return _MINUTOS_ESPERADOS[np.asarray(jornadas, dtype=np.int64)]
+
+
+def formato_horas(minutos):
+    """Texto "Xh Ym" para un total de minutos."""
+    minutos = int(minutos)
+    return f"{minutos // 60}h {minutos % 60}m"
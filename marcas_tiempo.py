@@ -0,0 +1,51 @@
+"""
+Lectura de las fechas y horas que envían los lectores de QR.
+
+Los puntos de registro (``/registrar``, ``/sincronizar``, ``importar_json``)
+reciben ``AAAA-MM-DD``, ``HH:MM:SS`` y ``AAAA-MM-DD HH:MM:SS``.
+``datetime.strptime`` interpreta el formato en cada llamada y es lento. El
+camino rápido comprueba el ancho fijo y los separadores y usa
+``fromisoformat``, que está en C y solo acepta dígitos ASCII.
+
+Todo lo demás (sin ceros a la izquierda como ``2025-1-5`` o ``7:05:00``,
+que envían lectores antiguos) pasa por ``strptime`` con el mismo formato de
+siempre: se aceptan y rechazan exactamente los mismos textos que antes, con
+``ValueError`` si no son válidos.
+"""
+
+from datetime import date, datetime, time
+
+FORMATO_FECHA = '%Y-%m-%d'
+FORMATO_HORA = '%H:%M:%S'
+FORMATO_FECHA_HORA = f'{FORMATO_FECHA} {FORMATO_HORA}'
+
+
+def fecha_de(texto):
+    """``date`` de 'AAAA-MM-DD'."""
+    if len(texto) == 10 and texto[4] == '-' and texto[7] == '-':
+        try:
+            return date.fromisoformat(texto)
+        except ValueError:
+            pass
+    return datetime.strptime(texto, FORMATO_FECHA).date()
+
+
+def hora_de(texto):
+    """``time`` de 'HH:MM:SS'."""
+    if len(texto) == 8 and texto[2] == ':' and texto[5] == ':':
+        try:
+            return time.fromisoformat(texto)
+        except ValueError:
+            pass
+    return datetime.strptime(texto, FORMATO_HORA).time()
+
+
+def fecha_hora_de(texto):
+    """``datetime`` de 'AAAA-MM-DD HH:MM:SS'."""
+    if (len(texto) == 19 and texto[10] == ' ' and texto[4] == '-' and texto[7] == '-'
+            and texto[13] == ':' and texto[16] == ':'):
+        try:
+            return datetime.fromisoformat(texto)
+        except ValueError:
+            pass
+    return datetime.strptime(texto, FORMATO_FECHA_HORA)
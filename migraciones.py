@@ -0,0 +1,34 @@
+"""
+Migraciones del esquema con Alembic (Flask-Migrate).
+
+Flask-Migrate carga Alembic, que tarda en importarse; por eso no se
+inicializa en ``create_app`` (los workers no lo necesitan) sino en esta
+fábrica, que usan los comandos ``flask db``::
+
+    FLASK_APP=migraciones flask db upgrade              # crear o actualizar la base
+    FLASK_APP=migraciones flask db stamp 29ec11e6bffa   # base creada antes con create_all()
+    FLASK_APP=migraciones flask db migrate -m "..."     # tras cambiar un modelo
+
+Las migraciones están en ``migrations/`` y sirven para SQLite y PostgreSQL
+(``DATABASE_URL``); en SQLite los ALTER se hacen en modo batch. La primera
+revisión (``29ec11e6bffa``, esquema base) son las tablas que creaba
+``create_all()`` antes de las migraciones: una base de entonces se marca
+en ella, no en ``head``, y ``upgrade`` le agrega solo lo que falte.
+"""
+
+import os
+
+from flask_migrate import Migrate
+
+from app_simple import create_app as crear_aplicacion, db
+
+DIRECTORIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+migrate = Migrate()
+
+
+def create_app():
+    app = crear_aplicacion()
+    import models  # noqa: F401  (todas las tablas en los metadatos)
+    migrate.init_app(app, db, directory=DIRECTORIO, compare_type=True, render_as_batch=True)
+    return app
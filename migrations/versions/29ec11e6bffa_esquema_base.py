@@ -0,0 +1,121 @@
+"""esquema base
+
+Las cuatro tablas que creaba ``create_all()`` antes de las migraciones
+(usuarios, docentes, asistencias y licencias), sin los índices compuestos
+ni las restricciones que agrega el esquema inicial. Una base creada así se
+marca en esta revisión (``flask db stamp 29ec11e6bffa``) y se actualiza
+con ``flask db upgrade``; en una base vacía se crean las tablas.
+
+Revision ID: 29ec11e6bffa
+Revises:
+Create Date: 2026-10-19 16:20:41.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '29ec11e6bffa'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _existe(tabla):
+    return sa.inspect(op.get_bind()).has_table(tabla)
+
+
+def upgrade():
+    if not _existe('usuarios'):
+        op.create_table('usuarios',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=50), nullable=False),
+        sa.Column('password_hash', sa.String(length=128), nullable=False),
+        sa.Column('rol', sa.String(length=20), nullable=False),
+        sa.Column('activo', sa.Boolean(), nullable=True),
+        sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+        sa.Column('ultimo_acceso', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('username')
+        )
+
+    if not _existe('docentes'):
+        op.create_table('docentes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('nombre', sa.String(length=100), nullable=False),
+        sa.Column('cedula', sa.String(length=10), nullable=False),
+        sa.Column('telefono', sa.String(length=15), nullable=False),
+        sa.Column('correo', sa.String(length=120), nullable=False),
+        sa.Column('jornada', sa.String(length=20), nullable=False),
+        sa.Column('qr_code_path', sa.String(length=200), nullable=True),
+        sa.Column('activo', sa.Boolean(), nullable=True),
+        sa.Column('tipo', sa.String(length=20), nullable=False),
+        sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+        sa.Column('fecha_actualizacion', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('docentes', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_docentes_activo'), ['activo'], unique=False)
+            batch_op.create_index(batch_op.f('ix_docentes_cedula'), ['cedula'], unique=True)
+            batch_op.create_index(batch_op.f('ix_docentes_correo'), ['correo'], unique=True)
+            batch_op.create_index(batch_op.f('ix_docentes_jornada'), ['jornada'], unique=False)
+            batch_op.create_index(batch_op.f('ix_docentes_nombre'), ['nombre'], unique=False)
+            batch_op.create_index(batch_op.f('ix_docentes_tipo'), ['tipo'], unique=False)
+
+    if not _existe('asistencias'):
+        op.create_table('asistencias',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('docente_id', sa.Integer(), nullable=False),
+        sa.Column('fecha', sa.Date(), nullable=False),
+        sa.Column('hora_entrada', sa.Time(), nullable=True),
+        sa.Column('hora_salida', sa.Time(), nullable=True),
+        sa.Column('estado', sa.Enum('presente', 'ausente', 'pendiente', name='estado_asistencia'), nullable=True),
+        sa.Column('jornada', sa.String(length=20), nullable=False),
+        sa.Column('device_id', sa.String(length=100), nullable=True),
+        sa.Column('latitud', sa.Float(), nullable=True),
+        sa.Column('longitud', sa.Float(), nullable=True),
+        sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+        sa.Column('fecha_actualizacion', sa.DateTime(), nullable=True),
+        sa.Column('modo', sa.String(length=20), nullable=False),
+        sa.ForeignKeyConstraint(['docente_id'], ['docentes.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('asistencias', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_asistencias_device_id'), ['device_id'], unique=False)
+            batch_op.create_index(batch_op.f('ix_asistencias_docente_id'), ['docente_id'], unique=False)
+            batch_op.create_index(batch_op.f('ix_asistencias_estado'), ['estado'], unique=False)
+            batch_op.create_index(batch_op.f('ix_asistencias_fecha'), ['fecha'], unique=False)
+            batch_op.create_index(batch_op.f('ix_asistencias_hora_entrada'), ['hora_entrada'], unique=False)
+            batch_op.create_index(batch_op.f('ix_asistencias_jornada'), ['jornada'], unique=False)
+            batch_op.create_index(batch_op.f('ix_asistencias_modo'), ['modo'], unique=False)
+
+    if not _existe('licencias'):
+        op.create_table('licencias',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('docente_id', sa.Integer(), nullable=False),
+        sa.Column('fecha_inicio', sa.Date(), nullable=False),
+        sa.Column('fecha_fin', sa.Date(), nullable=False),
+        sa.Column('motivo', sa.String(length=200), nullable=True),
+        sa.Column('estado', sa.String(length=20), nullable=True),
+        sa.Column('aprobado_por', sa.String(length=100), nullable=True),
+        sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+        sa.Column('fecha_actualizacion', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['docente_id'], ['docentes.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('licencias', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_licencias_docente_id'), ['docente_id'], unique=False)
+            batch_op.create_index(batch_op.f('ix_licencias_estado'), ['estado'], unique=False)
+            batch_op.create_index(batch_op.f('ix_licencias_fecha_fin'), ['fecha_fin'], unique=False)
+            batch_op.create_index(batch_op.f('ix_licencias_fecha_inicio'), ['fecha_inicio'], unique=False)
+
+
+def downgrade():
+    op.drop_table('licencias')
+    op.drop_table('asistencias')
+    op.drop_table('docentes')
+    op.drop_table('usuarios')
+
+    # En PostgreSQL el ENUM es un tipo aparte y sobrevive a la tabla
+    sa.Enum(name='estado_asistencia').drop(op.get_bind(), checkfirst=True)
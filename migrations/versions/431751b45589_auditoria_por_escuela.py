@@ -0,0 +1,58 @@
+"""auditoria por escuela
+
+Columna ``escuela_id`` (con su clave foránea) en ``auditoria`` y sus
+índices encabezados por la escuela. Las acciones ya registradas quedan en
+la escuela 1. Solo se cambia lo que falta, como en las revisiones
+anteriores.
+
+Revision ID: 431751b45589
+Revises: 4a69e8443368
+Create Date: 2026-10-20 10:02:17.880341
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '431751b45589'
+down_revision = '4a69e8443368'
+branch_labels = None
+depends_on = None
+
+ANTERIORES = ['idx_auditoria_entidad_fecha', 'idx_auditoria_fecha', 'idx_auditoria_usuario_fecha']
+NUEVOS = [
+    ('idx_auditoria_escuela_entidad_fecha', ['escuela_id', 'entidad', 'entidad_id', 'fecha']),
+    ('idx_auditoria_escuela_fecha', ['escuela_id', 'fecha']),
+    ('idx_auditoria_escuela_usuario_fecha', ['escuela_id', 'usuario', 'fecha']),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    columnas = {c['name'] for c in inspector.get_columns('auditoria')}
+    indices = {i['name'] for i in inspector.get_indexes('auditoria')}
+    con_clave = {c for fk in inspector.get_foreign_keys('auditoria') for c in fk['constrained_columns']}
+
+    with op.batch_alter_table('auditoria', schema=None) as batch_op:
+        if 'escuela_id' not in columnas:
+            batch_op.add_column(sa.Column('escuela_id', sa.Integer(), server_default='1', nullable=False))
+        for nombre in ANTERIORES:
+            if nombre in indices:
+                batch_op.drop_index(nombre)
+        for nombre, columnas_indice in NUEVOS:
+            if nombre not in indices:
+                batch_op.create_index(nombre, columnas_indice, unique=False)
+        if 'escuela_id' not in con_clave:
+            batch_op.create_foreign_key('fk_auditoria_escuela', 'escuelas', ['escuela_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('auditoria', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_auditoria_escuela', type_='foreignkey')
+        for nombre, _ in NUEVOS:
+            batch_op.drop_index(nombre)
+        batch_op.create_index(batch_op.f('idx_auditoria_usuario_fecha'), ['usuario', 'fecha'], unique=False)
+        batch_op.create_index(batch_op.f('idx_auditoria_fecha'), ['fecha'], unique=False)
+        batch_op.create_index(batch_op.f('idx_auditoria_entidad_fecha'), ['entidad', 'entidad_id', 'fecha'], unique=False)
+        batch_op.drop_column('escuela_id')
@@ -0,0 +1,63 @@
+"""horarios y feriados por escuela
+
+Columna ``escuela_id`` (con su clave foránea) en ``horarios`` y
+``feriados``; las restricciones únicas pasan a incluir la escuela. Los
+horarios y feriados existentes quedan en la escuela 1. Como en las
+revisiones anteriores, solo se cambia lo que falta: ``create_all()`` pudo
+crear ya las tablas con la columna.
+
+Revision ID: 4a69e8443368
+Revises: a31906174cec
+Create Date: 2026-10-20 09:12:44.503817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a69e8443368'
+down_revision = 'a31906174cec'
+branch_labels = None
+depends_on = None
+
+# Por tabla: restricción o índice único sin escuela y restricción nueva (nombre, columnas)
+CAMBIOS = {
+    'horarios': ('uq_horario_jornada_tipo', ('uq_horario_escuela_jornada_tipo', ['escuela_id', 'jornada', 'tipo'])),
+    'feriados': ('ix_feriados_fecha', ('uq_feriado_escuela_fecha', ['escuela_id', 'fecha'])),
+}
+
+
+def upgrade():
+    for tabla, (anterior, (nueva, columnas_nueva)) in CAMBIOS.items():
+        inspector = sa.inspect(op.get_bind())
+        columnas = {c['name'] for c in inspector.get_columns(tabla)}
+        unicas = {u['name'] for u in inspector.get_unique_constraints(tabla)}
+        indices = {i['name'] for i in inspector.get_indexes(tabla)}
+        con_clave = {c for fk in inspector.get_foreign_keys(tabla) for c in fk['constrained_columns']}
+
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            if 'escuela_id' not in columnas:
+                batch_op.add_column(sa.Column('escuela_id', sa.Integer(), server_default='1', nullable=False))
+            if anterior in unicas:
+                batch_op.drop_constraint(anterior, type_='unique')
+            if anterior in indices:
+                batch_op.drop_index(anterior)
+            if nueva not in unicas:
+                batch_op.create_unique_constraint(nueva, columnas_nueva)
+            if 'escuela_id' not in con_clave:
+                batch_op.create_foreign_key(f'fk_{tabla}_escuela', 'escuelas', ['escuela_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('feriados', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_feriados_escuela', type_='foreignkey')
+        batch_op.drop_constraint('uq_feriado_escuela_fecha', type_='unique')
+        batch_op.create_index(batch_op.f('ix_feriados_fecha'), ['fecha'], unique=True)
+        batch_op.drop_column('escuela_id')
+
+    with op.batch_alter_table('horarios', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_horarios_escuela', type_='foreignkey')
+        batch_op.drop_constraint('uq_horario_escuela_jornada_tipo', type_='unique')
+        batch_op.create_unique_constraint('uq_horario_jornada_tipo', ['jornada', 'tipo'])
+        batch_op.drop_column('escuela_id')
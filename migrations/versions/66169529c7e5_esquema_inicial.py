@@ -0,0 +1,224 @@
+"""esquema inicial
+
+Sobre el esquema base: tablas de auditoría, feriados, horarios, versiones
+y contadores de tardanza, más los índices compuestos y las restricciones
+de docentes, asistencias y licencias. Solo se crea lo que falta: en una
+base antigua ``run.py`` pudo crear ya alguna tabla con ``create_all()``, y
+los índices dependen de la versión de los modelos que la creó.
+
+Revision ID: 66169529c7e5
+Revises: 29ec11e6bffa
+Create Date: 2026-10-19 14:58:05.664615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '66169529c7e5'
+down_revision = '29ec11e6bffa'
+branch_labels = None
+depends_on = None
+
+ESTADO_ASISTENCIA = sa.Enum('presente', 'ausente', 'pendiente', name='estado_asistencia')
+
+# Índices por tabla: (nombre, columnas, único)
+INDICES = {
+    'auditoria': [
+        ('idx_auditoria_entidad_fecha', ['entidad', 'entidad_id', 'fecha'], False),
+        ('idx_auditoria_fecha', ['fecha'], False),
+        ('idx_auditoria_usuario_fecha', ['usuario', 'fecha'], False),
+    ],
+    'feriados': [
+        ('ix_feriados_fecha', ['fecha'], True),
+    ],
+    'horarios': [
+        ('ix_horarios_version', ['version'], False),
+    ],
+    'contadores_tardanza': [
+        ('idx_contador_periodo_docente', ['periodo', 'docente_id', 'tardanzas'], False),
+    ],
+    'docentes': [
+        ('idx_docente_activo_tipo', ['activo', 'tipo'], False),
+        ('idx_docente_jornada_activo', ['jornada', 'activo'], False),
+        ('idx_docente_nombre', ['nombre'], False),
+    ],
+    'asistencias': [
+        ('idx_asistencia_docente_fecha', ['docente_id', 'fecha'], False),
+        ('idx_asistencia_docente_fecha_entrada', ['docente_id', 'fecha', 'hora_entrada'], False),
+        ('idx_asistencia_fecha_estado', ['fecha', 'estado'], False),
+        ('idx_asistencia_jornada', ['jornada'], False),
+    ],
+    'licencias': [
+        ('idx_licencia_docente_estado_fechas', ['docente_id', 'estado', 'fecha_inicio', 'fecha_fin'], False),
+        ('idx_licencia_estado_fecha', ['estado', 'fecha_inicio'], False),
+        ('idx_licencia_fechas', ['fecha_inicio', 'fecha_fin'], False),
+    ],
+}
+
+# Índices de versiones anteriores de los modelos, reemplazados por los de arriba
+OBSOLETOS = {
+    'licencias': ['idx_licencia_docente_estado'],
+}
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def _existe(tabla):
+    return _inspector().has_table(tabla)
+
+
+def _indices(tabla):
+    return {i['name'] for i in _inspector().get_indexes(tabla)}
+
+
+def _crear_indices(tabla):
+    existentes = _indices(tabla)
+    faltantes = [indice for indice in INDICES[tabla] if indice[0] not in existentes]
+    obsoletos = [nombre for nombre in OBSOLETOS.get(tabla, ()) if nombre in existentes]
+    if not faltantes and not obsoletos:
+        return
+    with op.batch_alter_table(tabla, schema=None) as batch_op:
+        for nombre in obsoletos:
+            batch_op.drop_index(nombre)
+        for nombre, columnas, unico in faltantes:
+            batch_op.create_index(nombre, columnas, unique=unico)
+
+
+def _es_estado_asistencia(tipo, dialecto):
+    if isinstance(tipo, sa.Enum):  # PostgreSQL: el tipo ENUM
+        return True
+    # SQLite guarda el Enum como VARCHAR del largo del valor más largo
+    return dialecto != 'postgresql' and getattr(tipo, 'length', None) == ESTADO_ASISTENCIA.length
+
+
+def _borrar_indices(tabla):
+    existentes = _indices(tabla)
+    nombres = [nombre for nombre, _, _ in INDICES[tabla] if nombre in existentes]
+    if nombres:
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            for nombre in nombres:
+                batch_op.drop_index(nombre)
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if not _existe('auditoria'):
+        op.create_table('auditoria',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('fecha', sa.DateTime(), nullable=False),
+        sa.Column('usuario', sa.String(length=50), nullable=False),
+        sa.Column('accion', sa.String(length=50), nullable=False),
+        sa.Column('entidad', sa.String(length=30), nullable=True),
+        sa.Column('entidad_id', sa.Integer(), nullable=True),
+        sa.Column('detalles', sa.Text(), nullable=True),
+        sa.Column('ip', sa.String(length=45), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    _crear_indices('auditoria')
+
+    if not _existe('feriados'):
+        op.create_table('feriados',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('fecha', sa.Date(), nullable=False),
+        sa.Column('descripcion', sa.String(length=200), nullable=True),
+        sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    _crear_indices('feriados')
+
+    if not _existe('horarios'):
+        op.create_table('horarios',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('jornada', sa.String(length=20), nullable=False),
+        sa.Column('tipo', sa.String(length=20), nullable=True),
+        sa.Column('entrada_inicio', sa.Time(), nullable=False),
+        sa.Column('entrada_fin', sa.Time(), nullable=False),
+        sa.Column('entrada_limite', sa.Time(), nullable=False),
+        sa.Column('salida_inicio', sa.Time(), nullable=False),
+        sa.Column('salida_fin', sa.Time(), nullable=False),
+        sa.Column('salida_limite', sa.Time(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('fecha_actualizacion', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('jornada', 'tipo', name='uq_horario_jornada_tipo')
+        )
+    _crear_indices('horarios')
+
+    if not _existe('versiones_datos'):
+        op.create_table('versiones_datos',
+        sa.Column('tabla', sa.String(length=64), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('tabla')
+        )
+
+    if not _existe('contadores_tardanza'):
+        op.create_table('contadores_tardanza',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('docente_id', sa.Integer(), nullable=False),
+        sa.Column('periodo', sa.Integer(), nullable=False),
+        sa.Column('tardanzas', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['docente_id'], ['docentes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('docente_id', 'periodo', name='uq_contador_docente_periodo')
+        )
+    _crear_indices('contadores_tardanza')
+
+    _crear_indices('docentes')
+
+    # Un registro por docente, fecha y jornada (la marcación hace UPSERT sobre esta clave)
+    sin_clave = 'uq_docente_fecha_jornada' not in {
+        u['name'] for u in _inspector().get_unique_constraints('asistencias')}
+    if sin_clave:
+        duplicados = bind.execute(sa.text(
+            'SELECT COUNT(*) FROM (SELECT docente_id FROM asistencias'
+            ' GROUP BY docente_id, fecha, jornada HAVING COUNT(*) > 1) repetidos'
+        )).scalar()
+        if duplicados:
+            raise RuntimeError(
+                f'{duplicados} combinaciones (docente, fecha, jornada) tienen más de una asistencia; '
+                'deja un solo registro por combinación antes de migrar'
+            )
+
+    # Bases muy antiguas guardan el estado como VARCHAR(20)
+    estado = next(c['type'] for c in _inspector().get_columns('asistencias') if c['name'] == 'estado')
+    if not _es_estado_asistencia(estado, bind.dialect.name):
+        if bind.dialect.name == 'postgresql':
+            ESTADO_ASISTENCIA.create(bind, checkfirst=True)
+            op.alter_column('asistencias', 'estado', type_=ESTADO_ASISTENCIA, existing_type=estado,
+                            postgresql_using='estado::estado_asistencia')
+        else:
+            with op.batch_alter_table('asistencias', schema=None) as batch_op:
+                batch_op.alter_column('estado', type_=ESTADO_ASISTENCIA, existing_type=estado)
+
+    if sin_clave:
+        with op.batch_alter_table('asistencias', schema=None) as batch_op:
+            batch_op.create_unique_constraint('uq_docente_fecha_jornada', ['docente_id', 'fecha', 'jornada'])
+    _crear_indices('asistencias')
+
+    if 'ck_licencia_fechas_validas' not in {c['name'] for c in _inspector().get_check_constraints('licencias')}:
+        with op.batch_alter_table('licencias', schema=None) as batch_op:
+            batch_op.create_check_constraint('ck_licencia_fechas_validas', 'fecha_fin >= fecha_inicio')
+    _crear_indices('licencias')
+
+
+def downgrade():
+    _borrar_indices('licencias')
+    with op.batch_alter_table('licencias', schema=None) as batch_op:
+        batch_op.drop_constraint('ck_licencia_fechas_validas', type_='check')
+
+    _borrar_indices('asistencias')
+    with op.batch_alter_table('asistencias', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_docente_fecha_jornada', type_='unique')
+
+    _borrar_indices('docentes')
+
+    op.drop_table('contadores_tardanza')
+    op.drop_table('versiones_datos')
+    op.drop_table('horarios')
+    op.drop_table('feriados')
+    op.drop_table('auditoria')
@@ -0,0 +1,143 @@
+"""escuelas
+
+Tabla ``escuelas`` y columna ``escuela_id`` (con su clave foránea e
+índices) en las tablas por escuela. Como en el esquema inicial, solo se
+crea lo que falta: ``create_all()`` pudo crear ya ``escuelas`` o alguna
+tabla con la columna.
+
+Revision ID: a31906174cec
+Revises: 66169529c7e5
+Create Date: 2026-10-19 15:03:18.729168
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from flask import current_app
+
+
+# revision identifiers, used by Alembic.
+revision = 'a31906174cec'
+down_revision = '66169529c7e5'
+branch_labels = None
+depends_on = None
+
+# Por tabla: índices sin escuela que se reemplazan e índices nuevos (nombre, columnas)
+CAMBIOS = {
+    'asistencias': (
+        ['idx_asistencia_docente_fecha', 'idx_asistencia_docente_fecha_entrada',
+         'idx_asistencia_fecha_estado', 'idx_asistencia_jornada'],
+        [('idx_asistencia_escuela_docente_fecha', ['escuela_id', 'docente_id', 'fecha']),
+         ('idx_asistencia_escuela_docente_fecha_entrada', ['escuela_id', 'docente_id', 'fecha', 'hora_entrada']),
+         ('idx_asistencia_escuela_fecha_estado', ['escuela_id', 'fecha', 'estado']),
+         ('idx_asistencia_escuela_jornada', ['escuela_id', 'jornada'])],
+    ),
+    'contadores_tardanza': (
+        ['idx_contador_periodo_docente'],
+        [('idx_contador_escuela_periodo_docente', ['escuela_id', 'periodo', 'docente_id', 'tardanzas'])],
+    ),
+    'docentes': (
+        ['idx_docente_activo_tipo', 'idx_docente_jornada_activo', 'idx_docente_nombre'],
+        [('idx_docente_escuela_activo_tipo', ['escuela_id', 'activo', 'tipo']),
+         ('idx_docente_escuela_jornada_activo', ['escuela_id', 'jornada', 'activo']),
+         ('idx_docente_escuela_nombre', ['escuela_id', 'nombre'])],
+    ),
+    'licencias': (
+        ['idx_licencia_docente_estado_fechas', 'idx_licencia_estado_fecha', 'idx_licencia_fechas'],
+        [('idx_licencia_escuela_docente_estado_fechas', ['escuela_id', 'docente_id', 'estado', 'fecha_inicio', 'fecha_fin']),
+         ('idx_licencia_escuela_estado_fecha', ['escuela_id', 'estado', 'fecha_inicio']),
+         ('idx_licencia_escuela_fechas', ['escuela_id', 'fecha_inicio', 'fecha_fin'])],
+    ),
+    'usuarios': ([], []),
+}
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if not _inspector().has_table('escuelas'):
+        op.create_table('escuelas',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('nombre', sa.String(length=200), nullable=False),
+        sa.Column('codigo', sa.String(length=20), nullable=True),
+        sa.Column('activa', sa.Boolean(), nullable=False),
+        sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('codigo')
+        )
+    # Escuela 1: a ella pasan todos los datos existentes (server_default de escuela_id)
+    escuelas = sa.table('escuelas', sa.column('id', sa.Integer), sa.column('nombre', sa.String),
+                        sa.column('activa', sa.Boolean))
+    if bind.execute(sa.select(escuelas.c.id).where(escuelas.c.id == 1)).first() is None:
+        op.bulk_insert(escuelas, [{'id': 1, 'nombre': current_app.config['ESCUELA_NOMBRE'], 'activa': True}])
+        if bind.dialect.name == 'postgresql':
+            op.execute("SELECT setval(pg_get_serial_sequence('escuelas', 'id'), (SELECT MAX(id) FROM escuelas))")
+
+    for tabla, (anteriores, nuevos) in CAMBIOS.items():
+        inspector = _inspector()
+        columnas = {c['name'] for c in inspector.get_columns(tabla)}
+        indices = {i['name'] for i in inspector.get_indexes(tabla)}
+        con_clave = {c for fk in inspector.get_foreign_keys(tabla) for c in fk['constrained_columns']}
+
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            if 'escuela_id' not in columnas:
+                batch_op.add_column(sa.Column('escuela_id', sa.Integer(), server_default='1', nullable=False))
+            for nombre in anteriores:
+                if nombre in indices:
+                    batch_op.drop_index(nombre)
+            for nombre, columnas_indice in nuevos:
+                if nombre not in indices:
+                    batch_op.create_index(nombre, columnas_indice, unique=False)
+            if 'escuela_id' not in con_clave:
+                batch_op.create_foreign_key(f'fk_{tabla}_escuela', 'escuelas', ['escuela_id'], ['id'])
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('usuarios', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_usuarios_escuela', type_='foreignkey')
+        batch_op.drop_column('escuela_id')
+
+    with op.batch_alter_table('licencias', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_licencias_escuela', type_='foreignkey')
+        batch_op.drop_index('idx_licencia_escuela_fechas')
+        batch_op.drop_index('idx_licencia_escuela_estado_fecha')
+        batch_op.drop_index('idx_licencia_escuela_docente_estado_fechas')
+        batch_op.create_index(batch_op.f('idx_licencia_fechas'), ['fecha_inicio', 'fecha_fin'], unique=False)
+        batch_op.create_index(batch_op.f('idx_licencia_estado_fecha'), ['estado', 'fecha_inicio'], unique=False)
+        batch_op.create_index(batch_op.f('idx_licencia_docente_estado_fechas'), ['docente_id', 'estado', 'fecha_inicio', 'fecha_fin'], unique=False)
+        batch_op.drop_column('escuela_id')
+
+    with op.batch_alter_table('docentes', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_docentes_escuela', type_='foreignkey')
+        batch_op.drop_index('idx_docente_escuela_nombre')
+        batch_op.drop_index('idx_docente_escuela_jornada_activo')
+        batch_op.drop_index('idx_docente_escuela_activo_tipo')
+        batch_op.create_index(batch_op.f('idx_docente_nombre'), ['nombre'], unique=False)
+        batch_op.create_index(batch_op.f('idx_docente_jornada_activo'), ['jornada', 'activo'], unique=False)
+        batch_op.create_index(batch_op.f('idx_docente_activo_tipo'), ['activo', 'tipo'], unique=False)
+        batch_op.drop_column('escuela_id')
+
+    with op.batch_alter_table('contadores_tardanza', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_contadores_tardanza_escuela', type_='foreignkey')
+        batch_op.drop_index('idx_contador_escuela_periodo_docente')
+        batch_op.create_index(batch_op.f('idx_contador_periodo_docente'), ['periodo', 'docente_id', 'tardanzas'], unique=False)
+        batch_op.drop_column('escuela_id')
+
+    with op.batch_alter_table('asistencias', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_asistencias_escuela', type_='foreignkey')
+        batch_op.drop_index('idx_asistencia_escuela_jornada')
+        batch_op.drop_index('idx_asistencia_escuela_fecha_estado')
+        batch_op.drop_index('idx_asistencia_escuela_docente_fecha_entrada')
+        batch_op.drop_index('idx_asistencia_escuela_docente_fecha')
+        batch_op.create_index(batch_op.f('idx_asistencia_jornada'), ['jornada'], unique=False)
+        batch_op.create_index(batch_op.f('idx_asistencia_fecha_estado'), ['fecha', 'estado'], unique=False)
+        batch_op.create_index(batch_op.f('idx_asistencia_docente_fecha_entrada'), ['docente_id', 'fecha', 'hora_entrada'], unique=False)
+        batch_op.create_index(batch_op.f('idx_asistencia_docente_fecha'), ['docente_id', 'fecha'], unique=False)
+        batch_op.drop_column('escuela_id')
+
+    op.drop_table('escuelas')
+    # ### end Alembic commands ###
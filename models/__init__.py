@@ -1,5 +1,11 @@
-from app import db
+from app_simple import db
+from .escuela import Escuela
 from .docente import Docente
 from .asistencia import Asistencia
 from .licencia import Licencia
-from .usuario import Usuario
\ No newline at end of file
+from .usuario import Usuario
+from .auditoria import Auditoria
+from .horario import Horario
+from .feriado import Feriado
+from .contador_tardanza import ContadorTardanza
+from .version_datos import VersionDatos
@@ -6,6 +6,7 @@ class Asistencia(db.Model):
     __tablename__ = 'asistencias'
 
     id = db.Column(db.Integer, primary_key=True)
+    escuela_id = db.Column(db.Integer, db.ForeignKey('escuelas.id', name='fk_asistencias_escuela'), nullable=False, server_default='1')
     docente_id = db.Column(db.Integer, db.ForeignKey('docentes.id'), nullable=False, index=True)
 
     fecha = db.Column(db.Date, nullable=False, index=True)
@@ -35,11 +36,13 @@ class Asistencia(db.Model):
         onupdate=db.func.current_timestamp()
     )
 
+    # La escuela encabeza los índices compuestos; la restricción única ya
+    # queda dentro de una escuela porque el docente pertenece a una sola
     __table_args__ = (
-        db.Index('idx_asistencia_docente_fecha', 'docente_id', 'fecha'),
-        db.Index('idx_asistencia_fecha_estado', 'fecha', 'estado'),
-        db.Index('idx_asistencia_docente_fecha_entrada', 'docente_id', 'fecha', 'hora_entrada'),
-        db.Index('idx_asistencia_jornada', 'jornada'),
+        db.Index('idx_asistencia_escuela_docente_fecha', 'escuela_id', 'docente_id', 'fecha'),
+        db.Index('idx_asistencia_escuela_fecha_estado', 'escuela_id', 'fecha', 'estado'),
+        db.Index('idx_asistencia_escuela_docente_fecha_entrada', 'escuela_id', 'docente_id', 'fecha', 'hora_entrada'),
+        db.Index('idx_asistencia_escuela_jornada', 'escuela_id', 'jornada'),
         db.UniqueConstraint('docente_id', 'fecha', 'jornada', name='uq_docente_fecha_jornada'),
     )
 
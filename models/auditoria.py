@@ -0,0 +1,52 @@
+from app_simple import db
+from sqlalchemy import event
+
+
+class Auditoria(db.Model):
+    """Registro de acciones de usuario (solo inserción).
+
+    Las filas se escriben en lotes desde ``auditoria.BufferAuditoria``;
+    nunca se actualizan ni se eliminan desde la aplicación. Cada acción
+    queda en la escuela del usuario que la hizo.
+    """
+    __tablename__ = 'auditoria'
+
+    id = db.Column(db.Integer, primary_key=True)
+    escuela_id = db.Column(db.Integer, db.ForeignKey('escuelas.id', name='fk_auditoria_escuela'), nullable=False, server_default='1')
+    fecha = db.Column(db.DateTime, nullable=False)
+    usuario = db.Column(db.String(50), nullable=False)
+    accion = db.Column(db.String(50), nullable=False)
+    entidad = db.Column(db.String(30))
+    entidad_id = db.Column(db.Integer)
+    detalles = db.Column(db.Text)
+    ip = db.Column(db.String(45))
+
+    # Índices para consultas por usuario, por entidad y por rango de fechas
+    # (la escuela primero: cada escuela lee solo su parte del índice)
+    __table_args__ = (
+        db.Index('idx_auditoria_escuela_usuario_fecha', 'escuela_id', 'usuario', 'fecha'),
+        db.Index('idx_auditoria_escuela_entidad_fecha', 'escuela_id', 'entidad', 'entidad_id', 'fecha'),
+        db.Index('idx_auditoria_escuela_fecha', 'escuela_id', 'fecha'),
+    )
+
+    def __repr__(self):
+        return f'<Auditoria {self.usuario} {self.accion} {self.entidad}:{self.entidad_id}>'
+
+    def to_dict(self):
+        """Convierte el objeto a diccionario para JSON"""
+        return {
+            'id': self.id,
+            'fecha': self.fecha.isoformat() if self.fecha else None,
+            'usuario': self.usuario,
+            'accion': self.accion,
+            'entidad': self.entidad,
+            'entidad_id': self.entidad_id,
+            'detalles': self.detalles,
+            'ip': self.ip
+        }
+
+
+@event.listens_for(Auditoria, 'before_update')
+@event.listens_for(Auditoria, 'before_delete')
+def _solo_insercion(mapper, connection, target):
+    raise ValueError('La tabla de auditoría es de solo inserción')
@@ -0,0 +1,25 @@
+from app_simple import db
+
+
+class ContadorTardanza(db.Model):
+    """Tardanzas por docente y mes, mantenidas al registrar asistencias.
+
+    ``periodo`` es el mes en formato AAAAMM para poder filtrar rangos
+    (mes, trimestre, año lectivo) con una sola comparación.
+    """
+    __tablename__ = 'contadores_tardanza'
+
+    id = db.Column(db.Integer, primary_key=True)
+    escuela_id = db.Column(db.Integer, db.ForeignKey('escuelas.id', name='fk_contadores_tardanza_escuela'), nullable=False, server_default='1')
+    docente_id = db.Column(db.Integer, db.ForeignKey('docentes.id', ondelete='CASCADE'), nullable=False)
+    periodo = db.Column(db.Integer, nullable=False)
+    tardanzas = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('docente_id', 'periodo', name='uq_contador_docente_periodo'),
+        # El ranking filtra por escuela y periodo y suma por docente sin leer la tabla
+        db.Index('idx_contador_escuela_periodo_docente', 'escuela_id', 'periodo', 'docente_id', 'tardanzas'),
+    )
+
+    def __repr__(self):
+        return f'<ContadorTardanza {self.docente_id} {self.periodo}: {self.tardanzas}>'
@@ -4,6 +4,7 @@ class Docente(db.Model):
     __tablename__ = 'docentes'
 
     id = db.Column(db.Integer, primary_key=True)
+    escuela_id = db.Column(db.Integer, db.ForeignKey('escuelas.id', name='fk_docentes_escuela'), nullable=False, server_default='1')
     nombre = db.Column(db.String(100), nullable=False, index=True)
     cedula = db.Column(db.String(10), unique=True, nullable=False, index=True)   # Nueva columna
     telefono = db.Column(db.String(15), nullable=False)                          # Nueva columna
@@ -23,11 +24,12 @@ class Docente(db.Model):
     asistencias = db.relationship('Asistencia', backref='docente', lazy=True, cascade='all, delete-orphan')
     licencias = db.relationship('Licencia', back_populates='docente', cascade='all, delete-orphan')
 
-    # Índices compuestos para optimizar consultas frecuentes
+    # Índices compuestos para optimizar consultas frecuentes (la escuela
+    # primero: cada escuela lee solo su parte del índice)
     __table_args__ = (
-        db.Index('idx_docente_activo_tipo', 'activo', 'tipo'),
-        db.Index('idx_docente_jornada_activo', 'jornada', 'activo'),
-        db.Index('idx_docente_nombre', 'nombre'),
+        db.Index('idx_docente_escuela_activo_tipo', 'escuela_id', 'activo', 'tipo'),
+        db.Index('idx_docente_escuela_jornada_activo', 'escuela_id', 'jornada', 'activo'),
+        db.Index('idx_docente_escuela_nombre', 'escuela_id', 'nombre'),
     )
 
     def __repr__(self):
@@ -0,0 +1,31 @@
+from sqlalchemy import event, text
+
+from app_simple import db
+from config import Config
+
+
+class Escuela(db.Model):
+    """Institución educativa: cada docente, asistencia, licencia y usuario
+    pertenece a una.
+
+    La escuela 1 existe siempre (instalaciones de una sola escuela) y es el
+    valor por defecto de ``escuela_id``.
+    """
+    __tablename__ = 'escuelas'
+
+    id = db.Column(db.Integer, primary_key=True)
+    nombre = db.Column(db.String(200), nullable=False)
+    codigo = db.Column(db.String(20), unique=True)  # código AMIE
+    activa = db.Column(db.Boolean, default=True, nullable=False)
+    fecha_creacion = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    def __repr__(self):
+        return f'<Escuela {self.nombre}>'
+
+
+@event.listens_for(Escuela.__table__, 'after_create')
+def _crear_escuela_principal(tabla, connection, **kw):
+    connection.execute(tabla.insert().values(id=1, nombre=Config.ESCUELA_NOMBRE, activa=True))
+    if connection.dialect.name == 'postgresql':
+        # El id se insertó a mano: la secuencia debe seguir desde ahí
+        connection.execute(text("SELECT setval(pg_get_serial_sequence('escuelas', 'id'), 1)"))
@@ -0,0 +1,27 @@
+from app_simple import db
+
+
+class Feriado(db.Model):
+    """Días no laborables de una escuela (feriados, vacaciones, suspensiones de clases)."""
+    __tablename__ = 'feriados'
+
+    id = db.Column(db.Integer, primary_key=True)
+    escuela_id = db.Column(db.Integer, db.ForeignKey('escuelas.id', name='fk_feriados_escuela'), nullable=False, server_default='1')
+    fecha = db.Column(db.Date, nullable=False)
+    descripcion = db.Column(db.String(200))
+    fecha_creacion = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    __table_args__ = (
+        db.UniqueConstraint('escuela_id', 'fecha', name='uq_feriado_escuela_fecha'),
+    )
+
+    def __repr__(self):
+        return f'<Feriado {self.fecha} {self.descripcion}>'
+
+    def to_dict(self):
+        """Convierte el objeto a diccionario para JSON"""
+        return {
+            'id': self.id,
+            'fecha': self.fecha.isoformat() if self.fecha else None,
+            'descripcion': self.descripcion
+        }
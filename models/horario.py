@@ -0,0 +1,50 @@
+from app_simple import db
+
+
+class Horario(db.Model):
+    """Ventanas de registro por jornada y tipo de personal.
+
+    Cada escuela tiene sus horarios. ``tipo`` NULL aplica a todo el
+    personal de la jornada. ``version`` se incrementa con cada cambio para
+    que los workers recarguen la tabla.
+    """
+    __tablename__ = 'horarios'
+
+    id = db.Column(db.Integer, primary_key=True)
+    escuela_id = db.Column(db.Integer, db.ForeignKey('escuelas.id', name='fk_horarios_escuela'), nullable=False, server_default='1')
+    jornada = db.Column(db.String(20), nullable=False)
+    tipo = db.Column(db.String(20))  # DOCENTE, ADMINISTRATIVO, CONSERJE, DECE o NULL
+    entrada_inicio = db.Column(db.Time, nullable=False)
+    entrada_fin = db.Column(db.Time, nullable=False)
+    entrada_limite = db.Column(db.Time, nullable=False)   # límite para registro tardío
+    salida_inicio = db.Column(db.Time, nullable=False)
+    salida_fin = db.Column(db.Time, nullable=False)
+    salida_limite = db.Column(db.Time, nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=1, index=True)
+    fecha_actualizacion = db.Column(
+        db.DateTime,
+        default=db.func.current_timestamp(),
+        onupdate=db.func.current_timestamp()
+    )
+
+    __table_args__ = (
+        db.UniqueConstraint('escuela_id', 'jornada', 'tipo', name='uq_horario_escuela_jornada_tipo'),
+    )
+
+    def __repr__(self):
+        return f'<Horario {self.jornada} {self.tipo or "*"} v{self.version}>'
+
+    def to_dict(self):
+        """Convierte el objeto a diccionario para JSON"""
+        return {
+            'id': self.id,
+            'jornada': self.jornada,
+            'tipo': self.tipo,
+            'entrada_inicio': self.entrada_inicio.strftime('%H:%M'),
+            'entrada_fin': self.entrada_fin.strftime('%H:%M'),
+            'entrada_limite': self.entrada_limite.strftime('%H:%M'),
+            'salida_inicio': self.salida_inicio.strftime('%H:%M'),
+            'salida_fin': self.salida_fin.strftime('%H:%M'),
+            'salida_limite': self.salida_limite.strftime('%H:%M'),
+            'version': self.version
+        }
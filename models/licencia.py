@@ -5,6 +5,7 @@ class Licencia(db.Model):
     __tablename__ = 'licencias'
 
     id = db.Column(db.Integer, primary_key=True)
+    escuela_id = db.Column(db.Integer, db.ForeignKey('escuelas.id', name='fk_licencias_escuela'), nullable=False, server_default='1')
     docente_id = db.Column(db.Integer, db.ForeignKey('docentes.id'), nullable=False, index=True)
     fecha_inicio = db.Column(db.Date, nullable=False, index=True)
     fecha_fin = db.Column(db.Date, nullable=False, index=True)
@@ -19,9 +20,10 @@ class Licencia(db.Model):
 
     # Índices compuestos para optimizar consultas frecuentes
     __table_args__ = (
-        db.Index('idx_licencia_docente_estado', 'docente_id', 'estado'),
-        db.Index('idx_licencia_fechas', 'fecha_inicio', 'fecha_fin'),
-        db.Index('idx_licencia_estado_fecha', 'estado', 'fecha_inicio'),
+        # Cubre las búsquedas "¿tiene licencia aprobada ese día?" sin leer la tabla
+        db.Index('idx_licencia_escuela_docente_estado_fechas', 'escuela_id', 'docente_id', 'estado', 'fecha_inicio', 'fecha_fin'),
+        db.Index('idx_licencia_escuela_fechas', 'escuela_id', 'fecha_inicio', 'fecha_fin'),
+        db.Index('idx_licencia_escuela_estado_fecha', 'escuela_id', 'estado', 'fecha_inicio'),
         db.CheckConstraint('fecha_fin >= fecha_inicio', name='ck_licencia_fechas_validas'),
     )
 
@@ -6,6 +6,7 @@ class Usuario(UserMixin, db.Model):
     __tablename__ = 'usuarios'
 
     id = db.Column(db.Integer, primary_key=True)
+    escuela_id = db.Column(db.Integer, db.ForeignKey('escuelas.id', name='fk_usuarios_escuela'), nullable=False, server_default='1')  # escuela a la que ve y administra
     username = db.Column(db.String(50), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
     rol = db.Column(db.String(20), nullable=False)  # admin, talento_humano
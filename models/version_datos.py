@@ -0,0 +1,16 @@
+from app_simple import db
+
+
+class VersionDatos(db.Model):
+    """Versión de cada tabla: sube justo después de cada commit que la modifica.
+
+    Las cachés y los ETag usan estos números como parte de su clave, así un
+    cambio hecho por cualquier worker invalida las copias de todos.
+    """
+    __tablename__ = 'versiones_datos'
+
+    tabla = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<VersionDatos {self.tabla}: {self.version}>'
@@ -0,0 +1,104 @@
+"""
+Capa de renderizado: bytecode de Jinja en disco, caché de fragmentos y
+compresión de respuestas.
+
+- Las plantillas compiladas se guardan en ``JINJA_CACHE_DIR`` (por defecto
+  ``instance/jinja``); un worker nuevo las carga sin volver a compilarlas.
+- ``{% cache 'nombre', version('docentes'), ... %}...{% endcache %}``
+  guarda el HTML del bloque en la caché compartida entre workers
+  (``cache_compartido``) con esa clave. Si la vista pasa los datos como
+  funciones y el bloque las llama, en un acierto tampoco se hacen las
+  consultas.
+- Las respuestas HTML/JSON/CSV grandes se comprimen con brotli (si está
+  instalado) o gzip según ``Accept-Encoding``.
+"""
+
+import gzip
+import os
+
+from flask import request
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+from cache_compartido import cache
+from versiones import version
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli se usa gzip
+    brotli = None
+
+TIPOS_COMPRIMIBLES = ('text/html', 'text/csv', 'text/plain', 'application/json', 'application/javascript')
+
+# Segundos de vida de un fragmento (FRAGMENTOS_TTL; 0 desactiva la caché)
+_ttl_fragmentos = 60
+# Bytes mínimos para comprimir una respuesta (COMPRESION_MINIMO)
+_minimo = 1024
+
+
+class FragmentoExtension(Extension):
+    """Etiqueta ``{% cache clave, partes... %}...{% endcache %}``."""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        partes = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            partes.append(parser.parse_expression())
+        cuerpo = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_renderizar', [nodes.List(partes)]), [], [], cuerpo
+        ).set_lineno(lineno)
+
+    def _renderizar(self, partes, caller):
+        if not _ttl_fragmentos:
+            return caller()
+        return cache.obtener_o_calcular('fragmento:' + repr(partes), caller, _ttl_fragmentos)
+
+
+def _comprimir(response):
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in TIPOS_COMPRIMIBLES):
+        return response
+
+    aceptadas = request.accept_encodings
+    cuerpo = response.get_data()
+    if len(cuerpo) < _minimo:
+        return response
+
+    if brotli is not None and aceptadas['br']:
+        response.set_data(brotli.compress(cuerpo, quality=5))
+        response.headers['Content-Encoding'] = 'br'
+    elif aceptadas['gzip']:
+        response.set_data(gzip.compress(cuerpo, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        return response
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def precargar(app):
+    """Compila todas las plantillas (y llena la caché de bytecode)."""
+    for nombre in app.jinja_env.list_templates(extensions=('html',)):
+        app.jinja_env.get_template(nombre)
+
+
+def init_app(app):
+    global _minimo, _ttl_fragmentos
+    directorio = app.config.get('JINJA_CACHE_DIR') or os.path.join(app.instance_path, 'jinja')
+    os.makedirs(directorio, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directorio)
+    app.jinja_env.add_extension(FragmentoExtension)
+    app.jinja_env.globals['version'] = version
+
+    _ttl_fragmentos = app.config.get('FRAGMENTOS_TTL', _ttl_fragmentos)
+
+    if app.config.get('COMPRESION_ACTIVA', True):
+        _minimo = app.config.get('COMPRESION_MINIMO', _minimo)
+        app.after_request(_comprimir)
+
+    if app.config.get('PLANTILLAS_PRECARGAR'):
+        precargar(app)
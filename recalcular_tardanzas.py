@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Script para reconstruir los contadores de tardanzas desde las asistencias
+
+Úsalo una vez al actualizar y después de cargas masivas que no pasan por
+el ORM (los contadores se mantienen solos al registrar asistencias).
+
+Uso:
+    python recalcular_tardanzas.py
+"""
+
+import os
+import sys
+
+# Agregar el directorio del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app_simple import create_app, db
+from tardanzas import recalcular
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        escritos = recalcular()
+
+    print(f"Contadores de tardanzas reconstruidos: {escritos} docente/mes")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Marcación de entrada y salida en una sola sentencia.
+
+Dos dispositivos que leen el mismo código a la vez no deben chocar con la
+restricción ``uq_docente_fecha_jornada``. Por eso la marca no consulta y
+luego escribe: la regla va dentro de la sentencia.
+
+- Entrada: ``INSERT ... ON CONFLICT (docente_id, fecha, jornada) DO UPDATE
+  ... WHERE hora_entrada IS NULL``. Crea el registro, o completa uno sin
+  entrada. Si la entrada ya estaba no cambia nada.
+- Salida: ``UPDATE ... WHERE hora_salida IS NULL``. Solo completa un
+  registro que existe y no tiene salida.
+
+Ambas devuelven la fila escrita con ``RETURNING``. Si no se escribió nada,
+devuelven None, y ``registro_existente`` lee la hora ya marcada para el
+aviso.
+
+Las sentencias van por la conexión de la sesión, sin el ORM. Aquí se
+avisa a lo que escuchan sus eventos: contadores de tardanzas, versiones de
+datos y cubo de asistencias.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import and_, select
+
+from cubo_asistencia import fila_de, guardar_en_sesion
+from models.asistencia import Asistencia
+from sql_portable import insert_dialecto
+from tardanzas import sumar_insertadas
+from versiones import incrementar_en_sesion
+
+_DEVUELTAS = ('id', 'hora_entrada', 'hora_salida', 'estado', 'modo')
+
+
+def _tabla():
+    return Asistencia.__table__
+
+
+def _clave(tabla, docente, fecha, jornada):
+    return and_(tabla.c.docente_id == docente.id, tabla.c.fecha == fecha, tabla.c.jornada == jornada)
+
+
+def marcar_entrada(session, docente, fecha, jornada, hora, device_id=None,
+                   latitud=None, longitud=None, modo=None):
+    """Registra la entrada; devuelve la fila escrita o None si ya había entrada."""
+    tabla = _tabla()
+    conexion = session.connection()
+    ahora = datetime.now()
+    valores = {
+        'escuela_id': docente.escuela_id,
+        'docente_id': docente.id,
+        'fecha': fecha,
+        'jornada': jornada,
+        'hora_entrada': hora,
+        'device_id': device_id,
+        'latitud': latitud,
+        'longitud': longitud,
+        'modo': modo or 'presencial',
+        'estado': 'pendiente',
+        'fecha_creacion': ahora,
+        'fecha_actualizacion': ahora,
+    }
+    devueltas = [tabla.c[c] for c in _DEVUELTAS]
+
+    stmt = insert_dialecto(conexion, tabla)
+    if stmt is not None:
+        excluida = stmt.excluded
+        fila = conexion.execute(
+            stmt.values(**valores).on_conflict_do_update(
+                index_elements=[tabla.c.docente_id, tabla.c.fecha, tabla.c.jornada],
+                set_={
+                    'hora_entrada': excluida.hora_entrada,
+                    'device_id': excluida.device_id,
+                    'latitud': excluida.latitud,
+                    'longitud': excluida.longitud,
+                    'modo': excluida.modo if modo else tabla.c.modo,
+                    'fecha_creacion': excluida.fecha_creacion,
+                    'fecha_actualizacion': excluida.fecha_actualizacion,
+                },
+                where=tabla.c.hora_entrada.is_(None)
+            ).returning(*devueltas)
+        ).first()
+    else:
+        # Otros motores: completar el registro sin entrada y, si no hay, crearlo
+        actualizar = {c: valores[c] for c in ('hora_entrada', 'device_id', 'latitud', 'longitud',
+                                               'fecha_creacion', 'fecha_actualizacion')}
+        if modo:
+            actualizar['modo'] = modo
+        escrita = conexion.execute(
+            tabla.update()
+            .where(_clave(tabla, docente, fecha, jornada), tabla.c.hora_entrada.is_(None))
+            .values(**actualizar)
+        ).rowcount > 0
+        if not escrita and registro_existente(session, docente, fecha, jornada) is None:
+            conexion.execute(tabla.insert().values(**valores))
+            escrita = True
+        fila = conexion.execute(
+            select(*devueltas).where(_clave(tabla, docente, fecha, jornada))
+        ).first() if escrita else None
+
+    if fila is None:
+        return None
+    sumar_insertadas(conexion, [valores], {docente.id: docente.tipo})
+    _notificar(session, docente, fecha, jornada, fila)
+    return fila
+
+
+def marcar_salida(session, docente, fecha, jornada, hora, device_id=None,
+                  latitud=None, longitud=None, modo=None):
+    """Registra la salida; devuelve la fila escrita o None si no hay entrada
+    o la salida ya estaba."""
+    tabla = _tabla()
+    conexion = session.connection()
+    actualizar = {'hora_salida': hora, 'fecha_actualizacion': datetime.now()}
+    # Lo que no llega se conserva
+    for columna, valor in (('device_id', device_id), ('latitud', latitud),
+                           ('longitud', longitud), ('modo', modo)):
+        if valor not in (None, ''):
+            actualizar[columna] = valor
+
+    stmt = (tabla.update()
+            .where(_clave(tabla, docente, fecha, jornada), tabla.c.hora_salida.is_(None))
+            .values(**actualizar))
+    if conexion.dialect.update_returning:
+        fila = conexion.execute(stmt.returning(*(tabla.c[c] for c in _DEVUELTAS))).first()
+    else:
+        fila = None
+        if conexion.execute(stmt).rowcount:
+            fila = conexion.execute(
+                select(*(tabla.c[c] for c in _DEVUELTAS)).where(_clave(tabla, docente, fecha, jornada))
+            ).first()
+
+    if fila is not None:
+        _notificar(session, docente, fecha, jornada, fila)
+    return fila
+
+
+def registro_existente(session, docente, fecha, jornada):
+    """(hora_entrada, hora_salida) del registro, o None si no existe."""
+    tabla = _tabla()
+    return session.connection().execute(
+        select(tabla.c.hora_entrada, tabla.c.hora_salida).where(_clave(tabla, docente, fecha, jornada))
+    ).first()
+
+
+def _notificar(session, docente, fecha, jornada, fila):
+    incrementar_en_sesion(session, Asistencia.__tablename__)
+    guardar_en_sesion(session, docente.escuela_id, fecha, fila_de(
+        fila.id, docente.id, fecha, jornada, fila.hora_entrada, fila.hora_salida, fila.estado
+    ))
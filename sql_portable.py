@@ -0,0 +1,134 @@
+"""
+SQL que funciona igual en SQLite y PostgreSQL.
+
+- ``upsert``: ``INSERT ... ON CONFLICT DO UPDATE`` con el dialecto del motor
+  (en otros motores, UPDATE y si no había fila, INSERT).
+- ``insertar_lote``: muchas filas de una vez; en PostgreSQL con ``COPY``,
+  en los demás con un único ``executemany``.
+
+Ambas trabajan sobre una conexión de SQLAlchemy (``db.session.connection()``
+para quedar en la transacción de la sesión) y no pasan por el ORM: los
+eventos de los modelos no se disparan. Quien las usa debe avisar a
+``versiones`` (``incrementar_en_sesion``) y a los contadores que dependan de
+la tabla.
+"""
+
+import io
+
+from datetime import datetime
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+_INSERTS = {'sqlite': sqlite_insert, 'postgresql': pg_insert}
+
+# Funciones SQL por defecto que COPY puede reemplazar por la hora actual
+_MARCAS_DE_TIEMPO = frozenset({'current_timestamp', 'now', 'localtimestamp'})
+_AHORA = object()
+
+
+def insert_dialecto(conexion, tabla):
+    """``insert()`` con ``on_conflict_do_*`` del motor, o None si no lo tiene."""
+    insert = _INSERTS.get(conexion.dialect.name)
+    return insert(tabla) if insert is not None else None
+
+
+def upsert(conexion, tabla, valores, claves, actualizar):
+    """Inserta ``valores`` o, si ya existe una fila con las mismas ``claves``,
+    le aplica ``actualizar``.
+
+    Args:
+        valores: dict con la fila nueva (debe incluir las claves)
+        claves: columnas del índice único en conflicto
+        actualizar: dict columna -> valor o expresión (p. ej. ``tabla.c.n + 1``)
+    """
+    stmt = insert_dialecto(conexion, tabla)
+    if stmt is not None:
+        conexion.execute(stmt.values(**valores).on_conflict_do_update(
+            index_elements=[tabla.c[c] for c in claves],
+            set_=actualizar
+        ))
+        return
+
+    # Otros motores: UPDATE y, si no había fila, INSERT
+    resultado = conexion.execute(
+        tabla.update().where(*(tabla.c[c] == valores[c] for c in claves)).values(**actualizar)
+    )
+    if resultado.rowcount == 0:
+        conexion.execute(tabla.insert().values(**valores))
+
+
+def insertar_lote(conexion, tabla, filas):
+    """Inserta ``filas`` (dicts con las mismas claves) y devuelve cuántas."""
+    filas = list(filas)
+    if not filas:
+        return 0
+    if conexion.dialect.name == 'postgresql':
+        columnas = _columnas_copy(tabla, filas[0])
+        if columnas is not None:
+            _copy(conexion, tabla, columnas, filas)
+            return len(filas)
+    conexion.execute(tabla.insert(), filas)
+    return len(filas)
+
+
+def _columnas_copy(tabla, muestra):
+    """{columna: valor por defecto} para COPY, o None si alguno no se puede calcular.
+
+    COPY no aplica los ``default`` de los modelos: se completan los valores
+    fijos y las marcas de tiempo; las claves autoincrementales quedan a cargo
+    de la base.
+    """
+    columnas = {}
+    for columna in tabla.columns:
+        if columna.name in muestra:
+            columnas[columna.name] = None
+            continue
+        default = columna.default
+        if default is None:
+            if columna is not tabla.autoincrement_column and columna.server_default is None:
+                columnas[columna.name] = None
+        elif default.is_scalar:
+            columnas[columna.name] = default.arg
+        elif default.is_clause_element and getattr(default.arg, 'name', '') in _MARCAS_DE_TIEMPO:
+            columnas[columna.name] = _AHORA
+        else:
+            return None
+    return columnas
+
+
+def _texto_copy(valor):
+    if valor is None:
+        return '\\N'
+    if isinstance(valor, bool):
+        return 't' if valor else 'f'
+    texto = valor.isoformat() if hasattr(valor, 'isoformat') else str(valor)
+    return (texto.replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def _copy(conexion, tabla, columnas, filas):
+    preparador = conexion.dialect.identifier_preparer
+    sql = 'COPY {} ({}) FROM STDIN'.format(
+        preparador.format_table(tabla),
+        ', '.join(preparador.quote(c) for c in columnas)
+    )
+    ahora = datetime.now()
+    buffer = io.StringIO()
+    for fila in filas:
+        valores = []
+        for nombre, defecto in columnas.items():
+            valor = fila.get(nombre, defecto)
+            valores.append(_texto_copy(ahora if valor is _AHORA else valor))
+        buffer.write('\t'.join(valores) + '\n')
+    buffer.seek(0)
+
+    cursor = conexion.connection.dbapi_connection.cursor()
+    try:
+        if hasattr(cursor, 'copy_expert'):  # psycopg2
+            cursor.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with cursor.copy(sql) as copia:
+                copia.write(buffer.getvalue())
+    finally:
+        cursor.close()
@@ -0,0 +1,195 @@
+"""
+Contadores de tardanzas por docente y mes.
+
+Cada vez que se guarda, cambia o elimina la hora de entrada de una
+asistencia se suma o resta 1 al contador del mes (tabla
+``contadores_tardanza``) con un UPSERT en la misma transacción. Así el
+ranking del dashboard lee unas pocas filas indexadas en lugar de recorrer
+todas las asistencias.
+
+Una entrada es tardanza cuando es posterior al fin de la ventana normal de
+entrada de su jornada (tabla ``horarios`` de su escuela, considerando el
+tipo de personal), el mismo criterio que marca "Registro tardío" al registrar.
+Las escrituras masivas con Core no pasan por estos eventos: después de una
+de ellas se debe llamar a ``sumar_insertadas()`` o ejecutar ``recalcular()``.
+"""
+
+from collections import Counter
+from datetime import date
+
+from flask import current_app
+from sqlalchemy import delete, event, func, inspect, select
+
+from app_simple import db
+from horarios import obtener_tabla
+from models.asistencia import Asistencia
+from models.contador_tardanza import ContadorTardanza
+from models.docente import Docente
+from sql_portable import upsert
+from utils import segundos_del_dia
+
+VENTANAS = ('mes', 'trimestre', 'anio')
+
+
+def periodo_de(fecha):
+    return fecha.year * 100 + fecha.month
+
+
+def es_tardanza(hora_entrada, jornada, tipo=None, escuela=None):
+    """True si la entrada es posterior a la ventana normal de su jornada."""
+    if hora_entrada is None:
+        return False
+    ventana = obtener_tabla(escuela).ventana(jornada, 'entrada', tipo)
+    return ventana is not None and segundos_del_dia(hora_entrada) > ventana.fin
+
+
+def _sumar(connection, escuela_id, docente_id, periodo, delta):
+    tabla = ContadorTardanza.__table__
+    upsert(connection, tabla,
+           {'escuela_id': escuela_id, 'docente_id': docente_id, 'periodo': periodo, 'tardanzas': max(delta, 0)},
+           ['docente_id', 'periodo'],
+           {'tardanzas': tabla.c.tardanzas + delta})
+
+
+def sumar_insertadas(connection, filas, tipos):
+    """Cuenta las tardanzas de asistencias insertadas sin el ORM.
+
+    Args:
+        filas: dicts con escuela_id, docente_id, fecha, jornada y hora_entrada
+        tipos: {docente_id: tipo de personal}
+    """
+    deltas = Counter()
+    for fila in filas:
+        if es_tardanza(fila.get('hora_entrada'), fila['jornada'], tipos.get(fila['docente_id']), fila['escuela_id']):
+            deltas[(fila['escuela_id'], fila['docente_id'], periodo_de(fila['fecha']))] += 1
+    for (escuela_id, docente_id, periodo), delta in deltas.items():
+        _sumar(connection, escuela_id, docente_id, periodo, delta)
+
+
+def _tipo_docente(connection, docente_id):
+    return connection.execute(select(Docente.tipo).where(Docente.id == docente_id)).scalar()
+
+
+def _anterior(target, campo):
+    historial = inspect(target).attrs[campo].history
+    if historial.deleted:
+        return historial.deleted[0]
+    return getattr(target, campo)
+
+
+@event.listens_for(Asistencia, 'after_insert')
+def _al_insertar(mapper, connection, target):
+    if target.hora_entrada is None:
+        return
+    if es_tardanza(target.hora_entrada, target.jornada, _tipo_docente(connection, target.docente_id),
+                   target.escuela_id):
+        _sumar(connection, target.escuela_id, target.docente_id, periodo_de(target.fecha), 1)
+
+
+# Campos de los que depende el contador: al asignarlos se carga el valor
+# anterior aunque el atributo esté expirado (p. ej. después de un commit),
+# para que ``_anterior`` no lo confunda con el nuevo
+_CAMPOS = ('hora_entrada', 'jornada', 'fecha', 'docente_id')
+for _campo in _CAMPOS:
+    event.listen(getattr(Asistencia, _campo), 'set', lambda *args: None, active_history=True)
+
+
+@event.listens_for(Asistencia, 'after_update')
+def _al_actualizar(mapper, connection, target):
+    estado = inspect(target)
+    if not any(estado.attrs[c].history.has_changes() for c in _CAMPOS):
+        return  # el caso común: registrar la salida
+
+    tipo = _tipo_docente(connection, target.docente_id)
+    docente_antes = _anterior(target, 'docente_id')
+    antes = es_tardanza(_anterior(target, 'hora_entrada'), _anterior(target, 'jornada'),
+                        tipo if docente_antes == target.docente_id else _tipo_docente(connection, docente_antes),
+                        target.escuela_id)
+    ahora = es_tardanza(target.hora_entrada, target.jornada, tipo, target.escuela_id)
+    periodo_antes = periodo_de(_anterior(target, 'fecha'))
+    periodo = periodo_de(target.fecha)
+
+    if antes and (not ahora or periodo_antes != periodo or docente_antes != target.docente_id):
+        _sumar(connection, target.escuela_id, docente_antes, periodo_antes, -1)
+    if ahora and (not antes or periodo_antes != periodo or docente_antes != target.docente_id):
+        _sumar(connection, target.escuela_id, target.docente_id, periodo, 1)
+
+
+@event.listens_for(Asistencia, 'after_delete')
+def _al_eliminar(mapper, connection, target):
+    if es_tardanza(target.hora_entrada, target.jornada, _tipo_docente(connection, target.docente_id),
+                   target.escuela_id):
+        _sumar(connection, target.escuela_id, target.docente_id, periodo_de(target.fecha), -1)
+
+
+@event.listens_for(Docente, 'after_delete')
+def _al_eliminar_docente(mapper, connection, target):
+    connection.execute(delete(ContadorTardanza.__table__).where(ContadorTardanza.docente_id == target.id))
+
+
+def rango_periodos(ventana='mes', hoy=None):
+    """(desde, hasta) en AAAAMM, ambos incluidos, para la ventana pedida.
+
+    - mes: el mes actual
+    - trimestre: el bloque de 3 meses del año lectivo que contiene ``hoy``
+    - anio: el año lectivo en curso
+    """
+    hoy = hoy or date.today()
+    if ventana == 'mes':
+        return periodo_de(hoy), periodo_de(hoy)
+
+    mes_inicio = current_app.config.get('ANIO_LECTIVO_MES_INICIO', 9)
+    # Meses transcurridos desde el inicio del año lectivo (0..11)
+    transcurridos = (hoy.month - mes_inicio) % 12
+    if ventana == 'trimestre':
+        inicio = transcurridos - transcurridos % 3
+        duracion = 3
+    elif ventana == 'anio':
+        inicio = 0
+        duracion = 12
+    else:
+        raise ValueError(f"Ventana no válida: {ventana}")
+
+    indice = hoy.year * 12 + (hoy.month - 1) - transcurridos + inicio
+    primero = (indice // 12) * 100 + indice % 12 + 1
+    indice += duracion - 1
+    ultimo = (indice // 12) * 100 + indice % 12 + 1
+    return primero, ultimo
+
+
+def ranking(ventana='mes', limite=5, hoy=None):
+    """Docentes con más tardanzas en la ventana: lista de (nombre, tardanzas)."""
+    desde, hasta = rango_periodos(ventana, hoy)
+    total = func.sum(ContadorTardanza.tardanzas).label('tardanzas')
+    return db.session.query(Docente.nombre, total).join(
+        ContadorTardanza, ContadorTardanza.docente_id == Docente.id
+    ).filter(
+        ContadorTardanza.periodo >= desde,
+        ContadorTardanza.periodo <= hasta
+    ).group_by(Docente.id, Docente.nombre).having(total > 0)\
+        .order_by(total.desc(), Docente.nombre).limit(limite).all()
+
+
+def recalcular():
+    """Reconstruye los contadores desde las asistencias (tras cargas masivas).
+
+    Returns:
+        int: cantidad de contadores escritos
+    """
+    conteos = {}
+    consulta = db.session.query(
+        Asistencia.escuela_id, Asistencia.docente_id, Asistencia.fecha, Asistencia.jornada, Asistencia.hora_entrada, Docente.tipo
+    ).join(Docente, Docente.id == Asistencia.docente_id).filter(Asistencia.hora_entrada.isnot(None))
+
+    for escuela_id, docente_id, fecha, jornada, hora_entrada, tipo in consulta.yield_per(5000):
+        if es_tardanza(hora_entrada, jornada, tipo, escuela_id):
+            clave = (escuela_id, docente_id, periodo_de(fecha))
+            conteos[clave] = conteos.get(clave, 0) + 1
+
+    db.session.execute(delete(ContadorTardanza.__table__))
+    if conteos:
+        db.session.execute(ContadorTardanza.__table__.insert(), [
+            {'escuela_id': e, 'docente_id': d, 'periodo': p, 'tardanzas': n} for (e, d, p), n in conteos.items()
+        ])
+    db.session.commit()
+    return len(conteos)
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Script para verificar el presupuesto de arranque de la aplicación
+
+Falla si create_app() carga dependencias pesadas que solo se usan al
+exportar (reportlab, openpyxl, pyarrow, qrcode, PIL, pandas) o si el
+arranque supera ARRANQUE_PRESUPUESTO_MS (por defecto 1500 ms).
+
+Uso:
+    python test_arranque.py
+    python -m pytest test_arranque.py
+"""
+
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+BENCHMARK = os.path.join(RAIZ, 'benchmarks', 'tiempo_arranque.py')
+
+PRESUPUESTO_MS = float(os.environ.get('ARRANQUE_PRESUPUESTO_MS', 1500))
+
+
+def test_arranque():
+    """El arranque respeta el presupuesto y no importa dependencias pesadas"""
+    resultado = subprocess.run(
+        [sys.executable, BENCHMARK, '--repeticiones', '3', '--presupuesto', str(PRESUPUESTO_MS)],
+        cwd=RAIZ, capture_output=True, text=True
+    )
+    print(resultado.stdout)
+
+    assert 'Dependencias pesadas cargadas' not in resultado.stdout, resultado.stdout
+    assert resultado.returncode == 0, resultado.stdout + resultado.stderr
+
+
+if __name__ == '__main__':
+    test_arranque()
+    print("Prueba completada!")
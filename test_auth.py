@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Pruebas del blueprint de autenticación con el cliente de pruebas de Flask
+
+Uso:
+    python -m pytest test_auth.py
+"""
+
+from models.usuario import Usuario
+
+
+def test_cambiar_password(cliente_admin, bd):
+    """current_user es una copia en caché: el cambio se guarda en el usuario real"""
+    respuesta = cliente_admin.post('/auth/change-password', data={
+        'current_password': 'admin123',
+        'new_password': 'nueva123',
+        'confirm_password': 'nueva123',
+    })
+    assert respuesta.status_code == 302
+
+    bd.session.expire_all()
+    usuario = Usuario.query.filter_by(username='admin').one()
+    assert usuario.check_password('nueva123')
+    assert not usuario.check_password('admin123')
+
+
+def test_cambiar_password_actual_incorrecta(cliente_admin, bd):
+    respuesta = cliente_admin.post('/auth/change-password', data={
+        'current_password': 'otra',
+        'new_password': 'nueva123',
+        'confirm_password': 'nueva123',
+    })
+    assert respuesta.status_code == 200
+    assert Usuario.query.filter_by(username='admin').one().check_password('admin123')
+
+
+def test_login_registra_auditoria(cliente_admin, bd):
+    """Un inicio de sesión real deja su fila en la tabla de auditoría"""
+    from auditoria import buffer
+    from models.auditoria import Auditoria
+
+    buffer.vaciar()
+    registro = Auditoria.query.filter_by(accion='auth.login').one()
+    assert registro.usuario == 'admin'
+    assert registro.entidad == 'usuario'
+    assert registro.entidad_id == Usuario.query.filter_by(username='admin').one().id
+
+
+def test_consulta_auditoria(cliente_admin, bd):
+    cliente_admin.get('/auth/logout')
+    cliente_admin.post('/auth/login', data={'username': 'admin', 'password': 'admin123'})
+
+    respuesta = cliente_admin.get('/auth/auditoria?usuario=admin')
+    assert respuesta.status_code == 200
+    acciones = [r['accion'] for r in respuesta.get_json()]
+    assert acciones.count('auth.login') == 2
+    assert 'auth.logout' in acciones
+
+    assert cliente_admin.get('/auth/auditoria?desde=ayer').status_code == 400
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Pruebas del GET condicional (condicional.py)
+
+Uso:
+    python -m pytest test_condicional.py
+"""
+
+from datetime import date, datetime, time, timedelta
+
+import versiones
+from models.asistencia import Asistencia
+from models.docente import Docente
+
+
+def _dia_laborable():
+    dia = date.today() - timedelta(days=1)
+    while dia.weekday() >= 5:
+        dia -= timedelta(days=1)
+    return dia
+
+
+def test_etag_sigue_a_los_datos_de_otro_worker(cliente_admin, bd):
+    """Con CONDICIONAL_VENTANA = 0 un ETag viejo no recibe 304 si otro worker escribió"""
+    dia = _dia_laborable()
+    docente = Docente(nombre='Docente Etag', cedula='0102030405', telefono='0999999999',
+                      correo='etag@escuela.ec', jornada='matutina', tipo='DOCENTE',
+                      fecha_creacion=datetime(2020, 1, 1))
+    bd.session.add(docente)
+    bd.session.commit()
+    url = f'/reportes/faltas?fecha={dia}&formato=csv'
+
+    primera = cliente_admin.get(url)
+    assert primera.status_code == 200
+    assert '0102030405' in primera.get_data(as_text=True)
+    etag = primera.headers['ETag']
+
+    assert cliente_admin.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    # Otro worker registra la asistencia y sube la versión con su conexión
+    with bd.engine.begin() as conexion:
+        conexion.execute(Asistencia.__table__.insert().values(
+            docente_id=docente.id, fecha=dia, jornada='matutina', hora_entrada=time(7, 5), modo='presencial'))
+        versiones.incrementar(conexion, 'asistencias')
+    versiones.invalidar()  # como si hubiera pasado VERSIONES_RECARGA_SEGUNDOS
+
+    segunda = cliente_admin.get(url, headers={'If-None-Match': etag})
+    assert segunda.status_code == 200
+    assert segunda.headers['ETag'] != etag
+    assert '0102030405' not in segunda.get_data(as_text=True)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la vigencia del cubo de asistencias (cubo_asistencia.py)
+
+Uso:
+    python -m pytest test_cubo_asistencia.py
+"""
+
+from datetime import date, time, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, update
+
+import versiones
+from cubo_asistencia import invalidar_en_sesion, obtener_cubo, seleccionar
+from models.asistencia import Asistencia
+from models.docente import Docente
+from utils import anio_lectivo_de
+
+HOY = date.today()
+
+
+def _anio():
+    return anio_lectivo_de(HOY, current_app.config.get('ANIO_LECTIVO_MES_INICIO', 9))
+
+
+def _docente(bd):
+    docente = Docente(nombre='Docente Cubo', cedula='0102030405', telefono='0999999999',
+                      correo='cubo@escuela.ec', jornada='matutina', tipo='DOCENTE')
+    bd.session.add(docente)
+    bd.session.commit()
+    return docente
+
+
+def _ids():
+    return sorted(seleccionar(HOY, HOY + timedelta(days=1))['id'].tolist())
+
+
+def test_commit_local_actualiza_sin_reconstruir(bd):
+    docente = _docente(bd)
+    cubo = obtener_cubo(_anio())
+    assert _ids() == []
+
+    asistencia = Asistencia(docente_id=docente.id, fecha=HOY, jornada='matutina', hora_entrada=time(7, 5))
+    bd.session.add(asistencia)
+    bd.session.commit()
+
+    assert obtener_cubo(_anio()) is cubo
+    assert cubo.version == versiones.version_de('asistencias')
+    assert _ids() == [asistencia.id]
+
+
+def test_cambio_de_otro_proceso_reconstruye(bd):
+    docente = _docente(bd)
+    cubo = obtener_cubo(_anio())
+
+    # Otro worker: escribe y sube la versión con su propia conexión
+    with bd.engine.begin() as conexion:
+        resultado = conexion.execute(Asistencia.__table__.insert().values(
+            docente_id=docente.id, fecha=HOY, jornada='matutina', hora_entrada=time(7, 5), modo='presencial'))
+        versiones.incrementar(conexion, 'asistencias')
+    versiones.invalidar()  # como si hubiera pasado VERSIONES_RECARGA_SEGUNDOS
+
+    assert obtener_cubo(_anio()) is not cubo
+    assert _ids() == [resultado.inserted_primary_key[0]]
+
+
+def test_insercion_con_core_descarta_el_cubo_al_confirmar(bd):
+    docente = _docente(bd)
+    cubo = obtener_cubo(_anio())
+
+    bd.session.connection().execute(Asistencia.__table__.insert().values(
+        docente_id=docente.id, fecha=HOY, jornada='matutina', hora_entrada=time(7, 5), modo='presencial'))
+    versiones.incrementar_en_sesion(bd.session, 'asistencias')
+    invalidar_en_sesion(bd.session, {HOY})
+    assert obtener_cubo(_anio()) is cubo  # aún sin confirmar
+    bd.session.commit()
+
+    assert obtener_cubo(_anio()) is not cubo
+    assert len(_ids()) == 1
+
+
+def test_update_masivo_reconstruye_el_cubo(bd):
+    docente = _docente(bd)
+    asistencia = Asistencia(docente_id=docente.id, fecha=HOY, jornada='matutina', hora_entrada=time(7, 5))
+    bd.session.add(asistencia)
+    bd.session.commit()
+    cubo = obtener_cubo(_anio())
+    assert _ids() == [asistencia.id]
+
+    bd.session.execute(update(Asistencia).where(Asistencia.id == asistencia.id)
+                       .values(fecha=HOY - timedelta(days=400)))
+    bd.session.commit()
+
+    assert obtener_cubo(_anio()) is not cubo
+    assert _ids() == []
+
+
+def test_delete_masivo_reconstruye_el_cubo(bd):
+    docente = _docente(bd)
+    bd.session.add(Asistencia(docente_id=docente.id, fecha=HOY, jornada='matutina', hora_entrada=time(7, 5)))
+    bd.session.commit()
+    cubo = obtener_cubo(_anio())
+    assert len(_ids()) == 1
+
+    bd.session.execute(delete(Asistencia).where(Asistencia.docente_id == docente.id))
+    bd.session.commit()
+
+    assert obtener_cubo(_anio()) is not cubo
+    assert _ids() == []
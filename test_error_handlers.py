@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Pruebas del logging en cola (error_handlers.py)
+
+Uso:
+    python -m pytest test_error_handlers.py
+"""
+
+import json
+import logging
+import queue
+import sys
+
+from flask import Flask
+
+import error_handlers
+from error_handlers import ColaHandler, FormateadorJSON
+
+
+def _registro(msg, *args, exc_info=None):
+    return logging.LogRecord('pruebas', logging.ERROR, __file__, 1, msg, args, exc_info)
+
+
+def test_el_mensaje_se_resuelve_al_encolar():
+    cola = queue.SimpleQueue()
+    datos = ['antes']
+    ColaHandler(cola).handle(_registro('valores %s', datos))
+    datos.append('después')
+
+    encolado = cola.get_nowait()
+    assert encolado.args is None
+    assert json.loads(FormateadorJSON().format(encolado))['message'] == "valores ['antes']"
+
+
+def test_el_traceback_se_formatea_al_encolar():
+    cola = queue.SimpleQueue()
+    try:
+        raise ValueError('falla')
+    except ValueError:
+        ColaHandler(cola).handle(_registro('error', exc_info=sys.exc_info()))
+
+    encolado = cola.get_nowait()
+    assert encolado.exc_info is None
+    assert 'ValueError: falla' in json.loads(FormateadorJSON().format(encolado))['traceback']
+
+
+def test_varias_apps_dejan_un_solo_listener(tmp_path):
+    raiz = logging.getLogger()
+    handlers, nivel = list(raiz.handlers), raiz.level
+    app = Flask(__name__, instance_path=str(tmp_path / 'instance'))
+    app.debug = False
+    try:
+        error_handlers.setup_logging(app)
+        primero = error_handlers._listener
+        error_handlers.setup_logging(app)  # otra create_app()
+        assert error_handlers._listener is not primero
+        assert sum(isinstance(h, ColaHandler) for h in raiz.handlers) == 1
+    finally:
+        error_handlers._detener_listener()  # lo que hace atexit al salir
+        error_handlers._detener_listener()
+        raiz.handlers[:] = handlers
+        raiz.setLevel(nivel)
+    assert error_handlers._listener is None
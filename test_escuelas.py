@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la separación entre escuelas (escuelas.py)
+
+Uso:
+    python -m pytest test_escuelas.py
+"""
+
+from datetime import date, time, timedelta
+
+import pytest
+
+from calendario import feriados
+from horarios import validar_horario
+from models.contador_tardanza import ContadorTardanza
+from models.docente import Docente
+from models.escuela import Escuela
+from models.licencia import Licencia
+from models.usuario import Usuario
+
+
+@pytest.fixture
+def dos_escuelas(bd):
+    """Un docente con licencia en cada escuela y un usuario de la escuela 2."""
+    bd.session.add(Escuela(id=2, nombre='Escuela Dos', activa=True))
+    for escuela, cedula in ((1, '0102030405'), (2, '0102030406')):
+        docente = Docente(nombre=f'Docente Escuela {escuela}', cedula=cedula, telefono='0999999999',
+                          correo=f'escuela{escuela}@escuela.ec', jornada='matutina', tipo='DOCENTE',
+                          escuela_id=escuela)
+        bd.session.add(docente)
+        bd.session.flush()
+        bd.session.add(Licencia(docente_id=docente.id, fecha_inicio=date.today(),
+                                fecha_fin=date.today() + timedelta(days=5), motivo=f'Motivo escuela {escuela}',
+                                estado='aprobada'))
+    usuario = Usuario(username='admin2', rol='admin', escuela_id=2)
+    usuario.set_password('admin123')
+    bd.session.add(usuario)
+    bd.session.commit()
+
+
+@pytest.mark.parametrize('ruta', [
+    '/docentes/', '/licencias/', '/licencias/activas',
+    '/reportes/faltas', '/reportes/consolidado', '/dashboard/',
+    '/asistencia/asistencia/reportes', '/asistencia/generar_qr/1',
+])
+def test_sin_sesion_pide_iniciarla(cliente, dos_escuelas, ruta):
+    respuesta = cliente.get(ruta)
+    assert respuesta.status_code == 302
+    assert '/auth/login' in respuesta.headers['Location']
+
+
+def test_registro_por_qr_sin_sesion(cliente, dos_escuelas):
+    assert cliente.get('/asistencia/').status_code == 200
+    respuesta = cliente.post('/asistencia/registrar', json={
+        'idDocente': 1, 'tipo': 'Entrada', 'fecha': '2025-10-07 07:10:00', 'idDispositivo': 'lector-1',
+    })
+    assert respuesta.get_json()['status'] == 'ok'
+
+
+def _iniciar_sesion_escuela_2(cliente):
+    respuesta = cliente.post('/auth/login', data={'username': 'admin2', 'password': 'admin123'})
+    assert respuesta.status_code == 302
+    cliente.get(respuesta.headers['Location'])
+
+
+def test_cada_usuario_ve_solo_su_escuela(cliente, dos_escuelas):
+    _iniciar_sesion_escuela_2(cliente)
+
+    docentes = cliente.get('/docentes/').get_data(as_text=True)
+    assert 'Docente Escuela 2' in docentes
+    assert 'Docente Escuela 1' not in docentes
+
+    licencias = cliente.get('/licencias/').get_data(as_text=True)
+    assert 'Motivo escuela 2' in licencias
+    assert 'Motivo escuela 1' not in licencias
+
+
+def test_lista_de_los_lectores_por_escuela(cliente, dos_escuelas):
+    def nombres(ruta):
+        respuesta = cliente.get(ruta)
+        assert respuesta.status_code == 200
+        return [d['nombre'] for d in respuesta.get_json()]
+
+    assert nombres('/docentes/api/lista') == ['Docente Escuela 1']  # lectores antiguos
+    assert nombres('/docentes/api/lista?escuela=2') == ['Docente Escuela 2']
+    assert cliente.get('/docentes/api/lista?escuela=9').status_code == 404
+    assert cliente.get('/docentes/api/lista?escuela=x').status_code == 400
+
+
+def test_horarios_por_escuela(cliente, bd, dos_escuelas):
+    _iniciar_sesion_escuela_2(cliente)
+    respuesta = cliente.post('/asistencia/horarios', json={'jornada': 'matutina', 'entrada_fin': '09:00'})
+    assert respuesta.status_code == 200
+
+    assert validar_horario(time(8, 45), 'matutina', escuela=2) == (True, 'Horario válido', False)
+    assert validar_horario(time(8, 45), 'matutina', escuela=1)[2]  # tardío
+
+    # Los lectores marcan sin sesión: cuenta la ventana de la escuela de cada docente
+    cliente.get('/auth/logout')
+    for docente_id in (1, 2):
+        respuesta = cliente.post('/asistencia/registrar', json={
+            'idDocente': docente_id, 'tipo': 'Entrada', 'fecha': '2025-10-07 08:45:00',
+        })
+        assert respuesta.get_json()['status'] == 'ok'
+    bd.session.expire_all()
+    contadores = ContadorTardanza.query.execution_options(todas_las_escuelas=True)
+    assert [(c.docente_id, c.tardanzas) for c in contadores] == [(1, 1)]
+
+
+def test_feriados_por_escuela(cliente, dos_escuelas):
+    _iniciar_sesion_escuela_2(cliente)
+    respuesta = cliente.post('/asistencia/feriados', json={'fecha': '2025-10-09', 'descripcion': 'Fiestas'})
+    assert respuesta.status_code == 200
+    assert [f['fecha'] for f in cliente.get('/asistencia/feriados').get_json()] == ['2025-10-09']
+
+    nueve = date(2025, 10, 9).toordinal()
+    assert nueve in feriados(2)
+    assert nueve not in feriados(1)
+
+
+def test_auditoria_por_escuela(app, cliente_admin, dos_escuelas):
+    otro = app.test_client()
+    _iniciar_sesion_escuela_2(otro)
+
+    def usuarios(cliente):
+        respuesta = cliente.get('/auth/auditoria')
+        assert respuesta.status_code == 200
+        return {r['usuario'] for r in respuesta.get_json()}
+
+    assert usuarios(otro) == {'admin2'}
+    assert usuarios(cliente_admin) == {'admin'}
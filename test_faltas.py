@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Pruebas del cálculo de faltas (faltas.py)
+
+Uso:
+    python -m pytest test_faltas.py
+"""
+
+from datetime import date, datetime, time, timedelta
+
+from faltas import calcular_faltas, ranking_recientes
+from models.asistencia import Asistencia
+from models.docente import Docente
+from models.licencia import Licencia
+
+# Semana sin feriados: lunes 6 a viernes 10 de octubre de 2025
+LUNES = date(2025, 10, 6)
+VIERNES = date(2025, 10, 10)
+
+
+def _docente(bd, cedula, alta=datetime(2025, 1, 1), jornada='matutina'):
+    docente = Docente(nombre=f'Docente {cedula}', cedula=cedula, telefono='0999999999',
+                      correo=f'{cedula}@escuela.ec', jornada=jornada, tipo='DOCENTE',
+                      fecha_creacion=alta)
+    bd.session.add(docente)
+    bd.session.commit()
+    return docente
+
+
+def _asistencia(bd, docente, fecha, jornada='matutina', estado='pendiente'):
+    bd.session.add(Asistencia(docente_id=docente.id, fecha=fecha, jornada=jornada,
+                              hora_entrada=time(7, 5), estado=estado))
+    bd.session.commit()
+
+
+def _licencia(bd, docente, inicio, fin, estado='aprobada'):
+    bd.session.add(Licencia(docente_id=docente.id, fecha_inicio=inicio, fecha_fin=fin, estado=estado))
+    bd.session.commit()
+
+
+def _semana(**kwargs):
+    return calcular_faltas(LUNES, VIERNES + timedelta(days=1), **kwargs)
+
+
+def test_roster_desde_la_fecha_de_alta(bd):
+    """El día de alta ya cuenta; los anteriores no"""
+    docente = _docente(bd, '0102030405', alta=datetime(2025, 10, 8, 10, 30))  # miércoles
+    faltas = _semana()
+    assert faltas.por_docente == {docente.id: 3}
+    assert sorted(faltas.por_dia) == [date(2025, 10, 8), date(2025, 10, 9), VIERNES]
+
+
+def test_roster_por_jornada(bd):
+    """Un docente de jornada doble espera dos turnos; el registro de otra jornada no cubre el turno"""
+    doble = _docente(bd, '0102030405', jornada='doble')
+    matutino = _docente(bd, '0102030406')
+    _asistencia(bd, doble, LUNES, 'matutina')
+    _asistencia(bd, doble, LUNES, 'vespertina')
+    _asistencia(bd, matutino, LUNES, 'vespertina')
+    _asistencia(bd, matutino, date(2025, 10, 7), 'matutina', estado='ausente')
+
+    faltas = _semana()
+    assert faltas.por_docente == {doble.id: 8, matutino.id: 5}
+    assert _semana(jornada='matutina').por_docente == {matutino.id: 5}
+
+
+def test_licencias_aprobadas_excluyen_todos_los_turnos(bd):
+    doble = _docente(bd, '0102030405', jornada='doble')
+    matutino = _docente(bd, '0102030406')
+    _licencia(bd, doble, date(2025, 10, 7), date(2025, 10, 8))
+    _licencia(bd, matutino, date(2025, 10, 1), LUNES)  # empezó antes del rango
+    _licencia(bd, matutino, date(2025, 10, 9), VIERNES, estado='pendiente')
+
+    faltas = _semana()
+    assert faltas.por_docente == {doble.id: 6, matutino.id: 4}
+    assert faltas.por_dia[date(2025, 10, 7)] == 1
+
+
+def test_ranking_recientes_respeta_la_fecha_de_alta(bd):
+    """Como el reporte: antes de su alta un docente no tiene faltas"""
+    antiguo = _docente(bd, '0102030405')
+    _docente(bd, '0102030406', alta=datetime(2025, 10, 9, 10, 30))  # jueves
+    _asistencia(bd, antiguo, LUNES)
+
+    assert ranking_recientes(VIERNES, dias=5) == [
+        ('Docente 0102030405', 4),
+        ('Docente 0102030406', 2),
+    ]
+    assert ranking_recientes(VIERNES, dias=5, limite=1) == [('Docente 0102030405', 4)]
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Pruebas de las ventanas de registro (horarios.py) y de /asistencia/horarios
+
+Uso:
+    python -m pytest test_horarios.py
+"""
+
+from datetime import time
+
+import pytest
+
+from horarios import validar_horario
+from models.horario import Horario
+
+
+def _guardar(cliente, **datos):
+    return cliente.post('/asistencia/horarios', json=datos)
+
+
+def test_guardar_horario_cambia_la_validacion(cliente_admin, bd):
+    es_valido, _, es_tardio = validar_horario(time(8, 45), 'matutina')
+    assert es_valido and es_tardio
+
+    respuesta = _guardar(cliente_admin, jornada='matutina', entrada_fin='09:00')
+    assert respuesta.status_code == 200
+    assert validar_horario(time(8, 45), 'matutina') == (True, 'Horario válido', False)
+
+
+@pytest.mark.parametrize('datos', [
+    {'jornada': 'nocturna'},
+    {'jornada': 'matutina', 'tipo': 'VISITANTE'},
+    {'jornada': 'matutina', 'entrada_inicio': '09:00', 'entrada_fin': '08:00'},
+    {'jornada': 'matutina', 'salida_inicio': '13:30'},  # igual a salida_fin
+    {'jornada': 'matutina', 'entrada_limite': '08:00'},  # antes de entrada_fin
+    {'jornada': 'vespertina', 'salida_fin': '19:30'},  # pasa el límite de 19:00
+])
+def test_guardar_horario_invalido(cliente_admin, bd, datos):
+    respuesta = _guardar(cliente_admin, **datos)
+    assert respuesta.status_code == 400
+    assert respuesta.get_json()['status'] == 'error'
+    assert Horario.query.count() == 0
+    assert validar_horario(time(7, 30), 'matutina')[0]
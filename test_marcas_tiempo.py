@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la lectura de fechas y horas de los lectores (marcas_tiempo.py)
+
+Uso:
+    python -m pytest test_marcas_tiempo.py
+"""
+
+from datetime import date, datetime, time
+
+import pytest
+
+from marcas_tiempo import (FORMATO_FECHA, FORMATO_FECHA_HORA, FORMATO_HORA,
+                           fecha_de, fecha_hora_de, hora_de)
+
+FECHAS = ['2025-10-07', '2025-1-5', '2025-02-30', '2025/10/07', '20251007', '2025-10-07 ',
+          ' 2025-10-07', '2025-W41-2', '２０２５-10-07', '']
+HORAS = ['07:05:00', '7:05:00', '07:05', '24:00:00', '07:05:00.5', '07:05:00.123456',
+         '07:05:00+00:00', '07:05:00Z', '07-05-00', '']
+FECHAS_HORAS = ['2025-10-07 07:05:00', '2025-10-07T07:05:00', '2025-1-5 7:05:00',
+                '2025-10-07 07:05:00.250', '2025-10-07 07:05:00+00:00', '2025-10-07T12:05:00Z',
+                '2025-10-07 07:05', '2025-10-07  07:05:00', '2025-02-30 07:05:00', '']
+
+
+def _strptime(texto, formato):
+    try:
+        return datetime.strptime(texto, formato)
+    except ValueError:
+        return ValueError
+
+
+def _resultado(funcion, texto):
+    try:
+        return funcion(texto)
+    except ValueError:
+        return ValueError
+
+
+@pytest.mark.parametrize('texto', FECHAS)
+def test_fecha_como_strptime(texto):
+    esperado = _strptime(texto, FORMATO_FECHA)
+    assert _resultado(fecha_de, texto) == (esperado if esperado is ValueError else esperado.date())
+
+
+@pytest.mark.parametrize('texto', HORAS)
+def test_hora_como_strptime(texto):
+    esperado = _strptime(texto, FORMATO_HORA)
+    assert _resultado(hora_de, texto) == (esperado if esperado is ValueError else esperado.time())
+
+
+@pytest.mark.parametrize('texto', FECHAS_HORAS)
+def test_fecha_hora_como_strptime(texto):
+    assert _resultado(fecha_hora_de, texto) == _strptime(texto, FORMATO_FECHA_HORA)
+
+
+def test_formatos_aceptados():
+    assert fecha_de('2025-10-07') == date(2025, 10, 7)
+    assert fecha_de('2025-1-5') == date(2025, 1, 5)  # lectores antiguos
+    assert hora_de('7:05:00') == time(7, 5)
+    assert fecha_hora_de('2025-10-07 07:05:00') == datetime(2025, 10, 7, 7, 5)
+    assert fecha_hora_de('2025-1-5 7:05:00') == datetime(2025, 1, 5, 7, 5)
+
+
+@pytest.mark.parametrize('funcion, texto', [
+    (hora_de, '07:05:00.5'),  # fracciones de segundo
+    (hora_de, '07:05:00Z'),  # zona horaria
+    (fecha_hora_de, '2025-10-07T07:05:00'),  # separador ISO
+    (fecha_hora_de, '2025-10-07 07:05:00.250'),
+    (fecha_hora_de, '2025-10-07 07:05:00+00:00'),
+    (fecha_hora_de, '2025-10-07T12:05:00Z'),
+    (fecha_de, '2025-02-30'),
+    (fecha_de, '2025-W41-2'),
+])
+def test_formatos_rechazados(funcion, texto):
+    with pytest.raises(ValueError):
+        funcion(texto)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Pruebas de las migraciones (migrations/) sobre SQLite
+
+Cada prueba corre ``flask db`` en otro proceso contra una base temporal y
+compara el esquema resultante con los modelos.
+
+Uso:
+    python -m pytest test_migraciones.py
+"""
+
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+import sqlalchemy as sa
+
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+BASE_ANTIGUA = os.path.join(RAIZ, 'instance', 'asistencia.db')
+REVISION_BASE = '29ec11e6bffa'
+
+
+def _flask_db(ruta, *argumentos):
+    entorno = dict(os.environ, DATABASE_URL=f'sqlite:///{ruta}', CACHE_TIPO='memoria',
+                   JINJA_CACHE_DIR=os.path.join(os.path.dirname(ruta), 'jinja'),
+                   ARCHIVO_HISTORICO_DIR=os.path.dirname(ruta))
+    resultado = subprocess.run(
+        [sys.executable, '-m', 'flask', '--app', 'migraciones', 'db', *argumentos],
+        cwd=RAIZ, env=entorno, capture_output=True, text=True
+    )
+    assert resultado.returncode == 0, resultado.stderr
+
+
+def _diferencias(ruta):
+    """Diferencias entre la base y los modelos (vacío = al día)."""
+    import models  # noqa: F401
+    from app_simple import db
+
+    motor = sa.create_engine(f'sqlite:///{ruta}')
+    try:
+        with motor.connect() as conexion:
+            contexto = MigrationContext.configure(conexion, opts={'compare_type': True})
+            return compare_metadata(contexto, db.metadata)
+    finally:
+        motor.dispose()
+
+
+def _restricciones(ruta, tabla):
+    with sqlite3.connect(ruta) as conexion:
+        return conexion.execute("SELECT sql FROM sqlite_master WHERE name = ?", (tabla,)).fetchone()[0]
+
+
+@pytest.fixture
+def base_antigua(tmp_path):
+    """Copia de la base versionada, creada con create_all() antes de las migraciones."""
+    ruta = str(tmp_path / 'asistencia.db')
+    shutil.copy(BASE_ANTIGUA, ruta)
+    return ruta
+
+
+def test_base_vacia(tmp_path):
+    ruta = str(tmp_path / 'nueva.db')
+    _flask_db(ruta, 'upgrade')
+    assert _diferencias(ruta) == []
+
+
+def test_bajar_hasta_la_base_y_volver(tmp_path):
+    ruta = str(tmp_path / 'nueva.db')
+    _flask_db(ruta, 'upgrade')
+    _flask_db(ruta, 'downgrade', REVISION_BASE)
+    _flask_db(ruta, 'upgrade')
+    assert _diferencias(ruta) == []
+
+
+def test_base_antigua_marcada_en_la_revision_base(base_antigua):
+    _flask_db(base_antigua, 'stamp', REVISION_BASE)
+    _flask_db(base_antigua, 'upgrade')
+
+    assert _diferencias(base_antigua) == []
+    assert 'ck_licencia_fechas_validas' in _restricciones(base_antigua, 'licencias')
+    with sqlite3.connect(base_antigua) as conexion:
+        assert conexion.execute('SELECT id FROM escuelas').fetchall() == [(1,)]
+        assert conexion.execute('SELECT DISTINCT escuela_id FROM docentes').fetchall() == [(1,)]
+
+
+def test_base_antigua_con_tablas_de_create_all(base_antigua):
+    """run.py ya creó con create_all() las tablas nuevas, pero no las columnas"""
+    import models  # noqa: F401
+    from app_simple import db
+
+    motor = sa.create_engine(f'sqlite:///{base_antigua}')
+    db.metadata.create_all(motor)
+    motor.dispose()
+
+    _flask_db(base_antigua, 'stamp', REVISION_BASE)
+    _flask_db(base_antigua, 'upgrade')
+    assert _diferencias(base_antigua) == []
+    with sqlite3.connect(base_antigua) as conexion:
+        assert conexion.execute('SELECT id FROM escuelas').fetchall() == [(1,)]
+
+
+def test_base_antigua_con_asistencias_repetidas(base_antigua):
+    with sqlite3.connect(base_antigua) as conexion:
+        docente_id, = conexion.execute('SELECT id FROM docentes').fetchone()
+        conexion.executemany(
+            "INSERT INTO asistencias (docente_id, fecha, jornada, modo) VALUES (?, '2025-10-07', 'matutina', 'presencial')",
+            [(docente_id,), (docente_id,)]
+        )
+
+    _flask_db(base_antigua, 'stamp', REVISION_BASE)
+    with pytest.raises(AssertionError, match='tienen más de una asistencia'):
+        _flask_db(base_antigua, 'upgrade')
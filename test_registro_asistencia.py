@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la marcación de entrada y salida (registro_asistencia.py) a
+través de /asistencia/registrar
+
+Uso:
+    python -m pytest test_registro_asistencia.py
+"""
+
+from datetime import date, time
+
+import pytest
+
+from models.asistencia import Asistencia
+from models.contador_tardanza import ContadorTardanza
+from models.docente import Docente
+
+FECHA = date(2025, 10, 7)
+
+
+@pytest.fixture
+def docente(bd):
+    docente = Docente(nombre='Docente Registro', cedula='0102030405', telefono='0999999999',
+                      correo='registro@escuela.ec', jornada='matutina', tipo='DOCENTE')
+    bd.session.add(docente)
+    bd.session.commit()
+    return docente
+
+
+def _marcar(cliente, docente, tipo, hora):
+    respuesta = cliente.post('/asistencia/registrar', json={
+        'idDocente': docente.id, 'tipo': tipo, 'fecha': f'{FECHA} {hora}', 'idDispositivo': 'lector-1',
+    })
+    assert respuesta.status_code == 200
+    return respuesta.get_json()
+
+
+def _registros(bd):
+    bd.session.expire_all()
+    return [(a.jornada, a.hora_entrada, a.hora_salida) for a in Asistencia.query.filter_by(fecha=FECHA)]
+
+
+def test_entrada_repetida_no_cambia_el_registro(cliente, bd, docente):
+    assert _marcar(cliente, docente, 'Entrada', '07:10:00')['status'] == 'ok'
+
+    repetida = _marcar(cliente, docente, 'Entrada', '07:20:00')
+    assert repetida['status'] == 'warning'
+    assert 'ENTRADA a las 07:10:00' in repetida['mensaje']
+    assert _registros(bd) == [('matutina', time(7, 10), None)]
+
+
+def test_entrada_repetida_sin_on_conflict(cliente, bd, docente, monkeypatch):
+    """Motores sin INSERT ... ON CONFLICT: UPDATE y, si no había registro, INSERT"""
+    import registro_asistencia
+    monkeypatch.setattr(registro_asistencia, 'insert_dialecto', lambda conexion, tabla: None)
+
+    assert _marcar(cliente, docente, 'Entrada', '07:10:00')['status'] == 'ok'
+    assert _marcar(cliente, docente, 'Entrada', '07:20:00')['status'] == 'warning'
+    assert _registros(bd) == [('matutina', time(7, 10), None)]
+
+
+def test_entrada_tardia_cuenta_una_sola_vez(cliente, bd, docente):
+    assert _marcar(cliente, docente, 'Entrada', '08:45:00')['status'] == 'ok'
+    assert _marcar(cliente, docente, 'Entrada', '08:50:00')['status'] == 'warning'
+
+    bd.session.expire_all()
+    assert [(c.periodo, c.tardanzas) for c in ContadorTardanza.query] == [(202510, 1)]
+
+
+def test_salida_sin_entrada(cliente, bd, docente):
+    respuesta = _marcar(cliente, docente, 'Salida', '12:45:00')
+    assert respuesta['status'] == 'warning'
+    assert 'no tiene una ENTRADA' in respuesta['mensaje']
+    assert _registros(bd) == []
+
+
+def test_salida_repetida_no_cambia_el_registro(cliente, bd, docente):
+    _marcar(cliente, docente, 'Entrada', '07:10:00')
+    salida = _marcar(cliente, docente, 'Salida', '12:45:00')
+    assert salida['status'] == 'ok'
+    assert salida['jornada'] == 'matutina'
+
+    repetida = _marcar(cliente, docente, 'Salida', '12:55:00')
+    assert repetida['status'] == 'warning'
+    assert 'SALIDA a las 12:45:00' in repetida['mensaje']
+    assert _registros(bd) == [('matutina', time(7, 10), time(12, 45))]
+
+
+def test_tipo_desconocido(cliente, docente):
+    respuesta = cliente.post('/asistencia/registrar', json={
+        'idDocente': docente.id, 'tipo': 'Pausa', 'fecha': f'{FECHA} 07:10:00',
+    })
+    assert respuesta.status_code == 400
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Pruebas del blueprint de reportes con el cliente de pruebas de Flask
+
+Uso:
+    python -m pytest test_reportes.py
+"""
+
+import gzip
+import io
+import zipfile
+
+from datetime import date, time
+
+from sqlalchemy import text
+
+from archivo_historico import asistencias_historico
+from models.asistencia import Asistencia
+from models.docente import Docente
+
+
+def test_exportar_historial_incluye_hasta(cliente_admin, bd):
+    """?hasta= se incluye, como en los demás reportes"""
+    docente = Docente(nombre='Docente Historial', cedula='0102030405', telefono='0999999999',
+                      correo='historial@escuela.ec', jornada='matutina', tipo='DOCENTE')
+    bd.session.add(docente)
+    bd.session.flush()
+    for dia in (9, 10, 11):
+        bd.session.add(Asistencia(docente_id=docente.id, fecha=date(2025, 10, dia),
+                                  jornada='matutina', hora_entrada=time(7, 5)))
+    bd.session.commit()
+
+    respuesta = cliente_admin.get('/reportes/exportar/historial?desde=2025-10-09&hasta=2025-10-10&formato=csv')
+    assert respuesta.status_code == 200
+
+    with zipfile.ZipFile(io.BytesIO(respuesta.data)) as zf:
+        nombre, = zf.namelist()
+        lineas = gzip.decompress(zf.read(nombre)).decode('utf-8-sig').splitlines()
+    assert len(lineas) == 3  # encabezado + 9 y 10 de octubre
+    assert '2025-10-10' in lineas[2]
+
+
+def test_asistencia_diaria_de_un_anio_archivado(cliente_admin, bd, app, tmp_path, monkeypatch):
+    """Las fechas de un año archivado se leen de la vista histórica"""
+    # El archivo del año 2023-2024 y, en lugar de la vista temporal que
+    # crea cada conexión, una tabla con el mismo nombre
+    (tmp_path / 'archivo_2023.db').touch()
+    monkeypatch.setitem(app.config, 'ARCHIVO_HISTORICO_ACTIVO', True)
+    monkeypatch.setitem(app.config, 'ARCHIVO_HISTORICO_DIR', str(tmp_path))
+    bd.session.execute(text('CREATE TABLE asistencias_historico AS SELECT * FROM asistencias WHERE 0'))
+
+    try:
+        docente = Docente(nombre='Docente Archivado', cedula='0102030405', telefono='0999999999',
+                          correo='archivado@escuela.ec', jornada='matutina', tipo='DOCENTE')
+        bd.session.add(docente)
+        bd.session.flush()
+        bd.session.execute(asistencias_historico.insert().values(
+            id=1, escuela_id=1, docente_id=docente.id, fecha=date(2024, 3, 5),
+            jornada='matutina', hora_entrada=time(7, 5), modo='presencial'))
+        bd.session.commit()
+
+        respuesta = cliente_admin.get('/reportes/asistencia-diaria?fecha=2024-03-05&formato=csv')
+        csv = respuesta.get_data(as_text=True)  # se genera al leerlo
+    finally:
+        bd.session.rollback()
+        bd.session.execute(text('DROP TABLE asistencias_historico'))
+        bd.session.commit()
+
+    assert respuesta.status_code == 200
+    lineas = csv.lstrip('\ufeff').splitlines()
+    assert len(lineas) == 2
+    assert 'Docente Archivado' in lineas[1]
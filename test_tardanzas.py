@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Pruebas de los contadores de tardanzas (tardanzas.py)
+
+Uso:
+    python -m pytest test_tardanzas.py
+"""
+
+from datetime import date, time
+
+from models.asistencia import Asistencia
+from models.contador_tardanza import ContadorTardanza
+from models.docente import Docente
+from tardanzas import rango_periodos, ranking, recalcular
+
+# Jornada matutina por defecto: la entrada normal termina a las 08:30
+A_TIEMPO = time(7, 10)
+TARDE = time(8, 45)
+
+
+def _docente(bd, cedula='0102030405'):
+    docente = Docente(nombre=f'Docente {cedula}', cedula=cedula, telefono='0999999999',
+                      correo=f'{cedula}@escuela.ec', jornada='matutina', tipo='DOCENTE')
+    bd.session.add(docente)
+    bd.session.commit()
+    return docente
+
+
+def _asistencia(bd, docente, fecha, hora):
+    asistencia = Asistencia(docente_id=docente.id, fecha=fecha, jornada='matutina', hora_entrada=hora)
+    bd.session.add(asistencia)
+    bd.session.commit()
+    return asistencia
+
+
+def _contadores():
+    return {(c.docente_id, c.periodo): c.tardanzas for c in ContadorTardanza.query}
+
+
+def test_suma_solo_las_entradas_tardias(bd):
+    docente = _docente(bd)
+    _asistencia(bd, docente, date(2025, 10, 6), A_TIEMPO)
+    assert _contadores() == {}
+
+    _asistencia(bd, docente, date(2025, 10, 7), TARDE)
+    _asistencia(bd, docente, date(2025, 10, 8), TARDE)
+    assert _contadores() == {(docente.id, 202510): 2}
+
+
+def test_resta_al_corregir_o_eliminar(bd):
+    docente = _docente(bd)
+    tarde = _asistencia(bd, docente, date(2025, 10, 7), TARDE)
+    a_tiempo = _asistencia(bd, docente, date(2025, 10, 8), A_TIEMPO)
+
+    tarde.hora_entrada = A_TIEMPO
+    bd.session.commit()
+    assert _contadores() == {(docente.id, 202510): 0}
+
+    a_tiempo.hora_entrada = TARDE
+    bd.session.commit()
+    assert _contadores() == {(docente.id, 202510): 1}
+
+    tarde.hora_salida = time(13, 0)  # la salida no cambia el contador
+    bd.session.commit()
+    assert _contadores() == {(docente.id, 202510): 1}
+
+    bd.session.delete(a_tiempo)
+    bd.session.commit()
+    assert _contadores() == {(docente.id, 202510): 0}
+
+
+def test_cambio_de_fecha_mueve_la_tardanza_de_mes(bd):
+    docente = _docente(bd)
+    asistencia = _asistencia(bd, docente, date(2025, 10, 31), TARDE)
+
+    asistencia.fecha = date(2025, 11, 3)
+    bd.session.commit()
+    assert _contadores() == {(docente.id, 202510): 0, (docente.id, 202511): 1}
+    assert recalcular() == 1
+    assert _contadores() == {(docente.id, 202511): 1}
+
+
+def test_rango_periodos_cruza_el_anio(app):
+    with app.app_context():
+        assert rango_periodos('mes', date(2025, 12, 15)) == (202512, 202512)
+        assert rango_periodos('trimestre', date(2025, 10, 15)) == (202509, 202511)
+        assert rango_periodos('trimestre', date(2026, 1, 15)) == (202512, 202602)
+        assert rango_periodos('anio', date(2026, 8, 31)) == (202509, 202608)
+        assert rango_periodos('anio', date(2026, 9, 1)) == (202609, 202708)
+
+
+def test_ranking_por_ventana(bd):
+    primero = _docente(bd, '0102030405')
+    segundo = _docente(bd, '0102030406')
+    _asistencia(bd, primero, date(2025, 9, 30), TARDE)
+    _asistencia(bd, primero, date(2025, 9, 29), TARDE)
+    _asistencia(bd, segundo, date(2025, 10, 1), TARDE)
+
+    hoy = date(2025, 10, 15)
+    assert ranking('mes', hoy=hoy) == [('Docente 0102030406', 1)]
+    assert ranking('trimestre', hoy=hoy) == [('Docente 0102030405', 2), ('Docente 0102030406', 1)]
+    assert ranking('trimestre', limite=1, hoy=hoy) == [('Docente 0102030405', 2)]
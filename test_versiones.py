@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Pruebas de las versiones de datos por tabla (versiones.py)
+
+Uso:
+    python -m pytest test_versiones.py
+"""
+
+from sqlalchemy import select
+
+import versiones
+from models.docente import Docente
+from models.version_datos import VersionDatos
+
+
+def _docente(cedula):
+    return Docente(nombre=f'Docente {cedula}', cedula=cedula, telefono='0999999999',
+                   correo=f'{cedula}@escuela.ec', jornada='matutina', tipo='DOCENTE')
+
+
+def _version_en_transaccion(bd, tabla):
+    return bd.session.execute(
+        select(VersionDatos.version).where(VersionDatos.tabla == tabla)
+    ).scalar() or 0
+
+
+def test_sube_despues_del_commit(bd):
+    """La transacción de la petición no toca versiones_datos; la versión sube al confirmar"""
+    antes = versiones.version_de('docentes')
+
+    bd.session.add(_docente('0102030405'))
+    bd.session.flush()
+    assert _version_en_transaccion(bd, 'docentes') == antes
+    assert bd.session.info['versiones'] == {'docentes'}
+
+    bd.session.commit()
+    assert versiones.version_de('docentes') == antes + 1
+
+
+def test_una_vez_por_transaccion_y_nada_al_revertir(bd):
+    antes = versiones.version_de('docentes')
+
+    bd.session.add(_docente('0102030405'))
+    bd.session.flush()
+    bd.session.add(_docente('0102030406'))
+    bd.session.commit()
+    assert versiones.version_de('docentes') == antes + 1
+
+    bd.session.add(_docente('0102030407'))
+    bd.session.flush()
+    bd.session.rollback()
+    assert versiones.version_de('docentes') == antes + 1
+
+
+def test_incrementar_devuelve_versiones_nuevas(bd):
+    with bd.engine.begin() as conexion:
+        assert versiones.incrementar(conexion, 'licencias', 'docentes', 'licencias') == {
+            'docentes': 1, 'licencias': 1}
+    with bd.engine.begin() as conexion:
+        assert versiones.incrementar(conexion, 'docentes') == {'docentes': 2}
+
+
+def test_avisa_a_los_suscriptores(bd):
+    recibidas = []
+    funcion = versiones.al_incrementar(lambda session, nuevas: recibidas.append(nuevas))
+    try:
+        bd.session.add(_docente('0102030405'))
+        bd.session.commit()
+    finally:
+        versiones._suscriptores.remove(funcion)
+    assert recibidas == [{'docentes': 1}]
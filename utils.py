@@ -1,27 +1,53 @@
 import socket
-import re
-import unicodedata
 
-from datetime import datetime, time, timedelta
+from datetime import date, datetime, time, timedelta
 
+# slugify vive en texto.py (con caché); se reexporta por compatibilidad
+from texto import slugify  # noqa: F401
 
-def slugify(text: str) -> str:
-    """Genera un slug ASCII seguro para usar como id de fila.
 
-    Convierte a minúsculas, normaliza diacríticos y reemplaza
-    caracteres no alfanuméricos por guiones.
+def rango_mes(anio: int, mes: int):
+    """Devuelve el rango semiabierto [inicio, fin) de un mes.
+
+    Se usa en lugar de ``extract('year'/'month', ...)`` para que los filtros
+    sobre ``fecha`` puedan aprovechar el índice de la columna.
+    """
+    inicio = date(anio, mes, 1)
+    if mes == 12:
+        fin = date(anio + 1, 1, 1)
+    else:
+        fin = date(anio, mes + 1, 1)
+    return inicio, fin
+
+
+def rango_anio_lectivo(anio_inicio: int, mes_inicio: int = 9):
+    """Devuelve el rango semiabierto [inicio, fin) de un año lectivo.
+
+    ``anio_inicio`` es el año calendario en que empieza el periodo
+    (por ejemplo 2023 para el año lectivo 2023-2024).
+    """
+    inicio = date(anio_inicio, mes_inicio, 1)
+    fin = date(anio_inicio + 1, mes_inicio, 1)
+    return inicio, fin
+
+
+def anio_lectivo_de(fecha, mes_inicio: int = 9) -> int:
+    """Año de inicio del año lectivo al que pertenece ``fecha``."""
+    return fecha.year if fecha.month >= mes_inicio else fecha.year - 1
+
+
+def segundos_del_dia(hora, faltante=None, fraccion=False):
+    """Segundos desde la medianoche de un ``time`` (``faltante`` si no hay hora).
+
+    Con ``fraccion`` se suman los microsegundos, para comparar contra un
+    límite igual que si se compararan los ``time``.
     """
-    if not text:
-        return ""
-    text = str(text)
-    # Normalizar y eliminar diacríticos
-    text = unicodedata.normalize('NFKD', text)
-    text = text.encode('ascii', 'ignore').decode('ascii')
-    text = text.lower()
-    # Reemplazar cualquier grupo de caracteres no alfanuméricos por '-'
-    text = re.sub(r'[^a-z0-9]+', '-', text)
-    text = text.strip('-')
-    return text
+    if hora is None:
+        return faltante
+    segundos = hora.hour * 3600 + hora.minute * 60 + hora.second
+    if fraccion and hora.microsecond:
+        return segundos + hora.microsecond / 1_000_000
+    return segundos
 
 
 def evaluar_asistencia(docente, entrada, salida):
@@ -37,9 +63,7 @@ def evaluar_asistencia(docente, entrada, salida):
 
 def calcular_tiempo_acumulado(entrada, salida):
     if entrada and salida:
-        dt_entrada = datetime.combine(datetime.today(), entrada)
-        dt_salida = datetime.combine(datetime.today(), salida)
-        return dt_salida - dt_entrada
+        return timedelta(seconds=segundos_del_dia(salida) - segundos_del_dia(entrada))
     return timedelta()  # Retorna cero si falta entrada o salida
 
 def get_local_ip():
@@ -2,6 +2,9 @@ from marshmallow import Schema, fields, validate, ValidationError
 from datetime import datetime, date
 import re
 
+# sanitize_input vive en texto.py (una sola pasada); se reexporta por compatibilidad
+from texto import sanitize_input  # noqa: F401
+
 class DocenteSchema(Schema):
     nombre = fields.Str(
         required=True, 
@@ -59,20 +62,6 @@ def validate_date_range(fecha_inicio, fecha_fin):
     if fecha_inicio > hoy:
         raise ValidationError('No se pueden crear licencias con fechas futuras')
 
-def sanitize_input(text):
-    """Sanitiza entrada de texto para prevenir XSS"""
-    if not text:
-        return text
-    
-    # Remover caracteres peligrosos
-    dangerous_chars = ['<', '>', '"', "'", '&', ';', '(', ')', 'script', 'javascript']
-    text = str(text)
-    
-    for char in dangerous_chars:
-        text = text.replace(char, '')
-    
-    return text.strip()
-
 def validate_qr_data(qr_data):
     """Valida el formato de datos QR"""
     if not qr_data:
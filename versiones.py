@@ -0,0 +1,159 @@
+"""
+Versiones de datos por tabla para invalidar cachés.
+
+Cada tabla tiene un contador en ``versiones_datos``. La sesión anota las
+tablas que toca cada transacción (flush con objetos nuevos, modificados o
+eliminados, o un INSERT/UPDATE/DELETE ejecutado con la sesión) y, justo
+después del commit, sube sus contadores en una transacción corta propia.
+Así la fila de cada tabla solo queda bloqueada durante esa actualización y
+no durante toda la petición: las marcas concurrentes no se esperan unas a
+otras, y como las tablas se actualizan siempre en el mismo orden (el
+alfabético) dos transacciones no se bloquean mutuamente.
+
+Cada commit con datos va seguido de su subida de versión, que se ve en
+todos los workers. Un lector que toma la versión entre el commit y la
+subida puede guardar datos nuevos con la versión anterior: la subida
+invalida esa copia enseguida. Si el proceso termina justo entre el commit
+y la subida, las copias quedan viejas hasta que venzan (TTL).
+
+``version_de(tabla)`` es una búsqueda en un diccionario por proceso. La
+tabla (una fila por tabla) se vuelve a leer como mucho cada
+``VERSIONES_RECARGA_SEGUNDOS`` y de inmediato tras un commit local. Las
+cachés deben tomar la versión *antes* de leer los datos: una versión vieja
+con datos nuevos solo provoca un recálculo de más.
+
+Las escrituras que no pasan por la sesión (``engine.begin()``, scripts)
+deben llamar a ``incrementar(conexion, tabla, ...)``; las de Core sobre la
+conexión de la sesión, a ``incrementar_en_sesion(session, tabla, ...)``.
+``al_incrementar`` registra funciones que reciben las versiones nuevas de
+cada commit (el cubo de asistencias las usa para seguir al día).
+"""
+
+import threading
+import time as reloj
+
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app_simple import db
+from models.version_datos import VersionDatos
+from sql_portable import upsert
+
+# Tablas cuyos cambios no invalidan nada (y que se escriben muy seguido)
+IGNORADAS = frozenset({VersionDatos.__tablename__, 'auditoria'})
+
+_versiones = {}
+_cargado = 0.0
+_lock = threading.Lock()
+_suscriptores = []
+
+
+def _cargar():
+    global _versiones, _cargado
+    intervalo = current_app.config.get('VERSIONES_RECARGA_SEGUNDOS', 1)
+    if reloj.monotonic() - _cargado < intervalo:
+        return _versiones
+
+    with _lock:
+        if reloj.monotonic() - _cargado >= intervalo:
+            try:
+                with db.engine.connect() as conexion:
+                    _versiones = dict(conexion.execute(select(VersionDatos.tabla, VersionDatos.version)).all())
+            except SQLAlchemyError:
+                current_app.logger.exception("No se pudo leer versiones_datos")
+            _cargado = reloj.monotonic()
+    return _versiones
+
+
+def version_de(tabla):
+    """Versión actual de ``tabla`` (0 si nunca se modificó)."""
+    return _cargar().get(tabla, 0)
+
+
+def version(*tablas):
+    """Tupla con la versión actual de cada tabla pedida."""
+    versiones = _cargar()
+    return tuple(versiones.get(tabla, 0) for tabla in tablas)
+
+
+def invalidar():
+    """Fuerza releer las versiones en la próxima consulta."""
+    global _cargado
+    _cargado = 0.0
+
+
+def incrementar(conexion, *tablas):
+    """Sube la versión de ``tablas`` en la transacción de ``conexion``.
+
+    Returns:
+        dict tabla -> versión nueva
+    """
+    tabla_versiones = VersionDatos.__table__
+    tablas = sorted(set(tablas))  # mismo orden de bloqueo en todos los workers
+    for tabla in tablas:
+        upsert(conexion, tabla_versiones, {'tabla': tabla, 'version': 1}, ['tabla'],
+               {'version': tabla_versiones.c.version + 1})
+    return dict(conexion.execute(
+        select(tabla_versiones.c.tabla, tabla_versiones.c.version)
+        .where(tabla_versiones.c.tabla.in_(tablas))
+    ).all())
+
+
+def incrementar_en_sesion(session, *tablas):
+    """Anota ``tablas`` como modificadas por escrituras con Core en la
+    transacción de ``session`` (``sql_portable.insertar_lote``); su versión
+    sube al confirmar."""
+    _anotar(session, tablas)
+
+
+def al_incrementar(funcion):
+    """Registra ``funcion(session, versiones)``, que se llama tras cada
+    commit con las versiones nuevas ({} si no se pudieron subir)."""
+    _suscriptores.append(funcion)
+    return funcion
+
+
+def _anotar(session, tablas):
+    session.info.setdefault('versiones', set()).update(set(tablas) - IGNORADAS)
+
+
+@event.listens_for(Session, 'after_flush')
+def _al_flush(session, flush_context):
+    tablas = set()
+    for objetos in (session.new, session.dirty, session.deleted):
+        for objeto in objetos:
+            tabla = getattr(objeto, '__tablename__', None)
+            if tabla:
+                tablas.add(tabla)
+    _anotar(session, tablas)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _al_ejecutar(estado):
+    if estado.is_insert or estado.is_update or estado.is_delete:
+        tabla = getattr(estado.statement, 'table', None)
+        if tabla is not None:
+            _anotar(estado.session, (tabla.name,))
+
+
+@event.listens_for(Session, 'after_commit')
+def _al_confirmar(session):
+    tablas = session.info.pop('versiones', None)
+    if not tablas:
+        return
+    try:
+        with session.get_bind().begin() as conexion:
+            nuevas = incrementar(conexion, *tablas)
+    except SQLAlchemyError:
+        current_app.logger.exception("No se pudieron subir las versiones de %s", sorted(tablas))
+        nuevas = {}
+    invalidar()
+    for funcion in _suscriptores:
+        funcion(session, nuevas)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _al_revertir(session, previous_transaction):
+    session.info.pop('versiones', None)